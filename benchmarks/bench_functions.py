@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the public plot_* and display_* functions on synthetic data.
+
+Every function is run twice per data size: 'cold' right after the data is written
+(no sidecar caches) and 'warm' with the caches of the first call. fig.show() is
+replaced by a serialization to JSON and the Dash apps serialize their layout instead
+of starting a server, so the display cost is measured without a browser. The
+scenario functions compare the data with a second root written with another seed.
+The peak memory is the peak of the Python and numpy allocations traced by
+tracemalloc, allocations inside the netCDF library are not included.
+
+Run from the root of the repository:
+    python benchmarks/bench_functions.py --sizes small medium --output results.json
+"""
+
+### Imports
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import plotly
+from dash import Dash
+from plotly.basedatatypes import BaseFigure
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import visualisation_scripts as vs
+from synthetic_data import write_synthetic_root
+from visualisation_scripts.visualisation_script_regions import get_wet_cells_rd
+
+### Global variables
+SIZES = {
+    "small": dict(years=2, grid=(60, 120), n_stations=12, n_transects=6),
+    "medium": dict(years=10, grid=(150, 300), n_stations=12, n_transects=6),
+    "large": dict(years=40, grid=(300, 600), n_stations=24, n_transects=12),
+}
+DISPLAY_DAYS = 90  # period of the 15-day maps, their figures grow with the slots
+
+
+def halves(path_root):
+    """Two regions splitting the synthetic DWS in a western and an eastern half."""
+    x_rd, y_rd, _ = get_wet_cells_rd(path_root)
+    x_mid = float(np.median(x_rd))
+    x0, x1 = float(x_rd.min()) - 1, float(x_rd.max()) + 1
+    y0, y1 = float(y_rd.min()) - 1, float(y_rd.max()) + 1
+    return {
+        "west": [(x0, y0), (x_mid, y0), (x_mid, y1), (x0, y1)],
+        "east": [(x_mid, y0), (x1, y0), (x1, y1), (x_mid, y1)],
+    }
+
+
+def cases(path_root, years, scenario_root):
+    """
+    The calls to benchmark, by name. The 15-day maps show the first DISPLAY_DAYS and
+    are compared with the same days of the last year and with scenario_root.
+    """
+    start = datetime(1976, 1, 1)
+    end = start + timedelta(days=DISPLAY_DAYS, hours=-1)
+    shift = timedelta(days=365 * (max(int(years), 2) - 1))
+    period_a, period_b = (start, end), (start + shift, end + shift)
+    roots = [path_root, scenario_root]
+    return {
+        "plot_volume": lambda: vs.plot_volume(path_root),
+        "plot_salinity": lambda: vs.plot_salinity(path_root),
+        "plot_temperature": lambda: vs.plot_temperature(path_root),
+        "plot_rivers_volume_flux": lambda: vs.plot_rivers_volume_flux(path_root),
+        "plot_transects_volume_flux": lambda: vs.plot_transects_volume_flux(path_root),
+        "plot_transects_salinity_flux": lambda: vs.plot_transects_salinity_flux(
+            path_root
+        ),
+        "plot_water_budget": lambda: vs.plot_water_budget(path_root),
+        "plot_histograms": lambda: vs.plot_histograms(path_root),
+        "plot_area_above_threshold": lambda: vs.plot_area_above_threshold(path_root),
+        "plot_cell_statistic": lambda: vs.plot_cell_statistic(path_root),
+        "plot_region_statistics": lambda: vs.plot_region_statistics(
+            path_root, halves(path_root)
+        ),
+        "plot_depth_classes": lambda: vs.plot_depth_classes(path_root),
+        "plot_scenarios": lambda: vs.plot_scenarios(roots, difference=True),
+        "display_start_end_dates": lambda: vs.display_start_end_dates(path_root),
+        "display_variable": lambda: vs.display_variable(start, end, "S", path_root),
+        "display_exposure": lambda: vs.display_exposure(start, end, path_root),
+        "display_rt": lambda: vs.display_rt(start, end, path_root),
+        "display_compare": lambda: vs.display_compare(
+            period_a, period_b, "S", path_root
+        ),
+        "display_layers": lambda: vs.display_layers(start, end, path_root),
+        "display_scenarios": lambda: vs.display_scenarios(start, end, "S", roots),
+        "display_probe": lambda: vs.display_probe(start, end, "S", path_root),
+        "display_tiles": lambda: vs.display_tiles(start, end, "S", path_root),
+    }
+
+
+def measure(func):
+    """Wall time (s) and traced peak memory (MB) of a call, its figure is serialized."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func()
+    if isinstance(result, BaseFigure):
+        result.to_json()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, functions=None):
+    results = []
+    show, run_app = BaseFigure.show, Dash.run
+    BaseFigure.show = lambda fig, *args, **kwargs: fig.to_json()
+    Dash.run = lambda app, *args, **kwargs: json.dumps(
+        app.layout, cls=plotly.utils.PlotlyJSONEncoder
+    )
+    try:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path_root = write_synthetic_root(Path(tmp_dir) / "a", **SIZES[size])
+                scenario_root = write_synthetic_root(
+                    Path(tmp_dir) / "b", **SIZES[size], seed=1
+                )
+                cases_size = cases(path_root, SIZES[size]["years"], scenario_root)
+                for name, func in cases_size.items():
+                    if functions and name not in functions:
+                        continue
+                    cold, peak_cold = measure(func)
+                    warm, peak_warm = measure(func)
+                    results.append(
+                        dict(
+                            size=size,
+                            function=name,
+                            cold_s=cold,
+                            warm_s=warm,
+                            peak_cold_mb=peak_cold,
+                            peak_warm_mb=peak_warm,
+                        )
+                    )
+                    print(
+                        f"{size:>8} {name:<30} {cold:>8.3f}s {warm:>8.3f}s "
+                        + f"{peak_cold:>9.1f}MB {peak_warm:>9.1f}MB"
+                    )
+    finally:
+        BaseFigure.show, Dash.run = show, run_app
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=list(SIZES))
+    parser.add_argument("--functions", nargs="+", help="only benchmark these")
+    parser.add_argument("--output", type=Path, help="JSON file for the results")
+    args = parser.parse_args()
+
+    print(
+        f"{'size':>8} {'function':<30} {'cold':>9} {'warm':>9} "
+        + f"{'peak cold':>11} {'peak warm':>11}"
+    )
+    results = run(args.sizes, args.functions)
+
+    if args.output:
+        report = dict(
+            revision=git_revision(),
+            date=datetime.now().isoformat(timespec="seconds"),
+            python=platform.python_version(),
+            numpy=np.__version__,
+            plotly=plotly.__version__,
+            sizes={size: SIZES[size] for size in args.sizes},
+            results=results,
+        )
+        args.output.write_text(json.dumps(report, indent=2, default=list))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the time to import visualisation_scripts in a fresh interpreter.
+
+Each case runs in its own process, the median of --repeat runs is reported. The
+bare import must not load the heavy dependencies, the script exits with status 1
+when it does or when a case takes longer than --max-seconds.
+
+Run from the root of the repository:
+    python benchmarks/bench_import_time.py --repeat 5 --max-seconds 1
+"""
+
+### Imports
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+### Global variables
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("plotly", "plotly_resampler", "dash", "pyproj", "xarray", "pandas")
+CASES = {
+    "import visualisation_scripts": "import visualisation_scripts",
+    "display_start_end_dates": (
+        "from visualisation_scripts import display_start_end_dates"
+    ),
+    "plot_volume": "from visualisation_scripts import plot_volume",
+    "all functions": (
+        "import visualisation_scripts as vs\n"
+        "for name in vs.__all__:\n"
+        "    getattr(vs, name)"
+    ),
+}
+
+TIMED = """
+import json, sys, time
+t0 = time.perf_counter()
+{code}
+seconds = time.perf_counter() - t0
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps(dict(seconds=seconds, heavy=heavy)))
+"""
+
+
+def time_case(code):
+    result = subprocess.run(
+        [sys.executable, "-c", TIMED.format(code=code, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, help="budget of the bare import")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'case':<30} {'median':>9}  heavy modules loaded")
+    for name, code in CASES.items():
+        runs = [time_case(code) for _ in range(args.repeat)]
+        median = sorted(run["seconds"] for run in runs)[len(runs) // 2]
+        heavy = runs[0]["heavy"]
+        print(f"{name:<30} {median:>8.3f}s  {', '.join(heavy) or '-'}")
+
+        if name == "import visualisation_scripts":
+            if heavy:
+                print(f"  the bare import loads {', '.join(heavy)}")
+                failed = True
+            if args.max_seconds is not None and median > args.max_seconds:
+                print(f"  the bare import takes more than {args.max_seconds}s")
+                failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of read_series_block against reading the stations one by one with .sel.
+
+Run from the root of the repository:
+    python benchmarks/bench_series_reader.py --stations 100 500 --years 10
+"""
+
+### Imports
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from visualisation_scripts.visualisation_script_series import read_series_block
+
+
+def write_rivers_file(path: Path, n_stations: int, years: int):
+    np_time = pd.date_range("1976-01-01", periods=years * 8766, freq="h")
+    rng = np.random.default_rng(0)
+    ds = xr.Dataset(
+        {
+            "volume_flux": (
+                ("time", "station"),
+                rng.normal(100, 50, (len(np_time), n_stations)),
+            ),
+            "station_name": (
+                "station",
+                np.array([f"station_{i}" for i in range(n_stations)], dtype=object),
+            ),
+        },
+        coords={"time": np_time, "station": np.arange(n_stations)},
+    )
+    ds.to_netcdf(path)
+
+
+def read_per_station(path: Path):
+    ds_flux = xr.open_dataset(path)
+    nps_flux = [
+        ds_flux.sel(station=i)["volume_flux"].values
+        for i in range(ds_flux.sizes["station"])
+    ]
+    ds_flux.close()
+    return nps_flux
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, nargs="+", default=[12, 100, 500])
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'stations':>8} {'per station':>12} {'block cold':>11} {'block warm':>11}")
+    for n_stations in args.stations:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "rivers_volume_flux.nc"
+            write_rivers_file(path, n_stations, args.years)
+
+            t_sel = timed(read_per_station, path)
+            t_cold = timed(read_series_block, path, "volume_flux", "station_name")
+            t_warm = timed(read_series_block, path, "volume_flux", "station_name")
+            print(f"{n_stations:>8} {t_sel:>11.3f}s {t_cold:>10.3f}s {t_warm:>10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
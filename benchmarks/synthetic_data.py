@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic versions of the files read by visualisation_scripts, with the variables,
+dimensions and units of the model output but random values, for benchmarks.
+
+Run from the root of the repository:
+    python benchmarks/synthetic_data.py /tmp/synthetic --years 2 --grid 60 120
+"""
+
+### Imports
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+from pyproj import Transformer
+
+### Global variables
+ORIGIN_LONLAT = (4.75, 52.93)  # first grid point, near the Marsdiep
+GRID_STEP = 200.0  # m
+RIVER_NAMES = ["Denoever", "Kornwerderzand"]
+
+
+def grid_coordinates(ny, nx):
+    """
+    Local coordinates (m), longitudes and latitudes of a regular grid starting at
+    ORIGIN_LONLAT, aligned with the RD New axes.
+    """
+    xc = np.arange(nx) * GRID_STEP
+    yc = np.arange(ny) * GRID_STEP
+    to_rd = Transformer.from_crs("epsg:4326", "epsg:28992", always_xy=True)
+    to_lonlat = Transformer.from_crs("epsg:28992", "epsg:4326", always_xy=True)
+    x0, y0 = to_rd.transform(*ORIGIN_LONLAT)
+    xx, yy = np.meshgrid(xc, yc)
+    lonc, latc = to_lonlat.transform(x0 + xx, y0 + yy)
+    return xc, yc, lonc, latc
+
+
+def write_15day_files(out: Path, ny, nx, n_slots, rng):
+    """
+    Write DWS200m.boundary_area.nc and 15day_aggregates.rt.nc for a ny x nx grid
+    with n_slots 15-day slots.
+    """
+    xc, yc, lonc, latc = grid_coordinates(ny, nx)
+    border = max(2, min(ny, nx) // 12)
+    mask = np.zeros((ny, nx), dtype=bool)
+    mask[border : ny - border, border : nx - border] = True
+    bdr = np.array(
+        [
+            [xc[border], yc[border]],
+            [xc[-border], yc[border]],
+            [xc[-border], yc[-border]],
+            [xc[border], yc[-border]],
+            [xc[border], yc[border]],
+        ]
+    )
+    xr.Dataset(
+        {
+            "bdr_dws": (("nb", "two"), bdr),
+            "lonc": (("y", "x"), lonc),
+            "latc": (("y", "x"), latc),
+            "xc": ("x", xc),
+            "yc": ("y", yc),
+            "mask_dws": (("y", "x"), mask),
+        }
+    ).to_netcdf(out / "DWS200m.boundary_area.nc")
+
+    time = pd.date_range("1976-01-08 12:00", periods=n_slots, freq="15D")
+    h = np.where(mask, rng.uniform(0, 20, (ny, nx)), np.nan)
+    h[: border // 2 + 1] = np.nan  # land along the southern edge
+    xx, yy = np.meshgrid(xc, yc)
+
+    def cube(mean, sd):
+        data = rng.normal(mean, sd, (n_slots, ny, nx)).astype(np.float32)
+        data[:, ~mask] = np.nan
+        return data
+
+    xr.Dataset(
+        {
+            "S_avg": (("time", "y", "x"), cube(25, 3)),
+            "S_sd": (("time", "y", "x"), np.abs(cube(2, 1))),
+            "T_avg": (("time", "y", "x"), cube(10, 4)),
+            "T_sd": (("time", "y", "x"), np.abs(cube(1, 0.5))),
+            "exp_pct": (("time", "y", "x"), np.clip(cube(50, 20), 0, 100)),
+            "Rt_mean": (("time", "y", "x"), np.abs(cube(20, 10))),
+            "h": (("y", "x"), h),
+            "xr": (("y", "x"), 121.7 + xx / 1000),
+            "yr": (("y", "x"), 548.3 + yy / 1000),
+        },
+        coords={"time": time},
+    ).to_netcdf(out / "15day_aggregates.rt.nc")
+
+
+def write_hourly_files(out: Path, n_hours, n_stations, n_transects, rng):
+    """
+    Write DWS.volume.nc, the S and T spatial aggregates, rivers_volume_flux.nc and
+    TR.volume_salt_flux.nc with n_hours hourly time steps.
+    """
+    time = pd.date_range("1976-01-01", periods=n_hours, freq="h")
+    tide = np.sin(2 * np.pi * np.arange(n_hours) / 12.42)
+
+    volume = 4e9 + 5e8 * tide + rng.normal(0, 1e7, n_hours)
+    xr.Dataset({"volume": ("time", volume)}, coords={"time": time}).to_netcdf(
+        out / "DWS.volume.nc"
+    )
+
+    for variable, mean in (("S", 25), ("T", 10)):
+        xr.Dataset(
+            {
+                f"{variable}_mean": ("time", mean + tide + rng.normal(0, 0.3, n_hours)),
+                f"{variable}_std": ("time", 2 + 0.5 * np.abs(tide)),
+            },
+            coords={"time": time},
+        ).to_netcdf(out / f"DWS200m.spatial_aggregates.{variable}.nc")
+
+    station_names = RIVER_NAMES + [f"station_{i}" for i in range(n_stations - 2)]
+    xr.Dataset(
+        {
+            "volume_flux": (
+                ("time", "station"),
+                np.abs(rng.normal(100, 50, (n_hours, n_stations))),
+            ),
+            "station_name": (
+                "station",
+                np.array(station_names[:n_stations], dtype=object),
+            ),
+        },
+        coords={"time": time, "station": np.arange(n_stations)},
+    ).to_netcdf(out / "rivers_volume_flux.nc")
+
+    volume_flux = 1e4 * tide[:, None] * rng.uniform(0.5, 2, n_transects)
+    volume_flux += rng.normal(50, 10, (n_hours, n_transects))
+    xr.Dataset(
+        {
+            "volume_flux": (("time", "transect"), volume_flux),
+            "salinity_flux": (("time", "transect"), 25 * volume_flux),
+            "transect_name": (
+                "transect",
+                np.array([f"transect_{i}" for i in range(n_transects)], dtype=object),
+            ),
+        },
+        coords={"time": time, "transect": np.arange(n_transects)},
+    ).to_netcdf(out / "TR.volume_salt_flux.nc")
+
+
+def write_synthetic_root(
+    path_root, years=2, grid=(60, 120), n_stations=12, n_transects=6, seed=0
+):
+    """
+    Write the six files of output_files under path_root.
+
+    Parameters:
+    path_root : str or Path
+        The folder to create output_files in.
+    years : float
+        The time span of the hourly and 15-day files.
+    grid : tuple of int
+        (ny, nx) of the model grid of the 15-day files.
+    n_stations, n_transects : int
+        The number of river stations and transects.
+    """
+    out = Path(path_root) / "output_files"
+    out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    write_15day_files(out, *grid, max(1, int(years * 365.25 / 15)), rng)
+    write_hourly_files(out, int(years * 8766), n_stations, n_transects, rng)
+
+    return Path(path_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path_root")
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--grid", type=int, nargs=2, default=[60, 120])
+    parser.add_argument("--stations", type=int, default=12)
+    parser.add_argument("--transects", type=int, default=6)
+    args = parser.parse_args()
+
+    write_synthetic_root(
+        args.path_root, args.years, tuple(args.grid), args.stations, args.transects
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the engines of visualisation_scripts against naive numpy references, on the
+synthetic data of benchmarks/synthetic_data.py.
+
+Run from the root of the repository:
+    python -m pytest tests
+"""
+
+### Imports
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from synthetic_data import write_synthetic_root
+
+
+@pytest.fixture(scope="session")
+def path_root(tmp_path_factory):
+    """Synthetic output_files of 1.2 years on a 60 x 120 grid, written once."""
+    return write_synthetic_root(tmp_path_factory.mktemp("synthetic"), years=1.2)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_budget import (
+    align_time_axes,
+    get_water_budget,
+)
+
+
+def hourly_axis(start, n_time):
+    return np.datetime64(start, "ns") + np.arange(n_time) * np.timedelta64(1, "h")
+
+
+def test_align_time_axes_matches_the_intersection():
+    axes = [
+        hourly_axis("2000-01-01T00", 100),
+        hourly_axis("2000-01-01T05", 40),
+        hourly_axis("1999-12-31T20", 60),
+    ]
+    np_time, offsets = align_time_axes(*axes)
+
+    shared = np.intersect1d(np.intersect1d(axes[0], axes[1]), axes[2])
+    np.testing.assert_array_equal(np_time, shared)
+    for axis, offset in zip(axes, offsets):
+        np.testing.assert_array_equal(axis[offset : offset + len(shared)], shared)
+
+
+@pytest.mark.parametrize(
+    "axes",
+    [
+        # shifted by half a step
+        [hourly_axis("2000-01-01T00", 10), hourly_axis("2000-01-01T00:30", 10)],
+        # no overlap
+        [hourly_axis("2000-01-01T00", 10), hourly_axis("2000-02-01T00", 10)],
+        # another time step
+        [hourly_axis("2000-01-01T00", 10), hourly_axis("2000-01-01T00", 10)[::2]],
+    ],
+)
+def test_align_time_axes_rejects_unaligned_axes(axes):
+    with pytest.raises(ValueError):
+        align_time_axes(*axes)
+
+
+def test_water_budget_matches_naive_terms(path_root):
+    out = path_root / "output_files"
+    with xr.open_dataset(out / "DWS.volume.nc") as ds:
+        volume = ds["volume"].values
+    with xr.open_dataset(out / "rivers_volume_flux.nc") as ds:
+        rivers = ds["volume_flux"].values.sum(axis=1)
+    with xr.open_dataset(out / "TR.volume_salt_flux.nc") as ds:
+        transects = ds["volume_flux"].values
+
+    signs = np.where(np.arange(transects.shape[1]) % 2, -1.0, 1.0)
+    _, budget, _ = get_water_budget(path_root, signs)
+
+    # central differences inside, one-sided at the ends, hourly steps
+    dvdt = np.empty_like(volume)
+    dvdt[1:-1] = (volume[2:] - volume[:-2]) / 7200
+    dvdt[0] = (volume[1] - volume[0]) / 3600
+    dvdt[-1] = (volume[-1] - volume[-2]) / 3600
+
+    np.testing.assert_allclose(budget["dV/dt"], dvdt, rtol=1e-9)
+    np.testing.assert_allclose(budget["Rivers"], rivers, rtol=1e-12)
+    np.testing.assert_allclose(budget["Transects"], transects @ signs, rtol=1e-9)
+    np.testing.assert_allclose(
+        budget["Residual"], dvdt - rivers - transects @ signs, rtol=1e-9, atol=1e-6
+    )
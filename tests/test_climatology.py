@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_climatology import (
+    CLIMATOLOGY_VARIABLES,
+    SLOTS_PER_YEAR,
+    build_climatology,
+    get_climatology,
+    slot_of_year,
+)
+from visualisation_scripts.visualisation_script_geometry import REL_PATH
+
+
+def test_slot_of_year_follows_the_calendar():
+    time_steps = pd.to_datetime(
+        ["2000-01-01", "2000-01-15", "2000-01-16", "2000-02-29", "2001-12-31"]
+    )
+    np.testing.assert_array_equal(slot_of_year(time_steps), [0, 0, 1, 3, 23])
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_climatology_matches_naive_slot_means(path_root):
+    climatology = build_climatology(path_root, chunk_slots=5)
+
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        time_steps = pd.to_datetime(ds["time"].values)
+        slots = np.array([2 * (t.month - 1) + (t.day >= 16) for t in time_steps])
+        for variable in CLIMATOLOGY_VARIABLES:
+            data = ds[variable].values.astype(float)
+            for slot in range(SLOTS_PER_YEAR):
+                block = data[slots == slot]
+                np.testing.assert_array_equal(
+                    climatology[f"{variable}_count"][slot],
+                    (~np.isnan(block)).sum(axis=0),
+                )
+                np.testing.assert_allclose(
+                    climatology[f"{variable}_mean"][slot],
+                    np.nanmean(block, axis=0) if len(block) else np.nan,
+                    rtol=1e-6,
+                )
+
+
+def test_get_climatology_is_cached(path_root):
+    first = get_climatology(path_root)
+    assert get_climatology(path_root) is first
+    built = build_climatology(path_root)
+    for variable in CLIMATOLOGY_VARIABLES:
+        np.testing.assert_array_equal(first[variable], built[f"{variable}_mean"])
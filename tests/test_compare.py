@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_compare import (
+    COMPARE_VARIABLES,
+    get_fig_compare,
+    read_period,
+)
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+    render_rt_frames,
+    render_wet_frames,
+)
+
+### Global variables
+PERIOD_A = (datetime(1976, 2, 1), datetime(1976, 4, 30))
+PERIOD_B = (datetime(1976, 6, 1), datetime(1976, 8, 31))
+
+
+def slots_in(time, period):
+    """The 15-day slots lying fully inside the period."""
+    return (time - timedelta(days=7.5) >= period[0]) & (
+        time + timedelta(days=7.5) - timedelta(hours=1) <= period[1]
+    )
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("variable_name", ["S", "rt"])
+def test_period_mean_difference_matches_the_aggregates(path_root, variable_name):
+    variable, _ = COMPARE_VARIABLES[variable_name]
+    render = render_rt_frames if variable_name == "rt" else render_wet_frames
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        time = pd.to_datetime(ds["time"].values)
+        values = ds[variable].values.astype(float)
+    mean_a = np.nanmean(values[slots_in(time, PERIOD_A)], axis=0)
+    mean_b = np.nanmean(values[slots_in(time, PERIOD_B)], axis=0)
+    expected = render((mean_a - mean_b)[None], geometry)[0]
+
+    fig = get_fig_compare(PERIOD_A, PERIOD_B, variable_name, path_root, True)
+    # the traces are A, B and the difference A - B shown in the third panel
+    np.testing.assert_allclose(fig.data[2].z, expected, rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(
+        fig.data[0].z, render(mean_a[None], geometry)[0], rtol=1e-6
+    )
+
+
+def test_per_slot_difference_aligns_the_slots(path_root):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        time = pd.to_datetime(ds["time"].values)
+        values = ds["T_avg"].values
+    slots_a = np.flatnonzero(slots_in(time, PERIOD_A))
+    slots_b = np.flatnonzero(slots_in(time, PERIOD_B))
+    n_slots = min(len(slots_a), len(slots_b))
+
+    fig = get_fig_compare(PERIOD_A, PERIOD_B, "T", path_root)
+    assert len(fig.frames) == n_slots
+    for i in (0, n_slots - 1):
+        difference = values[slots_a[i]] - values[slots_b[i]]
+        np.testing.assert_allclose(
+            fig.frames[i].data[2].z,
+            render_wet_frames(difference[None], geometry)[0],
+            rtol=1e-6,
+        )
+
+
+def test_empty_periods_are_rejected(path_root):
+    geometry = get_display_geometry(path_root)
+    # shorter than a slot, and before the data
+    for period in [
+        (datetime(1976, 2, 1), datetime(1976, 2, 10)),
+        (datetime(1975, 1, 1), datetime(1975, 12, 31)),
+    ]:
+        with pytest.raises(ValueError, match="No 15-day slot"):
+            read_period(path_root, "S_avg", *period, geometry)
+        with pytest.raises(ValueError, match="No 15-day slot"):
+            get_fig_compare(period, PERIOD_B, "S", path_root)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_depth_classes import (
+    DEPTH_CLASSES,
+    DEPTH_EDGES,
+    build_depth_permutation,
+    depth_class_statistics,
+)
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_regions import weighted_percentiles
+from visualisation_scripts.visualisation_script_slot_means import get_area_weights
+
+
+def naive_classes(h, edges):
+    """Class of each cell from shallow to deep, -1 without a depth."""
+    classes = np.full(len(h), -1)
+    for i, depth in enumerate(h):
+        if not np.isnan(depth):
+            classes[i] = sum(depth >= edge for edge in edges)
+    return classes
+
+
+def test_depth_permutation_groups_the_classes():
+    h = np.array([6.0, 1.0, np.nan, 2.0, 4.9, 0.5, 5.0, np.nan])
+    permutation, starts = build_depth_permutation(h, DEPTH_EDGES)
+    classes = naive_classes(h, DEPTH_EDGES)
+    for k in range(len(DEPTH_EDGES) + 1):
+        np.testing.assert_array_equal(
+            permutation[starts[k] : starts[k + 1]], np.flatnonzero(classes == k)
+        )
+    assert starts[-1] == np.sum(classes >= 0)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_depth_class_statistics_match_naive_means(path_root):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        h = ds["h"].values[geometry.wet_y, geometry.wet_x]
+        values = ds["S_avg"].values[:, geometry.wet_y, geometry.wet_x].T.astype(float)
+    area = get_area_weights(path_root)
+    classes = naive_classes(h, DEPTH_EDGES)
+
+    statistics = depth_class_statistics(
+        path_root, variables=("S_avg",), percentiles=(10, 90)
+    )
+    for k, name in enumerate(DEPTH_CLASSES):
+        block, weights = values[classes == k], area[classes == k]
+        assert len(block)
+        stats = statistics[name]["S_avg"]
+        weight_sum = weights @ ~np.isnan(block)
+        mean = np.nansum(weights[:, None] * block, axis=0) / weight_sum
+        np.testing.assert_allclose(stats["mean"], mean, rtol=1e-12)
+        np.testing.assert_allclose(stats["area"], weight_sum, rtol=1e-12)
+        p10, p90 = weighted_percentiles(block, weights, (10, 90))
+        np.testing.assert_array_equal(stats["p10"], p10)
+        np.testing.assert_array_equal(stats["p90"], p90)
+
+
+def test_empty_depth_classes_are_nan(path_root):
+    statistics = depth_class_statistics(
+        path_root,
+        variables=("T_avg",),
+        edges=(-10.0, 2.0),
+        names=("above water", "shallow", "deep"),
+    )
+    assert statistics["above water"]["T_avg"]["mean"].isna().all()
+    assert (statistics["above water"]["T_avg"]["area"] == 0).all()
+    assert statistics["deep"]["T_avg"]["mean"].notna().all()
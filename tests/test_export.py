@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import importlib
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from visualisation_scripts.visualisation_script_export import (
+    export_figures,
+    parse_period,
+    plan_jobs,
+)
+
+
+def test_parse_period_includes_the_end_date():
+    assert parse_period("1976") == (
+        "1976",
+        datetime(1976, 1, 1),
+        datetime(1976, 12, 31, 23),
+    )
+    assert parse_period("1976-02-01:1976-03-31") == (
+        "1976-02-01_1976-03-31",
+        datetime(1976, 2, 1),
+        datetime(1976, 3, 31, 23),
+    )
+    # a time given with the end date is kept as it is
+    assert parse_period("1976-02-01:1976-03-31T12")[2] == datetime(1976, 3, 31, 12)
+
+
+def test_plan_jobs_skips_up_to_date_outputs(path_root, tmp_path):
+    figures, periods = ["volume", "S"], ["1976", "1976-02-01:1976-03-31"]
+    jobs, skipped = plan_jobs(path_root, tmp_path, figures, periods, ["html", "json"])
+    names = sorted(out_path.name for _, _, out_path in jobs)
+    assert names == sorted(
+        f"{name}.{fmt}"
+        for name in ("volume", "S_1976", "S_1976-02-01_1976-03-31")
+        for fmt in ("html", "json")
+    )
+    assert skipped == []
+
+    # an output newer than its inputs is skipped unless forced, an older one is not
+    data_mtime = (path_root / "output_files/DWS.volume.nc").stat().st_mtime
+    (tmp_path / "volume.html").touch()
+    os.utime(tmp_path / "volume.html", (data_mtime + 10, data_mtime + 10))
+    (tmp_path / "volume.json").touch()
+    os.utime(tmp_path / "volume.json", (data_mtime - 10, data_mtime - 10))
+    jobs, skipped = plan_jobs(path_root, tmp_path, ["volume"], [], ["html", "json"])
+    assert skipped == [tmp_path / "volume.html"]
+    assert [out_path for _, _, out_path in jobs] == [tmp_path / "volume.json"]
+
+    jobs, skipped = plan_jobs(
+        path_root, tmp_path, ["volume"], [], ["html", "json"], force=True
+    )
+    assert len(jobs) == 2 and skipped == []
+
+
+def test_period_figures_need_periods(path_root, tmp_path):
+    with pytest.raises(ValueError, match="layers"):
+        plan_jobs(path_root, tmp_path, ["volume", "layers"], [], ["html"])
+
+
+def test_export_figures(path_root, tmp_path):
+    summary = export_figures(
+        path_root, tmp_path, figures=["volume"], formats=["json"], processes=1
+    )
+    assert summary["files"] == 1 and summary["skipped"] == 0
+    with open(tmp_path / "volume.json") as f:
+        assert json.load(f)["data"]
+
+    summary = export_figures(
+        path_root, tmp_path, figures=["volume"], formats=["json"], processes=1
+    )
+    assert summary["files"] == 0 and summary["skipped"] == 1
+
+
+def test_importing_the_main_module_does_not_run_the_cli():
+    # spawned workers import the main module of the parent process again
+    importlib.import_module("visualisation_scripts.__main__")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_histograms import (
+    HISTOGRAM_BINS,
+    build_histograms,
+    get_histograms,
+)
+
+
+def naive_histograms(values, edges):
+    counts = np.stack([np.histogram(column, edges)[0] for column in values.T])
+    outside = np.stack(
+        [(values < edges[0]).sum(axis=0), (values > edges[-1]).sum(axis=0)], axis=1
+    )
+    return counts, outside
+
+
+def test_build_histograms_matches_np_histogram():
+    rng = np.random.default_rng(2)
+    edges = np.linspace(0.0, 35.0, 71)
+    values = rng.uniform(-5, 40, (1000, 12))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:11] = edges[::7, None]  # values on the edges, including the highest
+    values[11] = 35.0 + 1e-12  # just above the highest edge
+
+    counts, outside = build_histograms(values, edges, chunk_cells=64)
+    expected_counts, expected_outside = naive_histograms(values, edges)
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_array_equal(outside, expected_outside)
+
+
+def test_get_histograms_matches_the_data(path_root):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        values = ds["T_avg"].values[:, geometry.wet_y, geometry.wet_x].T
+
+    edges, counts, outside = get_histograms(path_root, "T_avg")
+    low, high, n_bins = HISTOGRAM_BINS["T_avg"]
+    np.testing.assert_allclose(edges, np.linspace(low, high, n_bins + 1))
+
+    expected_counts, expected_outside = naive_histograms(values, edges)
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_array_equal(outside, expected_outside)
+    assert outside.sum() > 0  # the synthetic temperature reaches below -2 °C
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import subprocess
+import sys
+from pathlib import Path
+
+### Global variables
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def imported_modules(code):
+    """Run code in a fresh interpreter and return the top-level modules it loaded."""
+    script = f"import sys\n{code}\nprint(' '.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {name.split(".")[0] for name in result.stdout.split()}
+
+
+def test_importing_the_package_is_light():
+    modules = imported_modules("import visualisation_scripts")
+    heavy = {"xarray", "plotly", "pandas", "plotly_resampler", "pyproj"}
+    assert not heavy & modules
+
+
+def test_functions_are_imported_on_first_use():
+    modules = imported_modules(
+        "import visualisation_scripts\nvisualisation_scripts.plot_volume"
+    )
+    assert {"xarray", "plotly"} <= modules
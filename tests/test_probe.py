@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_geometry import (
+    DISPLAY_SHAPE,
+    REL_PATH,
+    get_display_geometry,
+    render_rt_frames,
+    render_wet_frames,
+)
+from visualisation_scripts.visualisation_script_probe import (
+    PROBE_VARIABLES,
+    get_probe_cache,
+    probe_cell,
+)
+
+
+@pytest.mark.parametrize(
+    "layer, render", [("variable", render_wet_frames), ("rt", render_rt_frames)]
+)
+def test_pixel_to_cell_matches_the_rendered_maps(path_root, layer, render):
+    # a map of the cell numbers shows at every pixel the cell drawn there
+    geometry = get_display_geometry(path_root)
+    ny, nx = geometry.grid_shape
+    cell_ids = render(np.arange(ny * nx, dtype=float).reshape(1, ny, nx), geometry)[0]
+
+    drawn = land = 0
+    for y in range(0, DISPLAY_SHAPE[0], 7):
+        for x in range(0, DISPLAY_SHAPE[1], 7):
+            cell = geometry.pixel_to_cell(x, y, layer=layer)
+            if cell is None:
+                assert np.isnan(cell_ids[y, x])
+                land += 1
+            else:
+                assert cell_ids[y, x] == cell[0] * nx + cell[1]
+                drawn += 1
+    assert drawn and land
+
+
+@pytest.mark.parametrize(
+    "x, y", [(-1, 0), (0, -1), (DISPLAY_SHAPE[1], 0), (0, DISPLAY_SHAPE[0])]
+)
+def test_pixels_outside_the_map_show_no_cell(path_root, x, y):
+    geometry = get_display_geometry(path_root)
+    assert geometry.pixel_to_cell(x, y) is None
+    assert geometry.pixel_to_cell(x, y, layer="rt") is None
+
+
+@pytest.mark.parametrize("layer", ["variable", "rt"])
+def test_probe_cell_matches_a_direct_read(path_root, layer):
+    geometry = get_display_geometry(path_root)
+    index_map = geometry.rt_index_map if layer == "rt" else geometry.index_map
+    pixels = np.argwhere(index_map >= 0)
+    time, caches = get_probe_cache(path_root)
+
+    probed = 0
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        for y, x in pixels[:: len(pixels) // 7]:
+            series = probe_cell(x, y, path_root, layer=layer)
+            iy, ix = geometry.pixel_to_cell(x, y, layer=layer)
+            if geometry.wet_lookup[iy, ix] < 0:
+                assert series is None
+                continue
+            probed += 1
+            assert series.attrs["cell"] == (iy, ix)
+            np.testing.assert_array_equal(series.index, time)
+            for variable in PROBE_VARIABLES:
+                expected = ds[variable].values[:, iy, ix]
+                np.testing.assert_array_equal(series[variable], expected)
+                # the series is the row of the cell in the cell-major cache
+                np.testing.assert_array_equal(
+                    caches[variable][geometry.wet_lookup[iy, ix]], expected
+                )
+    assert probed
+
+
+def test_land_pixels_have_no_series(path_root):
+    geometry = get_display_geometry(path_root)
+    y, x = np.argwhere(geometry.index_map < 0)[0]
+    assert probe_cell(x, y, path_root) is None
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_climatology import (
+    get_climatology,
+    slot_of_year,
+)
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    REL_PATH_BOUNDARIES_DWS,
+    get_display_geometry,
+    render_rt_frames,
+    render_wet_frames,
+)
+from visualisation_scripts.visualisation_script_raster_cache import (
+    RasterCache,
+    get_rendered_frames,
+    get_rendered_layers,
+)
+
+
+@pytest.mark.parametrize(
+    "variable, layer, anomaly",
+    [("S_avg", "wet", False), ("Rt_mean", "rt", False), ("T_avg", "wet", True)],
+)
+def test_rendered_frames_match_direct_rendering(path_root, variable, layer, anomaly):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH, engine="netcdf4") as ds:
+        mask_ind = np.zeros(ds.sizes["time"], dtype=bool)
+        mask_ind[[2, 3, 17]] = True
+        data = ds[variable].values[mask_ind]
+        if anomaly:
+            time_steps = pd.to_datetime(ds["time"].values[mask_ind])
+            data = data - get_climatology(path_root)[variable][slot_of_year(time_steps)]
+        render = render_rt_frames if layer == "rt" else render_wet_frames
+        expected = render(data, geometry).astype(np.float32)
+
+        # rendered on the first call, read from the cache on the second
+        for _ in range(2):
+            frames, value_range = get_rendered_frames(
+                ds, variable, mask_ind, geometry, path_root, layer, anomaly
+            )
+            np.testing.assert_array_equal(frames, expected)
+            np.testing.assert_allclose(
+                value_range, (np.nanmin(data), np.nanmax(data)), rtol=1e-6
+            )
+
+
+def test_eviction_drops_the_least_recently_used_frames(tmp_path):
+    source = tmp_path / "data.nc"
+    source.touch()
+    frame = np.zeros((10, 10), dtype=np.float32)
+    frame_bytes = 128 + frame.nbytes  # with the .npy header
+    cache = RasterCache(source, budget_mb=4.5 * frame_bytes / 1e6)
+
+    index = {}
+    keys = [f"frame{i}" for i in range(8)]
+    for i, key in enumerate(keys):
+        cache.put(index, key, frame, (0, 1))
+    # use the frames in a shuffled order
+    order = [5, 2, 7, 0, 3, 6, 1, 4]
+    for rank, i in enumerate(order):
+        index[keys[i]]["last_access"] = rank
+    keep = [keys[0]]
+
+    total = cache.evict(index, keep=keep)
+
+    # naive LRU: drop the oldest frames not kept until four fit in the budget
+    expected = [keys[i] for i in order]
+    for key in list(expected):
+        if len(expected) <= 4:
+            break
+        if key not in keep:
+            expected.remove(key)
+    assert sorted(index) == sorted(expected)
+    assert sorted(path.stem for path in cache.directory.glob("*.npy")) == sorted(
+        expected
+    )
+    assert total == 4 * frame_bytes <= cache.budget_bytes
+
+
+def test_outdated_frames_are_not_returned(tmp_path):
+    source = tmp_path / "data.nc"
+    source.touch()
+    cache = RasterCache(source)
+    index = {}
+    cache.put(index, "frame", np.ones((2, 2)), (1, 1))
+    cache.write_index(index)
+    assert cache.get(["frame"])[0][0] is not None
+
+    depends = tmp_path / "climatology.npz"
+    depends.touch()
+    written = cache._path("frame").stat().st_mtime
+    os.utime(depends, (written + 10, written + 10))
+    assert cache.get(["frame"], depends=(depends,))[0][0] is None
+
+
+def test_cached_frames_are_memory_mapped(path_root):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH, engine="netcdf4") as ds:
+        mask_ind = np.zeros(ds.sizes["time"], dtype=bool)
+        mask_ind[[4, 5]] = True
+        for _ in range(2):
+            frames, _ = get_rendered_frames(ds, "S_avg", mask_ind, geometry, path_root)
+            assert len(frames) == 2
+            assert all(isinstance(frame, np.memmap) for frame in frames)
+            assert not any(frame.flags.writeable for frame in frames)
+
+
+def test_frames_are_rendered_again_when_the_boundaries_change(path_root, monkeypatch):
+    import visualisation_scripts.visualisation_script_raster_cache as raster_cache
+
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH, engine="netcdf4") as ds:
+        mask_ind = np.zeros(ds.sizes["time"], dtype=bool)
+        mask_ind[[6, 7]] = True
+        get_rendered_frames(ds, "T_avg", mask_ind, geometry, path_root)
+
+        rendered = []
+
+        def render(data, geometry):
+            rendered.append(len(data))
+            return render_wet_frames(data, geometry)
+
+        monkeypatch.setattr(raster_cache, "render_wet_frames", render)
+        get_rendered_frames(ds, "T_avg", mask_ind, geometry, path_root)
+        assert rendered == []
+
+        cache = RasterCache(path_root / REL_PATH)
+        written = max(
+            cache._path(RasterCache.key("T_avg", "wet", t)).stat().st_mtime
+            for t in ds["time"].values[mask_ind]
+        )
+        boundary = path_root / REL_PATH_BOUNDARIES_DWS
+        os.utime(boundary, (written + 1e-3, written + 1e-3))
+        get_rendered_frames(ds, "T_avg", mask_ind, geometry, path_root)
+        assert rendered == [2]
+
+
+def test_rendered_layers_match_direct_rendering(path_root):
+    geometry = get_display_geometry(path_root)
+    layers = {"S_sd": "wet", "exp_pct": "wet", "Rt_mean": "rt"}
+    with xr.open_dataset(path_root / REL_PATH, engine="netcdf4") as ds:
+        # one layer has some of the slots cached already, the others none
+        mask_ind = np.zeros(ds.sizes["time"], dtype=bool)
+        mask_ind[[9]] = True
+        get_rendered_frames(ds, "S_sd", mask_ind, geometry, path_root)
+        mask_ind[[8, 12]] = True
+
+        rendered = get_rendered_layers(ds, layers, mask_ind, geometry, path_root)
+        for variable, layer in layers.items():
+            data = ds[variable].values[mask_ind]
+            render = render_rt_frames if layer == "rt" else render_wet_frames
+            frames, value_range = rendered[variable]
+            np.testing.assert_array_equal(frames, render(data, geometry))
+            np.testing.assert_allclose(
+                value_range, (np.nanmin(data), np.nanmax(data)), rtol=1e-6
+            )
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_reductions import (
+    _merge_moments,
+    _moments,
+    _reduce_chunk,
+    build_reductions,
+    get_reductions,
+    plot_cell_statistic,
+    reduce_cells,
+    sketch_edges,
+    sketch_percentiles,
+)
+
+
+def read_cells(path_root, variable):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        time = ds["time"].values
+        values = ds[variable].values[:, geometry.wet_y, geometry.wet_x]
+    years = (time - time[0]) / np.timedelta64(1, "D") / 365.25
+    return years, values.astype(float)
+
+
+def test_reduce_cells_matches_naive_statistics(path_root):
+    percentiles = (10, 50, 90)
+    statistics = reduce_cells(path_root, ("S_avg", "T_avg"), percentiles, chunk_slots=7)
+
+    for variable in ("S_avg", "T_avg"):
+        years, values = read_cells(path_root, variable)
+        np.testing.assert_allclose(
+            statistics[f"{variable}_mean"], values.mean(axis=0), rtol=1e-12
+        )
+        np.testing.assert_allclose(
+            statistics[f"{variable}_sd"], values.std(axis=0), rtol=1e-10
+        )
+        slope, _ = np.polyfit(years, values, 1)
+        np.testing.assert_allclose(
+            statistics[f"{variable}_trend"], slope, rtol=1e-8, atol=1e-10
+        )
+
+        # the sketch percentiles lie in the sketch bin of the exact percentile
+        edges = sketch_edges(variable)
+        expected = np.percentile(values, percentiles, axis=0, method="inverted_cdf")
+        for percentile, exact in zip(percentiles, expected):
+            inside = (exact > edges[0]) & (exact < edges[-1])
+            np.testing.assert_array_less(
+                np.abs(statistics[f"{variable}_p{percentile}"] - exact)[inside],
+                edges[1] - edges[0] + 1e-9,
+            )
+
+    _, s = read_cells(path_root, "S_avg")
+    _, t = read_cells(path_root, "T_avg")
+    correlation = [np.corrcoef(s[:, i], t[:, i])[0, 1] for i in range(s.shape[1])]
+    np.testing.assert_allclose(statistics["S_T_correlation"], correlation, rtol=1e-8)
+
+
+def test_parallel_reductions_match_serial(path_root):
+    names = ("exp_pct", "S_T")
+    serial = build_reductions(path_root, names, chunk_slots=7)
+    parallel = build_reductions(path_root, names, chunk_slots=7, processes=2)
+    for name in names:
+        for key, value in serial[name].items():
+            np.testing.assert_allclose(parallel[name][key], value, rtol=1e-12)
+
+
+def test_merged_moments_keep_precision_with_a_large_offset():
+    rng = np.random.default_rng(3)
+    x = rng.normal(1e8, 1.0, (300, 4))
+    y = 2 * x + rng.normal(0, 0.5, x.shape)
+    valid = rng.random(x.shape) > 0.2
+
+    merged = None
+    for r0 in range(0, len(x), 37):
+        part = _moments(x[r0 : r0 + 37], y[r0 : r0 + 37], valid[r0 : r0 + 37])
+        merged = part if merged is None else _merge_moments(merged, part)
+
+    for i in range(x.shape[1]):
+        xi, yi = x[valid[:, i], i], y[valid[:, i], i]
+        assert merged["n"][i] == len(xi)
+        np.testing.assert_allclose(merged["mean_x"][i], xi.mean(), rtol=1e-15)
+        np.testing.assert_allclose(merged["m2_x"][i], len(xi) * xi.var(), rtol=1e-7)
+        np.testing.assert_allclose(
+            merged["c_xy"][i], len(xi) * np.cov(xi, yi, bias=True)[0, 1], rtol=1e-7
+        )
+
+
+def test_unknown_statistic_raises(path_root):
+    with pytest.raises(ValueError, match="S_avg_trend"):
+        plot_cell_statistic(path_root, "S_avg_median")
+
+
+def test_percentiles_outside_the_sketch_edges_are_nan():
+    edges = np.linspace(0.0, 10.0, 11)
+    # 10 values in the sketch per cell, with 0, 5 or 20 values above the edges
+    sketch = np.ones((3, 10), dtype=np.int64)
+    outside = np.array([[0, 0], [0, 5], [20, 0]])
+    result = sketch_percentiles(sketch, outside, edges, (10, 50, 90, 100))
+
+    np.testing.assert_allclose(result[:, 0], [1.0, 5.0, 9.0, 10.0])
+    # 15 values: the median is the 7.5th, P90 the 13.5th, above the edges
+    np.testing.assert_allclose(result[:2, 1], [1.5, 7.5])
+    assert np.isnan(result[2:, 1]).all()
+    # 30 values: P10 and P50 are among the 20 below the edges
+    assert np.isnan(result[:2, 2]).all()
+    np.testing.assert_allclose(result[2:, 2], [7.0, 10.0])
+
+
+def test_values_outside_the_sketch_edges_are_counted_apart(tmp_path):
+    # Rt_mean sketches span 0 to 120 days, a cell staying above keeps no P90
+    time = pd.date_range("2000-01-08 12:00", periods=10, freq="15D")
+    rt = np.array([[5.0, 50.0, 150.0]] * 10, dtype=np.float32)
+    rt[:3, 0] = -1.0
+    rt[:, 1] += np.arange(10)
+    rt[0, 2] = np.nan
+    path = tmp_path / "data.nc"
+    xr.Dataset(
+        {"Rt_mean": (("time", "y", "x"), rt[:, None, :])}, coords={"time": time}
+    ).to_netcdf(path)
+
+    partial = _reduce_chunk(path, 0, 10, ("Rt_mean",), np.zeros(3, int), np.arange(3))
+    moments = partial["Rt_mean"]
+    np.testing.assert_array_equal(moments["outside"], [[3, 0], [0, 0], [0, 9]])
+    np.testing.assert_array_equal(moments["sketch"].sum(axis=1), [7, 10, 0])
+
+    edges = sketch_edges("Rt_mean")
+    p10, p90 = sketch_percentiles(
+        moments["sketch"], moments["outside"], edges, (10, 90)
+    )
+    assert np.isnan(p10[0]) and abs(p90[0] - 5.0) <= edges[1] - edges[0]
+    assert abs(p90[1] - 58.0) <= edges[1] - edges[0]
+    assert np.isnan(p10[2]) and np.isnan(p90[2])
+
+
+def test_cached_reductions_are_not_rebuilt(path_root, monkeypatch):
+    import visualisation_scripts.visualisation_script_reductions as reductions
+
+    names = ("Rt_mean", "S_T")
+    built = get_reductions(path_root, names)
+
+    def build(*args, **kwargs):
+        raise AssertionError("the reductions should be read from the cache")
+
+    monkeypatch.setattr(reductions, "build_reductions", build)
+    cached = get_reductions(path_root, names)
+    for name in names:
+        for key, value in built[name].items():
+            np.testing.assert_array_equal(cached[name][key], value)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_regions import (
+    get_region_cells,
+    get_wet_cells_rd,
+    region_statistics,
+    weighted_percentiles,
+)
+
+
+def naive_weighted_percentiles(values, weights, percentiles):
+    result = np.full((len(percentiles), values.shape[1]), np.nan)
+    for t in range(values.shape[1]):
+        valid = ~np.isnan(values[:, t])
+        if not valid.any():
+            continue
+        order = np.argsort(values[valid, t])
+        sorted_values = values[valid, t][order]
+        cum_weights = np.cumsum(weights[valid][order])
+        for i, percentile in enumerate(percentiles):
+            # first value whose cumulative weight reaches the percentile, the last
+            # one when rounding puts the target above the total weight
+            target = cum_weights[-1] * percentile / 100
+            reached = np.flatnonzero(cum_weights >= target)
+            result[i, t] = sorted_values[reached[0] if len(reached) else -1]
+    return result
+
+
+def test_weighted_percentiles_match_naive_sorting():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(200, 30))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:, 3] = np.nan
+    weights = rng.uniform(0.5, 2, 200)
+    percentiles = (0, 10, 50, 90, 100)
+    np.testing.assert_array_equal(
+        weighted_percentiles(values, weights, percentiles),
+        naive_weighted_percentiles(values, weights, percentiles),
+    )
+
+
+def regions(path_root):
+    """A rectangle and an L-shaped region with their naive cell masks."""
+    x_rd, y_rd, _ = get_wet_cells_rd(path_root)
+    x0, x1, x2 = np.quantile(x_rd, [0.1, 0.4, 0.7])
+    y0, y1, y2 = np.quantile(y_rd, [0.2, 0.5, 0.8])
+    rectangle = [(x0, y0), (x2, y0), (x2, y2), (x0, y2)]
+    l_shape = [(x0, y0), (x2, y0), (x2, y1), (x1, y1), (x1, y2), (x0, y2)]
+
+    def inside(xa, xb, ya, yb):
+        return (x_rd > xa) & (x_rd < xb) & (y_rd > ya) & (y_rd < yb)
+
+    masks = {
+        "rectangle": inside(x0, x2, y0, y2),
+        "L": inside(x0, x2, y0, y1) | inside(x0, x1, y0, y2),
+    }
+    return {"rectangle": rectangle, "L": l_shape}, masks
+
+
+def test_region_cells_match_naive_masks(path_root):
+    polygons, masks = regions(path_root)
+    for name, polygon in polygons.items():
+        cells = get_region_cells(path_root, polygon)
+        np.testing.assert_array_equal(cells, np.flatnonzero(masks[name]))
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_region_statistics_match_naive_means(path_root):
+    polygons, masks = regions(path_root)
+    _, _, area = get_wet_cells_rd(path_root)
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        values = ds["S_avg"].values[:, geometry.wet_y, geometry.wet_x].T.astype(float)
+
+    statistics = region_statistics(
+        path_root, polygons, variables=("S_avg",), percentiles=(10, 90)
+    )
+    for name, mask in masks.items():
+        block, weights = values[mask], area[mask]
+        valid = ~np.isnan(block)
+        weight_sum = (weights[:, None] * valid).sum(axis=0)
+        mean = np.nansum(weights[:, None] * block, axis=0) / weight_sum
+        stats = statistics[name]["S_avg"]
+        np.testing.assert_allclose(stats["mean"], mean, rtol=1e-12)
+        np.testing.assert_allclose(stats["area"], weight_sum, rtol=1e-12)
+        p10, p90 = naive_weighted_percentiles(block, weights, (10, 90))
+        np.testing.assert_array_equal(stats["p10"], p10)
+        np.testing.assert_array_equal(stats["p90"], p90)
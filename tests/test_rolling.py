@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_rolling import (
+    ROLLING_CACHE_SIZE,
+    RollingStats,
+    _rolling_stats_entry,
+    get_rolling_stats,
+)
+
+
+def salinity_series(path_root, n_time=2000):
+    path = path_root / "output_files/DWS200m.spatial_aggregates.S.nc"
+    with xr.open_dataset(path) as ds:
+        values = ds["S_mean"].values[:n_time].astype(float)
+    values[300:700] = np.nan
+    values[1000::7] = np.nan
+    return path, values
+
+
+def naive_rolling(values, window, center, min_count):
+    n = len(values)
+    mean, std = np.full(n, np.nan), np.full(n, np.nan)
+    for i in range(n):
+        i0 = i - window // 2 if center else i - window + 1
+        block = values[max(i0, 0) : max(i0 + window, 0)]
+        block = block[~np.isnan(block)]
+        if len(block) >= min_count:
+            mean[i], std[i] = block.mean(), block.std()
+    return mean, std
+
+
+@pytest.mark.parametrize("window", [12, 354])
+@pytest.mark.parametrize("center", [True, False])
+def test_rolling_matches_naive_windows(path_root, window, center):
+    _, values = salinity_series(path_root)
+    mean, std = RollingStats(values).rolling(window, center=center)
+    expected_mean, expected_std = naive_rolling(
+        values, window, center, max(window // 2, 1)
+    )
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-10)
+    np.testing.assert_allclose(std, expected_std, rtol=1e-6, atol=1e-9)
+
+
+def test_rolling_stats_are_cached_per_series(path_root):
+    path, values = salinity_series(path_root)
+    stats = get_rolling_stats(path, "S_mean", values)
+    assert get_rolling_stats(path, "S_mean", None) is stats
+    assert get_rolling_stats(path, "S_std", values) is not stats
+    assert _rolling_stats_entry.cache_info().maxsize == ROLLING_CACHE_SIZE
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualisation_scripts.visualisation_script_rollups import (
+    ROLLUP_LEVELS,
+    build_rollups,
+    get_rollups,
+)
+from visualisation_scripts.visualisation_script_series import read_series_block
+
+
+def naive_period_starts(np_time, level):
+    days = pd.DatetimeIndex(np_time).normalize()
+    if level == "daily":
+        starts = days
+    elif level == "weekly":
+        starts = days - pd.to_timedelta(days.weekday, unit="D")
+    elif level == "monthly":
+        starts = days.to_period("M").to_timestamp()
+    else:
+        starts = days.to_period("Y").to_timestamp()
+    return starts.values.astype("datetime64[ns]")
+
+
+def river_series(path_root):
+    path = path_root / "output_files/rivers_volume_flux.nc"
+    np_time, np_block, _ = read_series_block(path, "volume_flux", "station_name")
+    values = np.array(np_block[:3], dtype=float)
+    values[0, 100:400] = np.nan  # a gap across the first weeks
+    values[1, :] = np.nan
+    return path, np_time, values
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_build_rollups_matches_naive_periods(path_root):
+    _, np_time, values = river_series(path_root)
+    rollups = build_rollups(np_time, values, chunk_size=1000)
+
+    for level in ROLLUP_LEVELS:
+        starts = naive_period_starts(np_time, level)
+        periods = np.unique(starts)
+        np.testing.assert_array_equal(rollups[f"{level}_time"], periods)
+        for i, period in enumerate(periods):
+            block = values[:, starts == period]
+            count = (~np.isnan(block)).sum(axis=1)
+            np.testing.assert_array_equal(rollups[f"{level}_count"][:, i], count)
+            expected = {
+                "mean": np.nanmean(block, axis=1),
+                "min": np.nanmin(block, axis=1),
+                "max": np.nanmax(block, axis=1),
+            }
+            for stat, reference in expected.items():
+                np.testing.assert_allclose(
+                    rollups[f"{level}_{stat}"][:, i], reference, rtol=1e-12
+                )
+
+
+def test_weeks_start_on_monday(path_root):
+    _, np_time, values = river_series(path_root)
+    rollups = build_rollups(np_time, values)
+    assert set(pd.DatetimeIndex(rollups["weekly_time"]).weekday) == {0}
+
+
+def test_get_rollups_reads_the_sidecar(path_root):
+    path, np_time, values = river_series(path_root)
+    built = get_rollups(path, "test_volume_flux", np_time, values)
+    cached = get_rollups(path, "test_volume_flux", np_time, values[:, ::-1])
+    assert built.keys() == cached.keys()
+    for key in built:
+        np.testing.assert_array_equal(built[key], cached[key])
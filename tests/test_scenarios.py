@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+from synthetic_data import write_synthetic_root
+
+from visualisation_scripts.visualisation_script_geometry import REL_PATH
+from visualisation_scripts.visualisation_script_scenarios import (
+    SCENARIO_SERIES,
+    check_grids,
+    check_time_axes,
+    open_scenarios,
+)
+
+
+@pytest.fixture(scope="module")
+def short_root(tmp_path_factory):
+    """A second scenario on the same grid, shorter and with other data."""
+    return write_synthetic_root(tmp_path_factory.mktemp("short"), years=0.5, seed=1)
+
+
+def test_check_time_axes_rejects_other_periods(path_root, short_root):
+    rel_path = SCENARIO_SERIES["volume"][0]
+    datasets = open_scenarios([path_root, path_root, short_root], rel_path)
+    check_time_axes(datasets[:2], ["a", "b"])
+
+    # a shorter run, and a run of the same length starting an hour later
+    with pytest.raises(ValueError, match="'short'"):
+        check_time_axes(datasets, ["a", "b", "short"])
+    time = datasets[0]["time"].values + np.timedelta64(1, "h")
+    shifted = datasets[0].assign_coords(time=time)
+    with pytest.raises(ValueError, match="'shifted'"):
+        check_time_axes([datasets[0], shifted], ["a", "shifted"])
+    for ds in datasets:
+        ds.close()
+
+
+def test_check_grids_accepts_other_data_on_the_same_grid(path_root, short_root):
+    check_grids([path_root, short_root], ["a", "b"])
+
+
+def test_check_grids_rejects_other_grids(path_root, tmp_path):
+    other = write_synthetic_root(tmp_path / "other", years=0.1, grid=(50, 120))
+    with pytest.raises(ValueError, match="between scenarios 'a' and 'other'"):
+        check_grids([path_root, other], ["a", "other"])
+
+
+def test_check_grids_rejects_other_land(path_root, tmp_path):
+    root = write_synthetic_root(tmp_path / "land", years=0.1)
+    ds = xr.load_dataset(root / REL_PATH)
+    h = ds["h"].values.copy()
+    iy, ix = np.argwhere(~np.isnan(h))[0]
+    h[iy, ix] = np.nan  # a wet cell falls dry
+    ds["h"] = (ds["h"].dims, h)
+    ds.to_netcdf(root / REL_PATH)
+    with pytest.raises(ValueError, match="'h' of"):
+        check_grids([path_root, root], ["a", "land"])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+import shutil
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_cache import sidecar_path
+from visualisation_scripts.visualisation_script_series import (
+    BinAggregator,
+    read_series_block,
+)
+from visualisation_scripts.visualisation_script_spatial import REL_PATH_AGGREGATES_S
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("n_out", [7, 200, 1000])
+def test_band_bins_stay_aligned_with_the_mean(path_root, n_out):
+    with xr.open_dataset(path_root / REL_PATH_AGGREGATES_S) as ds:
+        time = ds["time"].values
+        mean = ds["S_mean"].values.astype(float)
+        std = ds["S_std"].values.astype(float)
+    # a gap in the time axis leaves bins empty, a missing stretch leaves them nan
+    keep = np.ones(len(time), dtype=bool)
+    keep[2000:2600] = False
+    time, mean, std = time[keep], mean[keep], std[keep]
+    mean[4000:4100] = np.nan
+    upper, lower = mean + std, mean - std
+
+    x_mean, y_mean = BinAggregator("mean").aggregate(time, mean, n_out=n_out)
+    x_upper, y_upper = BinAggregator("max").aggregate(time, upper, n_out=n_out)
+    x_lower, y_lower = BinAggregator("min").aggregate(time, lower, n_out=n_out)
+    np.testing.assert_array_equal(x_upper, x_mean)
+    np.testing.assert_array_equal(x_lower, x_mean)
+
+    # naive bins: equally wide in time, the last one closed at the end
+    t = time.view("int64")
+    edges = np.linspace(t[0], t[-1], n_out + 1)
+    bins = np.minimum(np.searchsorted(edges, t, side="right") - 1, n_out - 1)
+    filled = np.unique(bins)
+    assert len(filled) == len(x_mean) < n_out + 1
+    for k, b in enumerate(filled):
+        in_bin = bins == b
+        assert x_mean[k] == time[in_bin][0]
+        np.testing.assert_allclose(y_mean[k], np.nanmean(mean[in_bin]), rtol=1e-12)
+        np.testing.assert_array_equal(y_upper[k], np.nanmax(upper[in_bin]))
+        np.testing.assert_array_equal(y_lower[k], np.nanmin(lower[in_bin]))
+
+    # the band drawn over the bins covers their mean
+    valid = ~np.isnan(y_mean)
+    assert np.all(y_lower[valid] <= y_mean[valid])
+    assert np.all(y_mean[valid] <= y_upper[valid])
+
+
+@pytest.mark.parametrize(
+    "rel_path, variable, name_variable",
+    [
+        ("output_files/rivers_volume_flux.nc", "volume_flux", "station_name"),
+        ("output_files/TR.volume_salt_flux.nc", "salinity_flux", "transect_name"),
+    ],
+)
+def test_series_block_matches_per_station_reads(
+    path_root, rel_path, variable, name_variable
+):
+    np_time, np_block, np_names = read_series_block(
+        path_root / rel_path, variable, name_variable
+    )
+    assert not np_block.flags.writeable
+    with xr.open_dataset(path_root / rel_path) as ds:
+        dim = ds[name_variable].dims[0]
+        np.testing.assert_array_equal(np_time, ds["time"].values)
+        assert list(np_names) == list(ds[name_variable].values)
+        for i, station in enumerate(ds[dim].values):
+            np.testing.assert_array_equal(
+                np_block[i], ds[variable].sel({dim: station}).values
+            )
+
+
+def test_series_block_is_rewritten_when_the_data_changes(path_root, tmp_path):
+    path = tmp_path / "rivers_volume_flux.nc"
+    shutil.copy(path_root / "output_files/rivers_volume_flux.nc", path)
+    _, np_block, _ = read_series_block(path, "volume_flux", "station_name")
+    before = np.array(np_block)
+    del np_block
+
+    ds = xr.load_dataset(path)
+    ds["volume_flux"] = ds["volume_flux"] * 2
+    ds.to_netcdf(path)
+    written = sidecar_path(path.resolve(), ".volume_flux.npy").stat().st_mtime
+    os.utime(path, (written + 1, written + 1))
+
+    _, np_block, _ = read_series_block(path, "volume_flux", "station_name")
+    np.testing.assert_array_equal(np_block, 2 * before)
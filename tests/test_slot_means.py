@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_slot_means import (
+    build_slot_means,
+    get_area_weights,
+    get_slot_means,
+)
+
+
+def naive_slot_means(values, weights):
+    """Weighted mean and SD of every column, a column at a time."""
+    mean = np.full(values.shape[1], np.nan)
+    sd = np.full(values.shape[1], np.nan)
+    for t in range(values.shape[1]):
+        valid = ~np.isnan(values[:, t])
+        if valid.any():
+            v, w = values[valid, t], weights[valid]
+            mean[t] = np.sum(w * v) / np.sum(w)
+            sd[t] = np.sqrt(np.sum(w * (v - mean[t]) ** 2) / np.sum(w))
+    return mean, sd
+
+
+@pytest.mark.parametrize("chunk_cells", [7, 4096])
+def test_build_slot_means_matches_naive_statistics(chunk_cells):
+    rng = np.random.default_rng(5)
+    values = rng.normal(30.0, 2.0, (150, 12))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:, 4] = np.nan  # a slot without data
+    values[1:, 7] = np.nan  # a slot with a single cell
+    weights = rng.uniform(1e4, 4e4, 150)
+
+    mean, sd = build_slot_means(values, weights, chunk_cells=chunk_cells)
+    expected_mean, expected_sd = naive_slot_means(values, weights)
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-12)
+    np.testing.assert_allclose(sd, expected_sd, rtol=1e-9, atol=1e-12)
+    assert np.isnan(mean[4]) and np.isnan(sd[4])
+    assert sd[7] == 0
+
+
+def test_slot_means_of_the_aggregates(path_root):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        values = ds["S_avg"].values[:, geometry.wet_y, geometry.wet_x].T
+        time = ds["time"].values
+    expected_mean, expected_sd = naive_slot_means(
+        values.astype(float), get_area_weights(path_root)
+    )
+
+    slot_means = get_slot_means(path_root, "S_avg")
+    np.testing.assert_array_equal(slot_means.index, time)
+    np.testing.assert_allclose(slot_means["mean"], expected_mean, rtol=1e-12)
+    np.testing.assert_allclose(slot_means["sd"], expected_sd, rtol=1e-9)
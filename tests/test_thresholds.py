@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_regions import get_wet_cells_rd
+from visualisation_scripts.visualisation_script_thresholds import (
+    area_above_threshold,
+    build_sorted_slots,
+)
+
+
+@pytest.mark.parametrize("below", [False, True])
+def test_area_above_threshold_matches_naive_sums(path_root, below):
+    geometry = get_display_geometry(path_root)
+    with xr.open_dataset(path_root / REL_PATH) as ds:
+        values = ds["Rt_mean"].values[:, geometry.wet_y, geometry.wet_x]
+    _, _, area = get_wet_cells_rd(path_root)
+    thresholds = np.array([-1.0, 0.0, 5.0, 20.0, 37.5, 1e3])
+
+    result = area_above_threshold(path_root, "Rt_mean", thresholds, below=below)
+
+    for i, threshold in enumerate(thresholds):
+        selected = values < threshold if below else values > threshold
+        np.testing.assert_allclose(
+            result.iloc[:, i], (selected * area).sum(axis=1) / 1e6, rtol=1e-9
+        )
+
+
+def test_sorted_slots_leave_out_nan_cells():
+    values = np.array([[3.0, np.nan], [1.0, 2.0], [np.nan, 1.0]])
+    area = np.array([10.0, 20.0, 40.0])
+    sorted_values, cum_area = build_sorted_slots(values, area, chunk_slots=1)
+    np.testing.assert_array_equal(sorted_values, [[1, 3, np.nan], [1, 2, np.nan]])
+    np.testing.assert_array_equal(cum_area, [[0, 20, 30, 30], [0, 40, 60, 60]])
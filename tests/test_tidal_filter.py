@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+from visualisation_scripts.visualisation_script_series import read_series_block
+from visualisation_scripts.visualisation_script_tidal_filter import (
+    FILTERS,
+    get_residual,
+    godin_weights,
+    lowpass,
+)
+
+
+def transect_fluxes(path_root):
+    path = path_root / "output_files/TR.volume_salt_flux.nc"
+    _, np_block, _ = read_series_block(path, "volume_flux", "transect_name")
+    values = np.array(np_block, dtype=float)
+    values[0, 500] = np.nan
+    values[2, 3000:3100] = np.nan
+    return path, values
+
+
+def naive_lowpass(values, weights):
+    """Direct convolution, nan where the window leaves the series or holds a nan."""
+    half = len(weights) // 2
+    filtered = np.full(values.shape, np.nan)
+    windows = sliding_window_view(values, len(weights), axis=-1)
+    filtered[..., half : values.shape[-1] - half] = windows @ weights[::-1]
+    return filtered
+
+
+@pytest.mark.parametrize("method", sorted(FILTERS))
+def test_lowpass_matches_direct_convolution(path_root, method):
+    _, values = transect_fluxes(path_root)
+    weights = FILTERS[method]()
+    filtered = lowpass(values, weights, series_chunk=4)
+    expected = naive_lowpass(values, weights)
+    np.testing.assert_array_equal(np.isnan(filtered), np.isnan(expected))
+    np.testing.assert_allclose(filtered, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_godin_removes_the_tide():
+    weights = godin_weights()
+    assert len(weights) == 71
+    np.testing.assert_allclose(weights.sum(), 1.0)
+    tide = np.sin(2 * np.pi * np.arange(2000) / 12.42)
+    assert np.nanmax(np.abs(lowpass(tide, weights))) < 0.01
+
+
+def test_get_residual_caches_the_filtered_series(path_root):
+    path, values = transect_fluxes(path_root)
+    residual = get_residual(path, "test_volume_flux", values, "lanczos")
+    np.testing.assert_allclose(
+        residual, naive_lowpass(values, FILTERS["lanczos"]()), rtol=1e-9, atol=1e-6
+    )
+    with pytest.raises(ValueError):
+        get_residual(path, "test_volume_flux", values, "butterworth")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import numpy as np
+import pytest
+
+from visualisation_scripts.visualisation_script_geometry import (
+    DISPLAY_SHAPE,
+    get_display_geometry,
+)
+from visualisation_scripts.visualisation_script_tiles import (
+    MAX_ZOOM,
+    PLOT_WIDTH,
+    TILE_SIZE,
+    get_tile_index,
+    zoom_for_view,
+)
+
+
+def assemble(path_root, layer, zoom):
+    """The tiles of a zoom level put side by side, cut to the display grid."""
+    scale = 2**zoom
+    n_ty = -(-DISPLAY_SHAPE[0] * scale // TILE_SIZE)
+    n_tx = -(-DISPLAY_SHAPE[1] * scale // TILE_SIZE)
+    rows = [
+        np.hstack(
+            [get_tile_index(path_root, layer, zoom, ty, tx) for tx in range(n_tx)]
+        )
+        for ty in range(n_ty)
+    ]
+    return np.vstack(rows)[: DISPLAY_SHAPE[0] * scale, : DISPLAY_SHAPE[1] * scale]
+
+
+@pytest.mark.parametrize(
+    "width, zoom",
+    [
+        (DISPLAY_SHAPE[1], 0),
+        (PLOT_WIDTH, 0),
+        (PLOT_WIDTH / 2, 1),
+        (PLOT_WIDTH / 2 - 1, 2),
+        (PLOT_WIDTH / 8, 3),
+        (1.0, MAX_ZOOM),
+        (0.0, MAX_ZOOM),
+        (10 * DISPLAY_SHAPE[1], 0),
+    ],
+)
+def test_zoom_for_view(width, zoom):
+    assert zoom_for_view((100.0, 100.0 + width)) == zoom
+
+
+@pytest.mark.parametrize("width", np.geomspace(PLOT_WIDTH / 2**MAX_ZOOM, 1200, 9))
+def test_zoom_for_view_is_the_coarsest_sharp_zoom(width):
+    zoom = zoom_for_view((0.0, width))
+    assert width * 2**zoom >= PLOT_WIDTH * (1 - 1e-12)
+    if zoom > 0:
+        assert width * 2 ** (zoom - 1) < PLOT_WIDTH
+
+
+@pytest.mark.parametrize("layer", ["wet", "rt"])
+def test_zoom_0_tiles_are_cut_from_the_index_map(path_root, layer):
+    geometry = get_display_geometry(path_root)
+    index_map = geometry.rt_index_map if layer == "rt" else geometry.index_map
+    np.testing.assert_array_equal(assemble(path_root, layer, 0), index_map)
+
+    # the tiles past the edges of the display grid are padded without data
+    ty, tx = DISPLAY_SHAPE[0] // TILE_SIZE, DISPLAY_SHAPE[1] // TILE_SIZE
+    tile = get_tile_index(path_root, layer, 0, ty, tx)
+    assert (tile[DISPLAY_SHAPE[0] % TILE_SIZE :] == -1).all()
+    assert (tile[:, DISPLAY_SHAPE[1] % TILE_SIZE :] == -1).all()
+
+
+@pytest.mark.parametrize("layer", ["wet", "rt"])
+def test_zoomed_tiles_draw_the_cells_of_the_overview(path_root, layer):
+    overview = np.unique(assemble(path_root, layer, 0))
+    zoomed = np.unique(assemble(path_root, layer, 1))
+    assert set(overview) <= set(zoomed)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from datetime import datetime
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from visualisation_scripts.visualisation_script_transport import (
+    TRANSPORT_VARIABLES,
+    build_cumulative_transport,
+    net_transport,
+)
+
+
+@pytest.mark.parametrize("variable", sorted(TRANSPORT_VARIABLES))
+@pytest.mark.parametrize(
+    "start_date, end_date",
+    [(None, None), (datetime(1976, 2, 3, 5), datetime(1976, 7, 19, 22))],
+)
+def test_net_transport_matches_naive_sums(path_root, variable, start_date, end_date):
+    with xr.open_dataset(path_root / "output_files/TR.volume_salt_flux.nc") as ds:
+        np_time = ds["time"].values
+        flux = ds[variable].values.T
+        names = ds["transect_name"].values
+
+    seconds = np.full(len(np_time), 3600.0)  # the synthetic series are hourly
+    selected = np.ones(len(np_time), dtype=bool)
+    if start_date is not None:
+        selected &= np_time >= np.datetime64(start_date)
+    if end_date is not None:
+        selected &= np_time <= np.datetime64(end_date)
+    transport = flux[:, selected] * seconds[selected]
+
+    result = net_transport(path_root, start_date, end_date, variable)
+    assert list(result.index) == list(names)
+    np.testing.assert_allclose(result["net"], transport.sum(axis=1), rtol=1e-9)
+    np.testing.assert_allclose(
+        result["positive"], np.where(transport > 0, transport, 0).sum(axis=1)
+    )
+    np.testing.assert_allclose(
+        result["negative"], np.where(transport < 0, transport, 0).sum(axis=1)
+    )
+
+
+def test_cumulative_transport_with_gaps_and_irregular_steps():
+    np_time = np.array(
+        ["2000-01-01T00", "2000-01-01T01", "2000-01-01T03", "2000-01-01T04"],
+        dtype="datetime64[ns]",
+    )
+    flux = np.array([[1.0, -2.0, np.nan, 4.0]])
+    cumulative = build_cumulative_transport(np_time, flux)
+
+    # the intervals are 1 h, 2 h, 1 h and, for the last value, 1 h again
+    transport = np.array([3600.0, -2 * 7200.0, 0.0, 4 * 3600.0])
+    np.testing.assert_allclose(cumulative[0, 0], np.r_[0, np.cumsum(transport)])
+    np.testing.assert_allclose(
+        cumulative[1, 0], np.r_[0, np.cumsum(np.maximum(transport, 0))]
+    )
+    np.testing.assert_allclose(
+        cumulative[2, 0], np.r_[0, np.cumsum(np.minimum(transport, 0))]
+    )
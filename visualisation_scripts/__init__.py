@@ -1,31 +1,86 @@
-from .visualisation_script_15day_aggregations_test import (
-    display_exposure_test,
-    display_start_end_dates_test,
-    display_variable_test,
-    read_data_from_opendap_test,
-)
-from .visualisation_script_15day_aggregations import (
-    display_exposure,
-    display_start_end_dates,
-    display_variable,
-    display_rt,
-)
-from .visualisation_script_rivers import plot_rivers_volume_flux
-from .visualisation_script_spatial import plot_salinity, plot_temperature, plot_volume
-from .visualisation_script_transects_flux import (
-    plot_transects_salinity_flux,
-    plot_transects_volume_flux,
-)
+from importlib import import_module
+
+# The functions are imported from their module on first use, so that importing the
+# package does not pull in plotly, plotly_resampler (and Dash), pyproj or xarray
+_ATTRIBUTES = {
+    "display_exposure_test": ".visualisation_script_15day_aggregations_test",
+    "display_start_end_dates_test": ".visualisation_script_15day_aggregations_test",
+    "display_variable_test": ".visualisation_script_15day_aggregations_test",
+    "read_data_from_opendap_test": ".visualisation_script_15day_aggregations_test",
+    "display_exposure": ".visualisation_script_15day_aggregations",
+    "display_start_end_dates": ".visualisation_script_15day_aggregations",
+    "display_variable": ".visualisation_script_15day_aggregations",
+    "display_rt": ".visualisation_script_15day_aggregations",
+    "display_layers": ".visualisation_script_15day_aggregations",
+    "plot_water_budget": ".visualisation_script_budget",
+    "display_compare": ".visualisation_script_compare",
+    "plot_histograms": ".visualisation_script_histograms",
+    "profile": ".visualisation_script_profiling",
+    "display_probe": ".visualisation_script_probe",
+    "clear_raster_cache": ".visualisation_script_raster_cache",
+    "probe_cell": ".visualisation_script_probe",
+    "plot_cell_statistic": ".visualisation_script_reductions",
+    "reduce_cells": ".visualisation_script_reductions",
+    "plot_region_statistics": ".visualisation_script_regions",
+    "region_statistics": ".visualisation_script_regions",
+    "plot_rivers_volume_flux": ".visualisation_script_rivers",
+    "depth_class_statistics": ".visualisation_script_depth_classes",
+    "plot_depth_classes": ".visualisation_script_depth_classes",
+    "display_scenarios": ".visualisation_script_scenarios",
+    "plot_scenarios": ".visualisation_script_scenarios",
+    "plot_salinity": ".visualisation_script_spatial",
+    "plot_temperature": ".visualisation_script_spatial",
+    "plot_volume": ".visualisation_script_spatial",
+    "plot_area_above_threshold": ".visualisation_script_thresholds",
+    "display_tiles": ".visualisation_script_tiles",
+    "plot_transects_salinity_flux": ".visualisation_script_transects_flux",
+    "plot_transects_volume_flux": ".visualisation_script_transects_flux",
+    "transport_summary": ".visualisation_script_transport",
+}
 
 __all__ = [
     "plot_salinity",
     "plot_temperature",
     "plot_volume",
+    "plot_water_budget",
     "plot_rivers_volume_flux",
     "plot_transects_volume_flux",
     "plot_transects_salinity_flux",
+    "transport_summary",
     "display_start_end_dates",
     "display_variable",
     "display_exposure",
+    "display_layers",
+    "display_compare",
+    "display_scenarios",
+    "plot_scenarios",
+    "display_probe",
+    "display_tiles",
+    "probe_cell",
+    "plot_area_above_threshold",
+    "plot_histograms",
+    "plot_cell_statistic",
+    "reduce_cells",
+    "plot_region_statistics",
+    "region_statistics",
+    "plot_depth_classes",
+    "depth_class_statistics",
+    "profile",
+    "clear_raster_cache",
     "read_data_from_opendap_test",
 ]
+
+
+def __getattr__(name):
+    if name in _ATTRIBUTES:
+        value = getattr(import_module(_ATTRIBUTES[name], __name__), name)
+    elif name.startswith("visualisation_script_"):
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_ATTRIBUTES))
@@ -0,0 +1,5 @@
+from .visualisation_script_export import main
+
+# spawned workers of export_figures import this module again, without running main
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,35 @@ from datetime import timedelta
 from pathlib import Path
 import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import xarray as xr
-from pyproj import Transformer
+
+from .visualisation_script_climatology import anomaly_layout
+from .visualisation_script_geometry import (
+    REL_PATH,
+    data_window,
+    get_display_geometry,
+    land_layer,
+)
+from .visualisation_script_profiling import stage
+from .visualisation_script_raster_cache import (
+    get_rendered_frames,
+    get_rendered_layers,
+)
 
 ### Global variables
-REL_PATH_BOUNDARIES_DWS = "output_files//DWS200m.boundary_area.nc"
-REL_PATH = "output_files//15day_aggregates.rt.nc"  # change for your folder with data if run locally
+# layers of display_layers: variable -> (grid, title, colorbar title)
+LAYERS = {
+    "S_avg": ("wet", "Salinity 15 days average", "Salinity (g kg<sup>-1</sup>)"),
+    "S_sd": (
+        "wet",
+        "Salinity 15 days standard deviation",
+        "Salinity (g kg<sup>-1</sup>)",
+    ),
+    "T_avg": ("wet", "Temperature 15 days average", "Temperature (°C)"),
+    "T_sd": ("wet", "Temperature 15 days standard deviation", "Temperature (°C)"),
+    "exp_pct": ("wet", "Exposure rate for 15 days", "Exposure (%)"),
+    "Rt_mean": ("rt", "Mean residence time for 15 days", "Residence time (days)"),
+}
 
 
 def display_start_end_dates(path_root: str | Path):
@@ -19,7 +40,7 @@ def display_start_end_dates(path_root: str | Path):
     Display the start and end dates of the available data.
     """
     # Load the data
-    ds = xr.open_dataset(path_root + REL_PATH, engine="netcdf4")
+    ds = xr.open_dataset(Path(path_root) / REL_PATH, engine="netcdf4")
 
     # Extract the start and end dates
     delta_left = timedelta(days=7.5)
@@ -37,7 +58,200 @@ def display_start_end_dates(path_root: str | Path):
     print("Please choose a time period within these dates.")
 
 
-def display_variable(start_date, end_date, variable_name, path_root: str | Path):
+def get_fig_variable(
+    start_date, end_date, variable_name, path_root: str | Path, anomaly=False
+):
+    """
+    Build the figure shown by display_variable.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    with stage("geometry"):
+        geometry = get_display_geometry(path_root)
+
+    # Load the data
+    with stage("load") as record:
+        ds = xr.open_dataset(Path(path_root) / REL_PATH, engine="netcdf4")
+
+        # Find the indices of the time steps that correspond to the chosen dates
+        delta_left = timedelta(days=7.5)
+        delta_right = timedelta(days=7.5) - timedelta(
+            hours=1
+        )  # so as to show the exact period
+        time_steps = ds["time"].values
+        time_steps = pd.to_datetime(time_steps)
+        mask_ind = (time_steps - delta_left >= start_date) & (
+            time_steps + delta_right <= end_date
+        )
+        time_steps_update = time_steps[mask_ind]
+        record.info["slots"] = int(mask_ind.sum())
+
+    with stage("rasterize") as record:
+        ##### rotations of data, read from the raster cache when rendered before
+        avg_data_, _ = get_rendered_frames(
+            ds, f"{variable_name}_avg", mask_ind, geometry, path_root, anomaly=anomaly
+        )
+        sd_data_, _ = get_rendered_frames(
+            ds, f"{variable_name}_sd", mask_ind, geometry, path_root, anomaly=anomaly
+        )
+        ds.close()
+        bdr_dws0p = geometry.boundary
+
+        # Replace DWS area with nan
+        data_h = land_layer(geometry, avg_data_[0])
+
+        # the cached frames are copied once, into the array shown by px.imshow
+        merged_data = np.empty(
+            (len(avg_data_), 2) + avg_data_[0].shape, dtype=np.float32
+        )
+        for i, (avg_frame, sd_frame) in enumerate(zip(avg_data_, sd_data_)):
+            merged_data[i, 0] = avg_frame
+            merged_data[i, 1] = sd_frame
+        record.info["frames_shape"] = merged_data.shape
+
+    with stage("figure-build"):
+        yticks = np.arange(0, 800)
+        xticks = np.arange(0, 1200)
+
+        # Create the figure
+        fig = px.imshow(
+            merged_data,
+            x=xticks,
+            y=yticks,
+            facet_col=1,
+            animation_frame=0,
+            origin="lower",
+            title=("Salinity" if variable_name == "S" else "Temperature")
+            + " : 15 days average (in facet_col=0) and standard deviation (in facet_col=1)",
+        )
+        fig.update_layout(width=1000, height=600)
+
+        # Add boundary to the first facet
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
+            ),
+            row=1,  # First facet
+            col=1,
+        )
+
+        # Add boundary to the second facet
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
+            ),
+            row=1,  # Second facet
+            col=2,
+        )
+        fig.add_trace(
+            go.Heatmap(
+                z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+            ),
+            row=1,
+            col=1,
+        )
+        fig.add_trace(
+            go.Heatmap(
+                z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+            ),
+            row=1,
+            col=2,
+        )
+
+        # Drop animation buttons
+        fig["layout"].pop("updatemenus")
+
+        # Modify the colorbar
+        fig.update_layout(
+            coloraxis=dict(
+                cmin=0,
+                cmax=int(np.nanmax(merged_data)) + 1,
+                colorbar=dict(
+                    title=(
+                        "Salinity (g kg<sup>-1</sup>)"
+                        if variable_name == "S"
+                        else "Temperature (°C)"
+                    ),
+                ),
+            )
+        )
+        if anomaly:
+            fig.update_layout(anomaly_layout(merged_data))
+            fig.update_layout(title=fig.layout.title.text + " (anomaly)")
+
+        # Modify the layout x and y axis
+        fig.update_layout(
+            **{
+                f"xaxis{1}": dict(
+                    title="Easting (km)",
+                    tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                    ticktext=[0, 20, 40, 60, 80, 100, 120],
+                ),
+            },
+            **{
+                f"yaxis{1}": dict(
+                    title="Northing (km)",
+                    tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                    ticktext=[0, 20, 40, 60, 80],
+                ),
+            },
+        )
+        fig.update_layout(
+            **{
+                f"xaxis{2}": dict(
+                    title="Easting (km)",
+                    tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                    ticktext=[0, 20, 40, 60, 80, 100, 120],
+                ),
+            },
+            **{
+                f"yaxis{2}": dict(
+                    title="",
+                    tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                    ticktext=[0, 20, 40, 60, 80],
+                ),
+            },
+        )
+
+        # Add slider
+        fig.update_layout(
+            sliders=[
+                {
+                    "currentvalue": {
+                        "prefix": "15 days time slot: ",
+                        "visible": True,
+                        "xanchor": "center",
+                    },
+                    "len": 0.9,
+                    "steps": [
+                        {
+                            "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
+                            "method": "animate",
+                            "args": [[i], {"frame": {"duration": 500, "redraw": True}}],
+                        }
+                        for i in range(len(time_steps_update))
+                    ],
+                }
+            ],
+        )
+
+    return fig
+
+
+def display_variable(
+    start_date, end_date, variable_name, path_root: str | Path, anomaly=False
+):
     """
     Display the 15 days average and standard deviation of the chosen variable in the chosen time period.
     The data is displayed in a plotly figure with a slider to navigate through the time steps.
@@ -49,282 +263,146 @@ def display_variable(start_date, end_date, variable_name, path_root: str | Path)
         The end date of the time period to display.
     variable_name : str
         The name of the variable to display. It should be one of 'S' (salinity) or 'T' (temperature).
+    anomaly : bool
+        Display the difference with the multi-year mean of the same 15-day slot of the year.
     """
-    # Load the data
-    ds = xr.open_dataset(path_root + REL_PATH, engine="netcdf4")
-    dws_b = xr.open_dataset(path_root + REL_PATH_BOUNDARIES_DWS)
+    fig = get_fig_variable(start_date, end_date, variable_name, path_root, anomaly)
+    with stage("serialize"):
+        fig.show()
 
-    # Extract boundary points
-    boundary_points = dws_b.bdr_dws.values
 
-    # Find the indices of the time steps that correspond to the chosen dates
-    delta_left = timedelta(days=7.5)
-    delta_right = timedelta(days=7.5) - timedelta(
-        hours=1
-    )  # so as to show the exact period
-    time_steps = ds["time"].values
-    time_steps = pd.to_datetime(time_steps)
-    mask_ind = (time_steps - delta_left >= start_date) & (
-        time_steps + delta_right <= end_date
-    )
-    time_steps_update = time_steps[mask_ind]
+def get_fig_exposure(start_date, end_date, path_root: str | Path, anomaly=False):
+    """
+    Build the figure shown by display_exposure.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
 
-    # Extract the data
-    avg = (
-        ds["S_avg"].values[mask_ind]
-        if variable_name == "S"
-        else ds["T_avg"].values[mask_ind]
-    )
-    sd = (
-        ds["S_sd"].values[mask_ind]
-        if variable_name == "S"
-        else ds["T_sd"].values[mask_ind]
-    )
-    ## start - this part of code is the same for three functions
-    #### rotations of x and y coordinates
-    # from epgs:4326(LatLon with WGS84) to epgs:28992(DWS)
-    inproj = Transformer.from_crs("epsg:4326", "epsg:28992", always_xy=True)
-    xct = dws_b.lonc.values
-    yct = dws_b.latc.values  # lon,lat units #to change later for reading from dws_b
-    xctp, yctp, z = inproj.transform(xct, yct, xct * 0.0)
-    xctp = (xctp) / 1e2
-    yctp = (yctp) / 1e2
-    # first projected point to correct the coordinates of model local meter units
-    xctp0 = xctp[0, 0]
-    yctp0 = yctp[0, 0]
-
-    # matrix rotation -17degrees-----
-    ang = -17 * np.pi / 180
-    angs = np.ones((2, 2))
-    angs[0, 0] = np.cos(ang)
-    angs[0, 1] = np.sin(ang)
-    angs[1, 0] = -np.sin(ang)
-    angs[1, 1] = np.cos(ang)
-
-    # original topo points in meter
-    xct2, yct2 = np.meshgrid(dws_b.xc.values, dws_b.yc.values)
-    xy = np.array([xct2.flatten(), yct2.flatten()]).T
-    # rotate
-    xyp = np.matmul(angs, xy.T).T / 1e2
-    xyp0 = xyp[0, :]  # the first point in the bathy data in local meter units=0,0
-
-    # rotate DWS area
-    values = dws_b.mask_dws.values
-    xc = dws_b.xc
-    yc = dws_b.yc
-    y_idx, x_idx = np.where(values)  # True values
-    x_true = xc[x_idx]
-    y_true = yc[y_idx]
-    points = np.column_stack((x_true, y_true))
-
-    # rotate values
-    points_rot = np.matmul(angs, points.T).T / 1e2
-    points_rot = points_rot - xyp0
-    points_rot[:, 0] = points_rot[:, 0] + xctp0
-    points_rot[:, 1] = points_rot[:, 1] + yctp0
-
-    ##### rotate contour of DWS data
-    # contour of DWS------
-    bdr_dws0p = np.full((boundary_points.shape[0], 2), np.nan)
-    # rotate
-    bdr_dws0p = np.matmul(angs, boundary_points.T).T / 1e2
-    # correct model units:
-    # 1)substact the first model local point of the topo file, but give tha same as xyp0=[0,0]
-    # 2)use the first projected point of the case (lon,lat model units to meter)
-    bdr_dws0p = bdr_dws0p - xyp0
-    bdr_dws0p[:, 0] = bdr_dws0p[:, 0] + xctp0 - 1000
-    bdr_dws0p[:, 1] = bdr_dws0p[:, 1] + yctp0 - 5400
-
-    ##### rotate bathymetry data
-    # Land area
-    values_ = ds.h.values
-    y_idx_, x_idx_ = np.where(np.isnan(values_))
-    x_true_ = xc[x_idx_]
-    y_true_ = yc[y_idx_]
-    points_ = np.column_stack((x_true_, y_true_))
-
-    # rotate values
-    points_rot_ = np.matmul(angs, points_.T).T / 1e2
-    points_rot_ = points_rot_ - xyp0
-    points_rot_[:, 0] = points_rot_[:, 0] + xctp0
-    points_rot_[:, 1] = points_rot_[:, 1] + yctp0
-    data_h = np.full((6400, 6400), np.nan)
-
-    for idx in range(0, len(x_idx_)):
-        data_h[
-            int(points_rot_[idx][1]) - 1 : int(points_rot_[idx][1]) + 2,
-            int(points_rot_[idx][0]) - 1 : int(points_rot_[idx][0]) + 2,
-        ] = 1
-
-    data_h = data_h[5400:6200, 1000:2200]
-    data_h[0:300, 280:1200] = 1  # add land area
-    ## end of - this part of code is the same for three functions
-
-    ##### rotations of data
-    avg_data_ = np.full((avg.shape[0], 6400, 6400), np.nan)
-
-    for idx0 in range(0, avg.shape[0]):
-        for idx in range(0, len(x_idx)):
-            avg_data_[
-                idx0,
-                int(points_rot[idx][1]) - 1 : int(points_rot[idx][1]) + 2,
-                int(points_rot[idx][0]) - 1 : int(points_rot[idx][0]) + 2,
-            ] = avg[idx0, y_idx[idx], x_idx[idx]]
-
-    avg_data_ = avg_data_[:, 5400:6200, 1000:2200]
-
-    sd_data_ = np.full((sd.shape[0], 6400, 6400), np.nan)
-
-    for idx0 in range(0, sd.shape[0]):
-        for idx in range(0, len(x_idx)):
-            sd_data_[
-                idx0,
-                int(points_rot[idx][1]) - 1 : int(points_rot[idx][1]) + 2,
-                int(points_rot[idx][0]) - 1 : int(points_rot[idx][0]) + 2,
-            ] = sd[idx0, y_idx[idx], x_idx[idx]]
-
-    sd_data_ = sd_data_[:, 5400:6200, 1000:2200]
-
-    # Replace DWS area with nan
-    data_h[~np.isnan(avg_data_[0])] = np.nan
-
-    merged_data = np.stack([avg_data_, sd_data_], axis=1)
+    with stage("geometry"):
+        geometry = get_display_geometry(path_root)
 
-    ds.close()
-    dws_b.close()
-
-    yticks = np.arange(0, 800)
-    xticks = np.arange(0, 1200)
-
-    # Create the figure
-    fig = px.imshow(
-        merged_data,
-        x=xticks,
-        y=yticks,
-        facet_col=1,
-        animation_frame=0,
-        origin="lower",
-        title=("Salinity" if variable_name == "S" else "Temperature")
-        + " : 15 days average (in facet_col=0) and standard deviation (in facet_col=1)",
-    )
-    fig.update_layout(width=1000, height=600)
-
-    # Add boundary to the first facet
-    fig.add_trace(
-        go.Scatter(
-            x=bdr_dws0p[:, 0],
-            y=bdr_dws0p[:, 1],
-            mode="lines",
-            line=dict(color="black", width=2),
-            name="",
-            showlegend=False,
-        ),
-        row=1,  # First facet
-        col=1,
-    )
+    # Load the data
+    with stage("load") as record:
+        ds = xr.open_dataset(Path(path_root) / REL_PATH, engine="netcdf4")
+
+        # Find the indices of the time steps that correspond to the chosen dates
+        delta_left = timedelta(days=7.5)
+        delta_right = timedelta(days=7.5) - timedelta(
+            hours=1
+        )  # so as to show the exact period
+        time_steps = ds["time"].values
+        time_steps = pd.to_datetime(time_steps)
+        mask_ind = (time_steps - delta_left >= start_date) & (
+            time_steps + delta_right <= end_date
+        )
+        time_steps_update = time_steps[mask_ind]
+        record.info["slots"] = int(mask_ind.sum())
 
-    # Add boundary to the second facet
-    fig.add_trace(
-        go.Scatter(
-            x=bdr_dws0p[:, 0],
-            y=bdr_dws0p[:, 1],
-            mode="lines",
-            line=dict(color="black", width=2),
-            name="",
-            showlegend=False,
-        ),
-        row=1,  # Second facet
-        col=2,
-    )
-    fig.add_trace(
-        go.Heatmap(z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False),
-        row=1,
-        col=1,
-    )
-    fig.add_trace(
-        go.Heatmap(z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False),
-        row=1,
-        col=2,
-    )
+    with stage("rasterize") as record:
+        ##### rotations of data, read from the raster cache when rendered before
+        data_, value_range = get_rendered_frames(
+            ds, "exp_pct", mask_ind, geometry, path_root, anomaly=anomaly
+        )
+        ds.close()
+        bdr_dws0p = np.flip(geometry.boundary, axis=0)
+        # the cached frames are copied once, into the array shown by px.imshow
+        data_ = np.stack(data_)
+
+        # Replace DWS area with nan
+        data_h = land_layer(geometry, data_[0])
+        record.info["frames_shape"] = data_.shape
+
+    with stage("figure-build"):
+        yticks = np.arange(0, 800)
+        xticks = np.arange(0, 1200)
+
+        # Create the figure
+        fig = px.imshow(
+            data_,
+            x=xticks,
+            y=yticks,
+            animation_frame=0,
+            origin="lower",
+            title="Exposure rate : exposure rate for 15 days",
+            width=800,
+            height=500,
+        )
 
-    # Drop animation buttons
-    fig["layout"].pop("updatemenus")
-
-    # Modify the colorbar
-    fig.update_layout(
-        coloraxis=dict(
-            cmin=0,
-            cmax=int(np.nanmax(merged_data)) + 1,
-            colorbar=dict(
-                title=(
-                    "Salinity (g kg<sup>-1</sup>)"
-                    if variable_name == "S"
-                    else "Temperature (°C)"
-                ),
+        # Add boundary to the facet
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
             ),
+            row=1,
+            col=1,
         )
-    )
+        fig.add_trace(
+            go.Heatmap(
+                z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+            ),
+            row=1,
+            col=1,
+        )
+        # Drop animation buttons
+        fig["layout"].pop("updatemenus")
+
+        # Modify the colorbar
+        fig.update_layout(
+            coloraxis=dict(
+                cmin=0,
+                cmax=int(value_range[1]) + 1,
+                colorbar=dict(title="Exposure (%)"),
+            )
+        )
+        if anomaly:
+            fig.update_layout(anomaly_layout(np.array(value_range)))
+            fig.update_layout(title=fig.layout.title.text + " (anomaly)")
 
-    # Modify the layout x and y axis
-    fig.update_layout(
-        **{
-            f"xaxis{1}": dict(
+        # Modify the layout x and y axis
+        fig.update_layout(
+            xaxis=dict(
                 title="Easting (km)",
                 tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
                 ticktext=[0, 20, 40, 60, 80, 100, 120],
             ),
-        },
-        **{
-            f"yaxis{1}": dict(
+            yaxis=dict(
                 title="Northing (km)",
                 tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
                 ticktext=[0, 20, 40, 60, 80],
             ),
-        },
-    )
-    fig.update_layout(
-        **{
-            f"xaxis{2}": dict(
-                title="Easting (km)",
-                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
-                ticktext=[0, 20, 40, 60, 80, 100, 120],
-            ),
-        },
-        **{
-            f"yaxis{2}": dict(
-                title="",
-                tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
-                ticktext=[0, 20, 40, 60, 80],
-            ),
-        },
-    )
+        )
 
-    # Add slider
-    fig.update_layout(
-        sliders=[
-            {
-                "currentvalue": {
-                    "prefix": "15 days time slot: ",
-                    "visible": True,
-                    "xanchor": "center",
-                },
-                "len": 0.9,
-                "steps": [
-                    {
-                        "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
-                        "method": "animate",
-                        "args": [[i], {"frame": {"duration": 500, "redraw": True}}],
-                    }
-                    for i in range(len(time_steps_update))
-                ],
-            }
-        ],
-    )
+        # Add slider
+        fig.update_layout(
+            sliders=[
+                {
+                    "currentvalue": {
+                        "prefix": "15 days time slot: ",
+                        "visible": True,
+                        "xanchor": "center",
+                    },
+                    "len": 0.9,
+                    "steps": [
+                        {
+                            "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
+                            "method": "animate",
+                            "args": [[i], {"frame": {"duration": 500, "redraw": True}}],
+                        }
+                        for i in range(len(time_steps_update))
+                    ],
+                }
+            ],
+        )
 
-    fig.show()
+    return fig
 
 
-def display_exposure(start_date, end_date, path_root: str | Path):
+def display_exposure(start_date, end_date, path_root: str | Path, anomaly=False):
     """
     Display the exposure for 15 days in the chosen time period.
     The data is displayed in a plotly figure with a slider to navigate through the time steps.
@@ -334,214 +412,146 @@ def display_exposure(start_date, end_date, path_root: str | Path):
         The start date of the time period to display.
     end_date : datetime
         The end date of the time period to display.
+    anomaly : bool
+        Display the difference with the multi-year mean of the same 15-day slot of the year.
     """
-    # Load the data
-    ds = xr.open_dataset(path_root + REL_PATH, engine="netcdf4")
-    dws_b = xr.open_dataset(path_root + REL_PATH_BOUNDARIES_DWS)
+    fig = get_fig_exposure(start_date, end_date, path_root, anomaly)
+    with stage("serialize"):
+        fig.show()
 
-    # Extract boundary points
-    boundary_points = np.flip(dws_b.bdr_dws.values, axis=0)
 
-    # Find the indices of the time steps that correspond to the chosen dates
-    delta_left = timedelta(days=7.5)
-    delta_right = timedelta(days=7.5) - timedelta(
-        hours=1
-    )  # so as to show the exact period
-    time_steps = ds["time"].values
-    time_steps = pd.to_datetime(time_steps)
-    mask_ind = (time_steps - delta_left >= start_date) & (
-        time_steps + delta_right <= end_date
-    )
-    time_steps_update = time_steps[mask_ind]
-
-    # Extract the data
-    data = ds["exp_pct"].values[mask_ind]
-
-    ## start - this part of code is the same for three functions
-    #### rotations of x and y coordinates
-    # from epgs:4326(LatLon with WGS84) to epgs:28992(DWS)
-    inproj = Transformer.from_crs("epsg:4326", "epsg:28992", always_xy=True)
-    xct = dws_b.lonc.values
-    yct = dws_b.latc.values  # lon,lat units #to change later for reading from dws_b
-    xctp, yctp, z = inproj.transform(xct, yct, xct * 0.0)
-    xctp = (xctp) / 1e2
-    yctp = (yctp) / 1e2
-    # first projected point to correct the coordinates of model local meter units
-    xctp0 = xctp[0, 0]
-    yctp0 = yctp[0, 0]
-
-    # matrix rotation -17degrees-----
-    ang = -17 * np.pi / 180
-    angs = np.ones((2, 2))
-    angs[0, 0] = np.cos(ang)
-    angs[0, 1] = np.sin(ang)
-    angs[1, 0] = -np.sin(ang)
-    angs[1, 1] = np.cos(ang)
-
-    # original topo points in meter
-    xct2, yct2 = np.meshgrid(dws_b.xc.values, dws_b.yc.values)
-    xy = np.array([xct2.flatten(), yct2.flatten()]).T
-    # rotate
-    xyp = np.matmul(angs, xy.T).T / 1e2
-    xyp0 = xyp[0, :]  # the first point in the bathy data in local meter units=0,0
-
-    # rotate DWS area
-    values = dws_b.mask_dws.values
-    xc = dws_b.xc
-    yc = dws_b.yc
-    y_idx, x_idx = np.where(values)  # True values
-    x_true = xc[x_idx]
-    y_true = yc[y_idx]
-    points = np.column_stack((x_true, y_true))
-
-    # rotate values
-    points_rot = np.matmul(angs, points.T).T / 1e2
-    points_rot = points_rot - xyp0
-    points_rot[:, 0] = points_rot[:, 0] + xctp0
-    points_rot[:, 1] = points_rot[:, 1] + yctp0
-
-    ##### rotate contour of DWS data
-    # contour of DWS------
-    bdr_dws0p = np.full((boundary_points.shape[0], 2), np.nan)
-    # rotate
-    bdr_dws0p = np.matmul(angs, boundary_points.T).T / 1e2
-    # correct model units:
-    # 1)substact the first model local point of the topo file, but give tha same as xyp0=[0,0]
-    # 2)use the first projected point of the case (lon,lat model units to meter)
-    bdr_dws0p = bdr_dws0p - xyp0
-    bdr_dws0p[:, 0] = bdr_dws0p[:, 0] + xctp0 - 1000
-    bdr_dws0p[:, 1] = bdr_dws0p[:, 1] + yctp0 - 5400
-
-    ##### rotate bathymetry data
-    # Land area
-    values_ = ds.h.values
-    y_idx_, x_idx_ = np.where(np.isnan(values_))
-    x_true_ = xc[x_idx_]
-    y_true_ = yc[y_idx_]
-    points_ = np.column_stack((x_true_, y_true_))
-
-    # rotate values
-    points_rot_ = np.matmul(angs, points_.T).T / 1e2
-    points_rot_ = points_rot_ - xyp0
-    points_rot_[:, 0] = points_rot_[:, 0] + xctp0
-    points_rot_[:, 1] = points_rot_[:, 1] + yctp0
-    data_h = np.full((6400, 6400), np.nan)
-
-    for idx in range(0, len(x_idx_)):
-        data_h[
-            int(points_rot_[idx][1]) - 1 : int(points_rot_[idx][1]) + 2,
-            int(points_rot_[idx][0]) - 1 : int(points_rot_[idx][0]) + 2,
-        ] = 1
-
-    data_h = data_h[5400:6200, 1000:2200]
-    data_h[0:300, 280:1200] = 1  # add land area
-    ## end of - this part of code is the same for three functions
-
-    ##### rotations of data
-    data_ = np.full((data.shape[0], 6400, 6400), np.nan)
-
-    for idx0 in range(0, data.shape[0]):
-        for idx in range(0, len(x_idx)):
-            data_[
-                idx0,
-                int(points_rot[idx][1]) - 1 : int(points_rot[idx][1]) + 2,
-                int(points_rot[idx][0]) - 1 : int(points_rot[idx][0]) + 2,
-            ] = data[idx0, y_idx[idx], x_idx[idx]]
-
-    data_ = data_[:, 5400:6200, 1000:2200]
-
-    # Replace DWS area with nan
-    data_h[~np.isnan(data_[0])] = np.nan
-
-    # Close the datasets
-    ds.close()
-    dws_b.close()
-
-    yticks = np.arange(0, 800)
-    xticks = np.arange(0, 1200)
-
-    # Create the figure
-    fig = px.imshow(
-        data_,
-        x=xticks,
-        y=yticks,
-        animation_frame=0,
-        origin="lower",
-        title="Exposure rate : exposure rate for 15 days",
-        width=800,
-        height=500,
-    )
+def get_fig_rt(start_date, end_date, path_root: str | Path, anomaly=False):
+    """
+    Build the figure shown by display_rt.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
 
-    # Add boundary to the facet
-    fig.add_trace(
-        go.Scatter(
-            x=bdr_dws0p[:, 0],
-            y=bdr_dws0p[:, 1],
-            mode="lines",
-            line=dict(color="black", width=2),
-            name="",
-            showlegend=False,
-        ),
-        row=1,
-        col=1,
-    )
-    fig.add_trace(
-        go.Heatmap(z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False),
-        row=1,
-        col=1,
-    )
-    # Drop animation buttons
-    fig["layout"].pop("updatemenus")
+    with stage("geometry"):
+        geometry = get_display_geometry(path_root)
 
-    # Modify the colorbar
-    fig.update_layout(
-        coloraxis=dict(
-            cmin=0,
-            cmax=int(np.nanmax(data)) + 1,
-            colorbar=dict(title="Exposure (%)"),
+    # Load the data
+    with stage("load") as record:
+        ds = xr.open_dataset(Path(path_root) / REL_PATH, engine="netcdf4")
+
+        # Find the indices of the time steps that correspond to the chosen dates
+        delta_left = timedelta(days=7.5)
+        delta_right = timedelta(days=7.5) - timedelta(
+            hours=1
+        )  # so as to show the exact period
+        time_steps = ds["time"].values
+        time_steps = pd.to_datetime(time_steps)
+        mask_ind = (time_steps - delta_left >= start_date) & (
+            time_steps + delta_right <= end_date
         )
-    )
+        time_steps_update = time_steps[mask_ind]
+        record.info["slots"] = int(mask_ind.sum())
 
-    # Modify the layout x and y axis
-    fig.update_layout(
-        xaxis=dict(
-            title="Easting (km)",
-            tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
-            ticktext=[0, 20, 40, 60, 80, 100, 120],
-        ),
-        yaxis=dict(
-            title="Northing (km)",
-            tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
-            ticktext=[0, 20, 40, 60, 80],
-        ),
-    )
+    with stage("rasterize") as record:
+        ##### rotations of data, read from the raster cache when rendered before
+        data_, value_range = get_rendered_frames(
+            ds, "Rt_mean", mask_ind, geometry, path_root, layer="rt", anomaly=anomaly
+        )
+        ds.close()
+        bdr_dws0p = np.flip(geometry.boundary, axis=0)
+        # the cached frames are copied once, into the array shown by px.imshow
+        data_ = np.stack(data_)
+
+        # Replace DWS area with nan
+        data_h = land_layer(geometry, data_[0])
+        record.info["frames_shape"] = data_.shape
+
+    with stage("figure-build"):
+        yticks = np.arange(0, 800)
+        xticks = np.arange(0, 1200)
+
+        # Create the figure
+        fig = px.imshow(
+            data_,
+            x=xticks,
+            y=yticks,
+            animation_frame=0,
+            origin="lower",
+            title="Residence time : mean residence time for 15 days",
+            width=800,
+            height=500,
+        )
 
-    # Add slider
-    fig.update_layout(
-        sliders=[
-            {
-                "currentvalue": {
-                    "prefix": "15 days time slot: ",
-                    "visible": True,
-                    "xanchor": "center",
-                },
-                "len": 0.9,
-                "steps": [
-                    {
-                        "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
-                        "method": "animate",
-                        "args": [[i], {"frame": {"duration": 500, "redraw": True}}],
-                    }
-                    for i in range(len(time_steps_update))
-                ],
-            }
-        ],
-    )
+        # Add boundary to the facet
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
+            ),
+            row=1,
+            col=1,
+        )
+        fig.add_trace(
+            go.Heatmap(
+                z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+            ),
+            row=1,
+            col=1,
+        )
+        # Drop animation buttons
+        fig["layout"].pop("updatemenus")
+
+        # Modify the colorbar
+        fig.update_layout(
+            coloraxis=dict(
+                cmin=0,
+                cmax=int(value_range[1]) + 1,
+                colorbar=dict(title="Residence time (days)"),
+            )
+        )
+        if anomaly:
+            fig.update_layout(anomaly_layout(np.array(value_range)))
+            fig.update_layout(title=fig.layout.title.text + " (anomaly)")
+
+        # Modify the layout x and y axis
+        fig.update_layout(
+            xaxis=dict(
+                title="Easting (km)",
+                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80, 100, 120],
+            ),
+            yaxis=dict(
+                title="Northing (km)",
+                tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80],
+            ),
+        )
 
-    fig.show()
+        # Add slider
+        fig.update_layout(
+            sliders=[
+                {
+                    "currentvalue": {
+                        "prefix": "15 days time slot: ",
+                        "visible": True,
+                        "xanchor": "center",
+                    },
+                    "len": 0.9,
+                    "steps": [
+                        {
+                            "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
+                            "method": "animate",
+                            "args": [[i], {"frame": {"duration": 500, "redraw": True}}],
+                        }
+                        for i in range(len(time_steps_update))
+                    ],
+                }
+            ],
+        )
 
+    return fig
 
-def display_rt(start_date, end_date, path_root: str | Path):
+
+def display_rt(start_date, end_date, path_root: str | Path, anomaly=False):
     """
     Display the resisende time for 15 days in the chosen time period.
     The data is displayed in a plotly figure with a slider to navigate through the time steps.
@@ -551,222 +561,221 @@ def display_rt(start_date, end_date, path_root: str | Path):
         The start date of the time period to display.
     end_date : datetime
         The end date of the time period to display.
+    anomaly : bool
+        Display the difference with the multi-year mean of the same 15-day slot of the year.
     """
-    # Load the data
-    ds = xr.open_dataset(path_root + REL_PATH, engine="netcdf4")
-    dws_b = xr.open_dataset(path_root + REL_PATH_BOUNDARIES_DWS)
+    fig = get_fig_rt(start_date, end_date, path_root, anomaly)
+    with stage("serialize"):
+        fig.show()
 
-    # Extract boundary points
-    boundary_points = np.flip(dws_b.bdr_dws.values, axis=0)
 
-    # Find the indices of the time steps that correspond to the chosen dates
-    delta_left = timedelta(days=7.5)
-    delta_right = timedelta(days=7.5) - timedelta(
-        hours=1
-    )  # so as to show the exact period
-    time_steps = ds["time"].values
-    time_steps = pd.to_datetime(time_steps)
-    mask_ind = (time_steps - delta_left >= start_date) & (
-        time_steps + delta_right <= end_date
-    )
-    time_steps_update = time_steps[mask_ind]
-
-    # Extract the data
-    data = ds["Rt_mean"].values[mask_ind]
-
-    ## start - this part of code is the same for three functions
-    #### rotations of x and y coordinates
-    # from epgs:4326(LatLon with WGS84) to epgs:28992(DWS)
-    inproj = Transformer.from_crs("epsg:4326", "epsg:28992", always_xy=True)
-    xct = dws_b.lonc.values
-    yct = dws_b.latc.values  # lon,lat units #to change later for reading from dws_b
-    xctp, yctp, z = inproj.transform(xct, yct, xct * 0.0)
-    xctp = (xctp) / 1e2
-    yctp = (yctp) / 1e2
-    # first projected point to correct the coordinates of model local meter units
-    xctp0 = xctp[0, 0]
-    yctp0 = yctp[0, 0]
-
-    # matrix rotation -17degrees-----
-    ang = -17 * np.pi / 180
-    angs = np.ones((2, 2))
-    angs[0, 0] = np.cos(ang)
-    angs[0, 1] = np.sin(ang)
-    angs[1, 0] = -np.sin(ang)
-    angs[1, 1] = np.cos(ang)
-
-    # original topo points in meter
-    xct2, yct2 = np.meshgrid(dws_b.xc.values, dws_b.yc.values)
-    xy = np.array([xct2.flatten(), yct2.flatten()]).T
-    # rotate
-    xyp = np.matmul(angs, xy.T).T / 1e2
-    xyp0 = xyp[0, :]  # the first point in the bathy data in local meter units=0,0
-
-    # rotate DWS area
-    values = dws_b.mask_dws.values
-    xc = dws_b.xc
-    yc = dws_b.yc
-    y_idx, x_idx = np.where(values)  # True values
-    x_true = xc[x_idx]
-    y_true = yc[y_idx]
-    points = np.column_stack((x_true, y_true))
-
-    # rotate values
-    points_rot = np.matmul(angs, points.T).T / 1e2
-    points_rot = points_rot - xyp0
-    points_rot[:, 0] = points_rot[:, 0] + xctp0
-    points_rot[:, 1] = points_rot[:, 1] + yctp0
-
-    ##### rotate contour of DWS data
-    # contour of DWS------
-    bdr_dws0p = np.full((boundary_points.shape[0], 2), np.nan)
-    # rotate
-    bdr_dws0p = np.matmul(angs, boundary_points.T).T / 1e2
-    # correct model units:
-    # 1)substact the first model local point of the topo file, but give tha same as xyp0=[0,0]
-    # 2)use the first projected point of the case (lon,lat model units to meter)
-    bdr_dws0p = bdr_dws0p - xyp0
-    bdr_dws0p[:, 0] = bdr_dws0p[:, 0] + xctp0 - 1000
-    bdr_dws0p[:, 1] = bdr_dws0p[:, 1] + yctp0 - 5400
-
-    ##### rotate bathymetry data
-    # Land area
-    values_ = ds.h.values
-    y_idx_, x_idx_ = np.where(np.isnan(values_))
-    x_true_ = xc[x_idx_]
-    y_true_ = yc[y_idx_]
-    points_ = np.column_stack((x_true_, y_true_))
-
-    # rotate values
-    points_rot_ = np.matmul(angs, points_.T).T / 1e2
-    points_rot_ = points_rot_ - xyp0
-    points_rot_[:, 0] = points_rot_[:, 0] + xctp0
-    points_rot_[:, 1] = points_rot_[:, 1] + yctp0
-    data_h = np.full((6400, 6400), np.nan)
-
-    for idx in range(0, len(x_idx_)):
-        data_h[
-            int(points_rot_[idx][1]) - 1 : int(points_rot_[idx][1]) + 2,
-            int(points_rot_[idx][0]) - 1 : int(points_rot_[idx][0]) + 2,
-        ] = 1
-
-    data_h = data_h[5400:6200, 1000:2200]
-    data_h[0:300, 280:1200] = 1  # add land area
-    ## end of - this part of code is the same for three functions
-
-    ##### rotations of data
-    data_ = np.full((data.shape[0], 800, 1200), np.nan)
-    xrr = ((ds.xr.values - 116.7) * 10).astype(int)
-    yr = ((ds.yr.values - 543.3) * 10).astype(int)
-
-    data_ = np.full((data.shape[0], 800, 1200), np.nan)
-
-    for idx0 in range(0, data.shape[0]):
-        for idx_x in range(0, data.shape[2]):
-            for idx_y in range(0, data.shape[1]):
-                data_[
-                    idx0,
-                    yr[idx_y, idx_x]
-                    - 2
-                    + 34 : yr[idx_y, idx_x]
-                    + 3
-                    + 34,  # the values of shift could be different
-                    xrr[idx_y, idx_x]
-                    - 2
-                    + 165 : xrr[idx_y, idx_x]
-                    + 3
-                    + 165,  # the values of shift could be different
-                ] = data[idx0, idx_y, idx_x]
-
-    # Replace DWS area with nan
-    data_h[~np.isnan(data_[0])] = np.nan
-
-    # Close the datasets
-    ds.close()
-    dws_b.close()
-
-    yticks = np.arange(0, 800)
-    xticks = np.arange(0, 1200)
-
-    # Create the figure
-    fig = px.imshow(
-        data_,
-        x=xticks,
-        y=yticks,
-        animation_frame=0,
-        origin="lower",
-        title="Residence time : mean residence time for 15 days",
-        width=800,
-        height=500,
-    )
+def get_fig_layers(
+    start_date, end_date, path_root: str | Path, layers=tuple(LAYERS), anomaly=False
+):
+    """
+    Build the figure shown by display_layers.
+    """
+    import plotly.graph_objects as go
 
-    # Add boundary to the facet
-    fig.add_trace(
-        go.Scatter(
-            x=bdr_dws0p[:, 0],
-            y=bdr_dws0p[:, 1],
-            mode="lines",
-            line=dict(color="black", width=2),
-            name="",
-            showlegend=False,
-        ),
-        row=1,
-        col=1,
-    )
-    fig.add_trace(
-        go.Heatmap(z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False),
-        row=1,
-        col=1,
-    )
-    # Drop animation buttons
-    fig["layout"].pop("updatemenus")
+    unknown = [variable for variable in layers if variable not in LAYERS]
+    if unknown:
+        raise ValueError(f"Unknown layers: {unknown}, choose among {list(LAYERS)}")
+
+    with stage("geometry"):
+        geometry = get_display_geometry(path_root)
 
-    # Modify the colorbar
-    fig.update_layout(
-        coloraxis=dict(
-            cmin=0,
-            cmax=int(np.nanmax(data)) + 1,
-            colorbar=dict(title="Residence time (days)"),
+    # Load the time axis, the layers are read once for all in the rasterize stage
+    with stage("load") as record:
+        ds = xr.open_dataset(Path(path_root) / REL_PATH, engine="netcdf4")
+
+        delta_left = timedelta(days=7.5)
+        delta_right = timedelta(days=7.5) - timedelta(hours=1)
+        time_steps = pd.to_datetime(ds["time"].values)
+        mask_ind = (time_steps - delta_left >= start_date) & (
+            time_steps + delta_right <= end_date
+        )
+        time_steps_update = time_steps[mask_ind]
+        record.info["slots"] = int(mask_ind.sum())
+
+    with stage("rasterize") as record:
+        # the missing slots of all the layers are read in one pass over the data
+        rendered = get_rendered_layers(
+            ds,
+            {variable: LAYERS[variable][0] for variable in layers},
+            mask_ind,
+            geometry,
+            path_root,
+            anomaly=anomaly,
+        )
+        ds.close()
+        frames = {variable: rendered[variable][0] for variable in layers}
+        value_ranges = {variable: rendered[variable][1] for variable in layers}
+
+        # Replace the area covered by data with nan, per grid of the layers
+        data_h = {}
+        for variable in layers:
+            grid = LAYERS[variable][0]
+            if grid not in data_h:
+                data_h[grid] = land_layer(geometry, frames[variable][0])
+        bdr_dws0p = geometry.boundary
+
+        # The frames are cut to the window holding data, the land is drawn in full
+        windows = {
+            "wet": data_window(geometry.index_map),
+            "rt": data_window(geometry.rt_index_map),
+        }
+        record.info["layers"] = len(layers)
+
+    with stage("figure-build"):
+        grids = list(data_h)
+
+        def frame_z(variable, i):
+            rows, cols = windows[LAYERS[variable][0]]
+            return frames[variable][i][rows, cols]
+
+        fig = go.Figure(
+            [
+                go.Heatmap(
+                    z=frame_z(variable, 0),
+                    x0=windows[LAYERS[variable][0]][1].start,
+                    y0=windows[LAYERS[variable][0]][0].start,
+                    coloraxis="coloraxis" if k == 0 else f"coloraxis{k + 1}",
+                    visible=k == 0,
+                )
+                for k, variable in enumerate(layers)
+            ]
+        )
+        for grid in grids:
+            fig.add_trace(
+                go.Heatmap(
+                    z=data_h[grid],
+                    colorscale=[[0, "white"], [1, "gray"]],
+                    showscale=False,
+                    visible=grid == LAYERS[layers[0]][0],
+                )
+            )
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
+            )
         )
-    )
 
-    # Modify the layout x and y axis
-    fig.update_layout(
-        xaxis=dict(
-            title="Easting (km)",
-            tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
-            ticktext=[0, 20, 40, 60, 80, 100, 120],
-        ),
-        yaxis=dict(
-            title="Northing (km)",
-            tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
-            ticktext=[0, 20, 40, 60, 80],
-        ),
-    )
+        # One colour axis per layer, only the one of the shown layer has a colorbar
+        coloraxes = {}
+        for k, variable in enumerate(layers):
+            value_range = value_ranges[variable]
+            if anomaly:
+                coloraxis = anomaly_layout(np.array(value_range))["coloraxis"]
+            else:
+                coloraxis = dict(cmin=0, cmax=int(value_range[1]) + 1)
+            coloraxis["colorbar"] = dict(title=LAYERS[variable][2])
+            coloraxis["showscale"] = k == 0
+            coloraxes["coloraxis" if k == 0 else f"coloraxis{k + 1}"] = coloraxis
+        fig.update_layout(**coloraxes)
+
+        def title(variable):
+            return LAYERS[variable][1] + (" (anomaly)" if anomaly else "")
+
+        # Dropdown switching the layer in the browser
+        buttons = []
+        for k, variable in enumerate(layers):
+            grid = LAYERS[variable][0]
+            visible = [j == k for j in range(len(layers))]
+            visible += [other == grid for other in grids] + [True]
+            layout = {"title.text": title(variable)}
+            for j in range(len(layers)):
+                name = "coloraxis" if j == 0 else f"coloraxis{j + 1}"
+                layout[f"{name}.showscale"] = j == k
+            buttons.append(
+                dict(
+                    label=variable, method="update", args=[{"visible": visible}, layout]
+                )
+            )
+
+        fig.update_layout(
+            title=title(layers[0]),
+            width=1000,
+            height=600,
+            updatemenus=[
+                dict(buttons=buttons, direction="down", x=0.0, xanchor="left", y=1.12)
+            ],
+            xaxis=dict(
+                title="Easting (km)",
+                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80, 100, 120],
+                constrain="domain",
+            ),
+            yaxis=dict(
+                title="Northing (km)",
+                tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80],
+                scaleanchor="x",
+            ),
+        )
 
-    # Add slider
-    fig.update_layout(
-        sliders=[
-            {
-                "currentvalue": {
-                    "prefix": "15 days time slot: ",
-                    "visible": True,
-                    "xanchor": "center",
-                },
-                "len": 0.9,
-                "steps": [
-                    {
-                        "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
-                        "method": "animate",
-                        "args": [[i], {"frame": {"duration": 500, "redraw": True}}],
-                    }
-                    for i in range(len(time_steps_update))
-                ],
-            }
-        ],
-    )
+        # Slider, the frames hold the slot of every layer so switching is immediate.
+        # They only update z, so the layer chosen in the dropdown stays visible.
+        fig.frames = [
+            go.Frame(
+                data=[go.Heatmap(z=frame_z(variable, i)) for variable in layers],
+                traces=list(range(len(layers))),
+                name=str(i),
+            )
+            for i in range(len(time_steps_update))
+        ]
+        fig.update_layout(
+            sliders=[
+                {
+                    "currentvalue": {
+                        "prefix": "15 days time slot: ",
+                        "visible": True,
+                        "xanchor": "center",
+                    },
+                    "len": 0.9,
+                    "steps": [
+                        {
+                            "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
+                            "method": "animate",
+                            "args": [
+                                [str(i)],
+                                {"frame": {"duration": 500, "redraw": True}},
+                            ],
+                        }
+                        for i in range(len(time_steps_update))
+                    ],
+                }
+            ],
+        )
+
+    return fig
 
-    fig.show()
+
+def display_layers(
+    start_date, end_date, path_root: str | Path, layers=tuple(LAYERS), anomaly=False
+):
+    """
+    Display several 15-day layers in the chosen time period in one map, with a dropdown
+    to switch between the layers and a slider to navigate through the time steps.
+    The layers are read and rendered once, switching happens in the browser.
+
+    Parameters:
+    start_date : datetime
+        The start date of the time period to display.
+    end_date : datetime
+        The end date of the time period to display.
+    layers : sequence of str
+        Variables of the 15-day aggregates among LAYERS, by default all six.
+    anomaly : bool
+        Display the difference with the multi-year mean of the same 15-day slot of the year.
+    """
+    fig = get_fig_layers(start_date, end_date, path_root, tuple(layers), anomaly)
+    with stage("serialize"):
+        fig.show()
 
 
 if __name__ == "main":
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+import xarray as xr
+from plotly_resampler import FigureResampler
+
+from .visualisation_script_profiling import stage
+from .visualisation_script_rollups import RollupAggregator, build_rollups
+from .visualisation_script_series import read_series_block, series_colour
+
+### Global variables
+REL_PATH_VOLUME = Path("output_files/DWS.volume.nc")
+REL_PATH_RIVERS = Path("output_files/rivers_volume_flux.nc")
+REL_PATH_TRANSECTS = Path("output_files/TR.volume_salt_flux.nc")
+
+
+def xaxes_buttons():
+    return dict(
+        buttons=list(
+            [
+                dict(count=1, label="1m", step="month", stepmode="backward"),
+                dict(count=6, label="6m", step="month", stepmode="backward"),
+                dict(count=1, label="1y", step="year", stepmode="backward"),
+                dict(count=5, label="5y", step="year", stepmode="backward"),
+                dict(count=10, label="10y", step="year", stepmode="backward"),
+            ]
+        )
+    )
+
+
+def align_time_axes(*np_times):
+    """
+    Find the common period of regularly spaced time axes with the same step.
+
+    Returns:
+    (np_time, offsets) with the shared time axis and, per input axis, the index of its
+    first shared time step, so that the aligned series are series[offset:offset + n].
+    """
+    np_times = [np.asarray(np_time).astype("datetime64[ns]") for np_time in np_times]
+    step = np_times[0][1] - np_times[0][0]
+    for np_time in np_times:
+        if not np.all(np.diff(np_time) == step):
+            raise ValueError("The time axes should be regular with the same time step")
+
+    start = max(np_time[0] for np_time in np_times)
+    end = min(np_time[-1] for np_time in np_times)
+    if any((start - np_time[0]) % step for np_time in np_times):
+        raise ValueError("The time axes are not on the same time steps")
+    if end < start:
+        raise ValueError("The time axes do not overlap")
+
+    n_time = int((end - start) // step) + 1
+    offsets = [int((start - np_time[0]) // step) for np_time in np_times]
+    return np_times[0][offsets[0] : offsets[0] + n_time], offsets
+
+
+@lru_cache(maxsize=4)
+def _get_water_budget(path_root: Path, transect_signs: tuple, mtimes: tuple):
+    ds_volume = xr.open_dataset(path_root / REL_PATH_VOLUME)
+    time_volume = ds_volume["time"].values
+    np_volume = ds_volume["volume"].values
+    ds_volume.close()
+
+    time_rivers, np_rivers, _ = read_series_block(
+        path_root / REL_PATH_RIVERS, "volume_flux", "station_name"
+    )
+    time_transects, np_transects, _ = read_series_block(
+        path_root / REL_PATH_TRANSECTS, "volume_flux", "transect_name"
+    )
+
+    np_time, (o_volume, o_rivers, o_transects) = align_time_axes(
+        time_volume, time_rivers, time_transects
+    )
+    n_time = len(np_time)
+    dt = (np_time[1] - np_time[0]) / np.timedelta64(1, "s")
+
+    # rate of change of the volume with central differences
+    np_volume = np.asarray(np_volume[o_volume : o_volume + n_time], dtype=float)
+    dvdt = np.gradient(np_volume, dt)
+
+    rivers = np.nansum(np_rivers[:, o_rivers : o_rivers + n_time], axis=0)
+    signs = np.ones(np_transects.shape[0])
+    if transect_signs:
+        signs[:] = transect_signs
+    transects = signs @ np.nan_to_num(
+        np_transects[:, o_transects : o_transects + n_time]
+    )
+
+    budget = {
+        "dV/dt": dvdt,
+        "Rivers": rivers,
+        "Transects": transects,
+        "Residual": dvdt - rivers - transects,
+    }
+    rollups = build_rollups(np_time, np.stack(list(budget.values())))
+
+    return np_time, budget, rollups
+
+
+def get_water_budget(path_root: str | Path, transect_signs=None):
+    """
+    Volume budget of the DWS on the hourly time steps shared by DWS.volume.nc,
+    rivers_volume_flux.nc and TR.volume_salt_flux.nc.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    transect_signs : sequence of float
+        Factor per transect to turn its volume flux into inflow into the DWS, by default
+        the fluxes are taken as they are.
+
+    Returns:
+    (np_time, budget, rollups) with budget a dict of 'dV/dt', 'Rivers', 'Transects' and
+    'Residual' series in m3 s-1 and their rollups (see build_rollups) in that order.
+    """
+    path_root = Path(path_root).resolve()
+    mtimes = tuple(
+        (path_root / rel_path).stat().st_mtime
+        for rel_path in (REL_PATH_VOLUME, REL_PATH_RIVERS, REL_PATH_TRANSECTS)
+    )
+    if transect_signs is not None:
+        transect_signs = tuple(float(sign) for sign in transect_signs)
+    return _get_water_budget(path_root, transect_signs, mtimes)
+
+
+def plot_water_budget(path_root: str | Path, transect_signs=None):
+    with stage("load"):
+        np_time, budget, rollups = get_water_budget(path_root, transect_signs)
+
+    with stage("figure-build"):
+        fig = FigureResampler(go.Figure())
+        for i, (name, np_values) in enumerate(budget.items()):
+            fig.add_trace(
+                go.Scattergl(
+                    name=name,
+                    mode="lines",
+                    line={"color": series_colour(i)},
+                    hovertemplate=name
+                    + "<br>Date = %{x}<br>%{y} m<sup>3</sup> s<sup>-1</sup><extra></extra>",
+                ),
+                hf_x=np_time,
+                hf_y=np_values,
+                downsampler=RollupAggregator(rollups, series=i),
+            )
+
+        layout = dict(
+            title="Volume budget of the DWS: dV/dt = rivers + transects + residual",
+            yaxis=dict(title=dict(text="Volume flux (m<sup>3</sup> s<sup>-1</sup>)")),
+            xaxis=dict(title=dict(text="Date"), rangeselector=xaxes_buttons()),
+            hovermode="x",
+            legend_title_text="Term",
+        )
+        fig.update_layout(layout)
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
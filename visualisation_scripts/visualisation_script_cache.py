@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import hashlib
+import os
+from pathlib import Path
+
+### Global variables
+# Derived arrays are stored next to the data files, unless this variable points to a
+# writable folder (e.g. when the data is read from a read-only or shared location)
+CACHE_DIR_ENV = "DWS_VIS_CACHE_DIR"
+
+
+def sidecar_path(source: str | Path, suffix: str):
+    """
+    Return the path of the file caching data derived from source.
+
+    Parameters:
+    source : str or Path
+        The data file the cache is derived from.
+    suffix : str
+        Appended to the name of the data file, e.g. '.probe.S_avg.npy'.
+    """
+    source = Path(source).resolve()
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        return source.with_name(source.name + suffix)
+
+    # several roots can hold files with the same name
+    digest = hashlib.sha1(str(source).encode()).hexdigest()[:8]
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / f"{source.name}.{digest}{suffix}"
+
+
+def is_fresh(sidecar: str | Path, source: str | Path):
+    """
+    Check if the cache file exists and is newer than the data it is derived from.
+    """
+    sidecar, source = Path(sidecar), Path(source)
+    return sidecar.exists() and sidecar.stat().st_mtime >= source.stat().st_mtime
+
+
+def tmp_path(path: str | Path):
+    """
+    Temporary file to write a cache to before moving it in place with os.replace,
+    so that an interrupted build never leaves a truncated cache behind.
+    """
+    path = Path(path)
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp{path.suffix}")
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
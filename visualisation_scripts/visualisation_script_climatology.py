@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import REL_PATH
+
+### Global variables
+CLIMATOLOGY_VARIABLES = ("S_avg", "S_sd", "T_avg", "T_sd", "exp_pct", "Rt_mean")
+SLOTS_PER_YEAR = 24  # 15-day slots of the year
+# (month, day) of the first day of each slot of the year: the 1st and the 16th
+SLOT_STARTS = tuple((month, day) for month in range(1, 13) for day in (1, 16))
+CHUNK_SLOTS = 64  # number of 15-day slots read at once
+
+
+def slot_of_year(time_steps):
+    """
+    Index (0 to 23) of the half-month holding the centre of each time slot, see
+    SLOT_STARTS. The slots follow the calendar, so they do not drift between leap and
+    non-leap years.
+    """
+    time_steps = pd.DatetimeIndex(time_steps)
+    return 2 * (time_steps.month.values - 1) + (time_steps.day.values >= 16)
+
+
+def climatology_path(path_root: str | Path):
+    """Path of the cached climatology of the 15-day aggregates in path_root."""
+    return sidecar_path((Path(path_root) / REL_PATH).resolve(), ".climatology.npz")
+
+
+def build_climatology(path_root: str | Path, chunk_slots=CHUNK_SLOTS):
+    """
+    Multi-year mean of each 15-day slot of the year for every cell of the model grid,
+    accumulated for all the variables in one streaming pass over
+    15day_aggregates.rt.nc. Each chunk of time slots is summed per slot of the year
+    with one matrix product per variable.
+
+    Returns:
+    dict with '{variable}_mean' of shape (24, ny, nx) and '{variable}_count' holding the
+    number of years averaged per slot and cell, and the 'slot_starts' of the slots.
+    """
+    path = (Path(path_root) / REL_PATH).resolve()
+    ds = xr.open_dataset(path, engine="netcdf4")
+    slots = slot_of_year(ds["time"].values)
+    n_time = ds.sizes["time"]
+
+    grid_shapes = {
+        variable: ds[variable].shape[1:] for variable in CLIMATOLOGY_VARIABLES
+    }
+    sums = {
+        variable: np.zeros((SLOTS_PER_YEAR, int(np.prod(shape))))
+        for variable, shape in grid_shapes.items()
+    }
+    counts = {variable: np.zeros_like(sums[variable]) for variable in sums}
+
+    for t0 in range(0, n_time, chunk_slots):
+        t1 = min(t0 + chunk_slots, n_time)
+        chunk = ds[list(CLIMATOLOGY_VARIABLES)].isel(time=slice(t0, t1)).load()
+        # (24, time) indicator of the slot of the year of each time slot
+        in_slot = (slots[t0:t1] == np.arange(SLOTS_PER_YEAR)[:, None]).astype(float)
+        for variable in CLIMATOLOGY_VARIABLES:
+            block = chunk[variable].values.reshape(t1 - t0, -1)
+            valid = ~np.isnan(block)
+            sums[variable] += in_slot @ np.where(valid, block, 0.0)
+            counts[variable] += in_slot @ valid
+
+    ds.close()
+
+    climatology = {"slot_starts": np.array(SLOT_STARTS)}
+    for variable, shape in grid_shapes.items():
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums[variable] / counts[variable]
+        climatology[f"{variable}_mean"] = mean.astype(np.float32).reshape(
+            (SLOTS_PER_YEAR,) + shape
+        )
+        climatology[f"{variable}_count"] = (
+            counts[variable].astype(np.int32).reshape((SLOTS_PER_YEAR,) + shape)
+        )
+
+    return climatology
+
+
+@lru_cache(maxsize=4)
+def _get_climatology(path_root: Path, mtime: float):
+    path = (path_root / REL_PATH).resolve()
+    path_cache = climatology_path(path_root)
+    if is_fresh(path_cache, path):
+        with np.load(path_cache) as npz:
+            if "slot_starts" in npz.files and np.array_equal(
+                npz["slot_starts"], SLOT_STARTS
+            ):
+                return {
+                    variable: npz[f"{variable}_mean"]
+                    for variable in CLIMATOLOGY_VARIABLES
+                }
+
+    # no cache, the data changed or it was built with other slots of the year
+    climatology = build_climatology(path_root)
+    path_tmp = tmp_path(path_cache)
+    np.savez(path_tmp, **climatology)
+    os.replace(path_tmp, path_cache)
+    return {
+        variable: climatology[f"{variable}_mean"] for variable in CLIMATOLOGY_VARIABLES
+    }
+
+
+def get_climatology(path_root: str | Path):
+    """
+    Return the (cached) climatology of the 15-day aggregates, a dict of arrays of shape
+    (24, ny, nx) per variable, indexed with slot_of_year.
+    """
+    path_root = Path(path_root).resolve()
+    return _get_climatology(path_root, (path_root / REL_PATH).stat().st_mtime)
+
+
+def subtract_climatology(data, variable, time_steps, path_root: str | Path):
+    """
+    Subtract the climatology of the 15-day slot of the year from each slot of data.
+
+    Parameters:
+    data : np.ndarray
+        Array of shape (time, ny, nx) of the variable in the time slots time_steps.
+    """
+    climatology = get_climatology(path_root)[variable]
+    return data - climatology[slot_of_year(time_steps)]
+
+
+def anomaly_layout(data):
+    """Diverging colour scale centred on zero for maps of anomalies."""
+    limit = float(np.ceil(np.nanmax(np.abs(data))))
+    return dict(coloraxis=dict(cmin=-limit, cmax=limit, colorscale="RdBu_r"))
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
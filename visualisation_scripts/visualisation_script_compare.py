@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_geometry import REL_PATH, get_display_geometry, land_layer
+from .visualisation_script_profiling import stage
+from .visualisation_script_raster_cache import get_rendered_frames
+
+### Global variables
+COMPARE_VARIABLES = {
+    "S": ("S_avg", "Salinity (g kg<sup>-1</sup>)"),
+    "T": ("T_avg", "Temperature (°C)"),
+    "exposure": ("exp_pct", "Exposure (%)"),
+    "rt": ("Rt_mean", "Residence time (days)"),
+}
+
+
+def read_period(
+    path_root: str | Path, variable, start_date, end_date, geometry, layer="wet"
+):
+    """
+    Return the time slots fully inside start_date to end_date and the list of the
+    rendered (800, 1200) frames of a variable in them. The frames go through the
+    raster cache, so comparing a period again (e.g. per slot and then as period mean)
+    only maps the rendered frames.
+    """
+    path = (Path(path_root) / REL_PATH).resolve()
+    ds = xr.open_dataset(path, engine="netcdf4")
+    time_steps = pd.to_datetime(ds["time"].values)
+
+    delta_left = timedelta(days=7.5)
+    delta_right = timedelta(days=7.5) - timedelta(hours=1)
+    mask_ind = (time_steps - delta_left >= start_date) & (
+        time_steps + delta_right <= end_date
+    )
+    if not mask_ind.any():
+        ds.close()
+        raise ValueError(f"No 15-day slot between {start_date} and {end_date}")
+
+    frames, _ = get_rendered_frames(
+        ds, variable, mask_ind, geometry, path_root, layer=layer
+    )
+    ds.close()
+    return time_steps[mask_ind], frames
+
+
+def _period_mean(frames):
+    # every pixel shows one cell, so the mean of the frames is the frame of the means,
+    # accumulated a frame at a time
+    total = np.zeros(frames[0].shape)
+    count = np.zeros(frames[0].shape)
+    for frame in frames:
+        valid = ~np.isnan(frame)
+        total += np.where(valid, frame, 0.0)
+        count += valid
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return [total / count]
+
+
+def get_fig_compare(
+    period_a, period_b, variable_name, path_root: str | Path, period_mean=False
+):
+    """
+    Build the figure shown by display_compare.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    variable, colorbar_title = COMPARE_VARIABLES[variable_name]
+    rt = variable_name == "rt"
+    with stage("geometry"):
+        geometry = get_display_geometry(path_root)
+
+    with stage("rasterize") as record:
+        layer = "rt" if rt else "wet"
+        time_a, frames_a = read_period(path_root, variable, *period_a, geometry, layer)
+        time_b, frames_b = read_period(path_root, variable, *period_b, geometry, layer)
+        record.info["slots"] = (len(time_a), len(time_b))
+        if period_mean:
+            frames_a, frames_b = _period_mean(frames_a), _period_mean(frames_b)
+            labels = ["Period mean"]
+        else:
+            # align the slots by their position in the periods
+            n_slots = min(len(time_a), len(time_b))
+            frames_a, frames_b = frames_a[:n_slots], frames_b[:n_slots]
+            labels = [
+                f'{time_a[i].strftime("%d/%m/%Y")} vs {time_b[i].strftime("%d/%m/%Y")}'
+                for i in range(n_slots)
+            ]
+        frames_diff = [
+            frame_a - frame_b for frame_a, frame_b in zip(frames_a, frames_b)
+        ]
+        data_h = land_layer(geometry, frames_a[0])
+        bdr_dws0p = np.flip(geometry.boundary, axis=0) if rt else geometry.boundary
+        record.info["frames_shape"] = (len(frames_a),) + frames_a[0].shape
+
+    with stage("figure-build"):
+
+        def heatmaps(i):
+            return [
+                go.Heatmap(z=frames_a[i], coloraxis="coloraxis"),
+                go.Heatmap(z=frames_b[i], coloraxis="coloraxis"),
+                go.Heatmap(z=frames_diff[i], coloraxis="coloraxis2"),
+            ]
+
+        def period_title(period):
+            return (
+                f"{pd.Timestamp(period[0]):%d/%m/%Y}-{pd.Timestamp(period[1]):%d/%m/%Y}"
+            )
+
+        fig = make_subplots(
+            rows=1,
+            cols=3,
+            shared_yaxes=True,
+            horizontal_spacing=0.02,
+            subplot_titles=[
+                f"A: {period_title(period_a)}",
+                f"B: {period_title(period_b)}",
+                "A - B",
+            ],
+        )
+        for col, heatmap in enumerate(heatmaps(0), start=1):
+            fig.add_trace(heatmap, row=1, col=col)
+        for col in range(1, 4):
+            fig.add_trace(
+                go.Scatter(
+                    x=bdr_dws0p[:, 0],
+                    y=bdr_dws0p[:, 1],
+                    mode="lines",
+                    line=dict(color="black", width=2),
+                    name="",
+                    showlegend=False,
+                ),
+                row=1,
+                col=col,
+            )
+            fig.add_trace(
+                go.Heatmap(
+                    z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+                ),
+                row=1,
+                col=col,
+            )
+
+        limits = [
+            np.nanmax(np.abs(diff)) for diff in frames_diff if np.isfinite(diff).any()
+        ]
+        limit = float(max(limits)) if limits else 1
+        vmax = max(np.nanmax(frame) for frame in frames_a + frames_b)
+        fig.update_layout(
+            title=f"{colorbar_title.split(' (')[0]}: period A, period B and A - B"
+            + (" (period means)" if period_mean else " per 15-day slot"),
+            width=1400,
+            height=450,
+            coloraxis=dict(
+                cmin=0,
+                cmax=int(vmax) + 1,
+                colorbar=dict(title=colorbar_title, x=1.0),
+            ),
+            coloraxis2=dict(
+                cmin=-limit,
+                cmax=limit,
+                colorscale="RdBu_r",
+                colorbar=dict(title="A - B", x=1.08),
+            ),
+        )
+        for col in range(1, 4):
+            fig.update_xaxes(
+                title="Easting (km)",
+                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80, 100, 120],
+                constrain="domain",
+                row=1,
+                col=col,
+            )
+        fig.update_yaxes(
+            title="Northing (km)",
+            tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+            ticktext=[0, 20, 40, 60, 80],
+            scaleanchor="x",
+            row=1,
+            col=1,
+        )
+
+        if len(labels) > 1:
+            fig.frames = [
+                go.Frame(data=heatmaps(i), traces=[0, 1, 2], name=str(i))
+                for i in range(len(labels))
+            ]
+            fig.update_layout(
+                sliders=[
+                    {
+                        "currentvalue": {
+                            "prefix": "15 days time slots: ",
+                            "visible": True,
+                            "xanchor": "center",
+                        },
+                        "len": 0.9,
+                        "steps": [
+                            {
+                                "label": label,
+                                "method": "animate",
+                                "args": [
+                                    [str(i)],
+                                    {"frame": {"duration": 500, "redraw": True}},
+                                ],
+                            }
+                            for i, label in enumerate(labels)
+                        ],
+                    }
+                ],
+            )
+
+    return fig
+
+
+def display_compare(
+    period_a, period_b, variable_name, path_root: str | Path, period_mean=False
+):
+    """
+    Display the maps of two time periods side by side with their difference.
+
+    Parameters:
+    period_a, period_b : tuple of datetime
+        The (start date, end date) of the periods to compare.
+    variable_name : str
+        The map to compare. It should be one of 'S' (salinity), 'T' (temperature),
+        'exposure' or 'rt' (residence time).
+    period_mean : bool
+        Compare the means over the periods instead of the 15-day slots, which are
+        aligned by their position in the periods.
+    """
+    fig = get_fig_compare(period_a, period_b, variable_name, path_root, period_mean)
+    with stage("serialize"):
+        fig.show()
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import (
+    REL_PATH,
+    REL_PATH_BOUNDARIES_DWS,
+    get_display_geometry,
+)
+from .visualisation_script_probe import get_probe_cache
+from .visualisation_script_profiling import stage
+from .visualisation_script_regions import (
+    REGION_PERCENTILES,
+    REGION_VARIABLES,
+    VARIABLE_TITLES,
+    weighted_percentiles,
+)
+from .visualisation_script_slot_means import get_area_weights
+
+### Global variables
+# depth classes of the bathymetry h (m), split at DEPTH_EDGES
+DEPTH_CLASSES = ("intertidal flats", "shallow subtidal", "channels")
+DEPTH_EDGES = (2.0, 5.0)
+
+
+def build_depth_permutation(h, edges):
+    """
+    Sort the cells by depth class.
+
+    Parameters:
+    h : np.ndarray
+        Bathymetry of the cells, cells with nan depth are left out.
+    edges : sequence of float
+        The depths between the classes, in increasing order.
+
+    Returns:
+    (permutation, starts): the cells ordered by class (stable within a class) and the
+    position of the first cell of each class in it, followed by the number of cells
+    with a depth, so that class k is permutation[starts[k] : starts[k + 1]].
+    """
+    n_classes = len(edges) + 1
+    classes = np.digitize(h, edges)
+    classes[np.isnan(h)] = n_classes
+    permutation = np.argsort(classes, kind="stable")
+    starts = np.searchsorted(classes[permutation], np.arange(n_classes + 1))
+    return permutation, starts
+
+
+@lru_cache(maxsize=4)
+def _get_depth_permutation(path_root: Path, edges: tuple, mtime: float):
+    path = (path_root / REL_PATH).resolve()
+    path_boundaries = (path_root / REL_PATH_BOUNDARIES_DWS).resolve()
+
+    path_cache = sidecar_path(path, ".depth_classes.npz")
+    if is_fresh(path_cache, path) and is_fresh(path_cache, path_boundaries):
+        with np.load(path_cache) as npz:
+            if np.array_equal(npz["edges"], edges):
+                return npz["permutation"], npz["starts"]
+
+    # no cache, the data changed or the depth classes changed since it was written
+    geometry = get_display_geometry(path_root)
+    ds = xr.open_dataset(path, engine="netcdf4")
+    h = ds.h.values[geometry.wet_y, geometry.wet_x]
+    ds.close()
+
+    permutation, starts = build_depth_permutation(h, edges)
+    path_tmp = tmp_path(path_cache)
+    np.savez(path_tmp, edges=np.array(edges), permutation=permutation, starts=starts)
+    os.replace(path_tmp, path_cache)
+    return permutation, starts
+
+
+def get_depth_permutation(path_root: str | Path, edges=DEPTH_EDGES):
+    """
+    Return the (cached) permutation sorting the wet cells of the display geometry by
+    depth class and the boundaries of the classes in it, see build_depth_permutation.
+    """
+    path_root = Path(path_root).resolve()
+    mtime = max(
+        (path_root / REL_PATH).stat().st_mtime,
+        (path_root / REL_PATH_BOUNDARIES_DWS).stat().st_mtime,
+    )
+    return _get_depth_permutation(path_root, tuple(float(e) for e in edges), mtime)
+
+
+def depth_class_statistics(
+    path_root: str | Path,
+    variables=REGION_VARIABLES,
+    percentiles=REGION_PERCENTILES,
+    edges=DEPTH_EDGES,
+    names=DEPTH_CLASSES,
+):
+    """
+    Area-weighted mean and percentiles of the 15-day aggregates per depth class of the
+    bathymetry h, for all time slots at once.
+
+    The cells are gathered once in depth class order, so every class is a contiguous
+    block: the means of all classes are one segmented sum (np.add.reduceat) and the
+    percentiles are taken on each block in place.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    variables : tuple of str
+        The variables of the 15-day aggregates.
+    percentiles : sequence of float
+        The area-weighted percentiles to compute.
+    edges : sequence of float
+        The depths (m) between the classes.
+    names : sequence of str
+        The names of the len(edges) + 1 classes, from shallow to deep.
+
+    Returns:
+    pandas.DataFrame indexed by time with (depth class, variable, statistic) columns,
+    e.g. ('channels', 'S_avg', 'mean') or ('channels', 'S_avg', 'p50').
+    """
+    if len(names) != len(edges) + 1:
+        raise ValueError(f"Give {len(edges) + 1} names for {len(edges)} depth edges")
+
+    with stage("load") as record:
+        time, caches = get_probe_cache(path_root, variables)
+        permutation, starts = get_depth_permutation(path_root, edges)
+        n_sorted = starts[-1]  # cells without a depth are sorted after the classes
+        weights = get_area_weights(path_root)[permutation[:n_sorted]]
+        record.info["slots"] = len(time)
+
+    # reduceat needs strictly increasing offsets, empty classes are filled with nan
+    non_empty = np.flatnonzero(np.diff(starts) > 0)
+
+    with stage("reduce") as record:
+        columns = {}
+        for variable in variables:
+            block = np.asarray(caches[variable][permutation[:n_sorted]], dtype=float)
+            valid = ~np.isnan(block)
+            weighted = weights[:, None] * np.where(valid, block, 0.0)
+            weight_sums = np.full((len(names), len(time)), np.nan)
+            means = np.full((len(names), len(time)), np.nan)
+            if len(non_empty):
+                offsets = starts[non_empty]
+                weight_sums[non_empty] = np.add.reduceat(
+                    weights[:, None] * valid, offsets, axis=0
+                )
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    means[non_empty] = (
+                        np.add.reduceat(weighted, offsets, axis=0)
+                        / weight_sums[non_empty]
+                    )
+
+            for k, name in enumerate(names):
+                c0, c1 = starts[k], starts[k + 1]
+                columns[(name, variable, "mean")] = means[k]
+                if c1 > c0:
+                    stats = weighted_percentiles(
+                        block[c0:c1], weights[c0:c1], percentiles
+                    )
+                else:
+                    stats = np.full((len(percentiles), len(time)), np.nan)
+                for percentile, values in zip(percentiles, stats):
+                    columns[(name, variable, f"p{percentile:g}")] = values
+                columns[(name, variable, "area")] = np.nan_to_num(weight_sums[k])
+
+        statistics = pd.DataFrame(columns, index=time)
+        statistics.columns.names = ["depth class", "variable", "statistic"]
+        record.info["cells"] = int(n_sorted)
+
+    return statistics
+
+
+def plot_depth_classes(
+    path_root: str | Path,
+    variable="S_avg",
+    percentiles=(10, 90),
+    edges=DEPTH_EDGES,
+    names=DEPTH_CLASSES,
+):
+    """
+    Plot the area-weighted mean of a variable per depth class with a band between two
+    percentiles.
+    """
+    import plotly.graph_objects as go
+
+    from .visualisation_script_series import series_colour
+
+    statistics = depth_class_statistics(
+        path_root, (variable,), percentiles, edges, names
+    )
+    low, high = (f"p{percentile:g}" for percentile in percentiles)
+    bounds = [None, *edges, None]
+
+    with stage("figure-build"):
+        fig = go.Figure()
+        for i, name in enumerate(names):
+            colour = series_colour(i)
+            stats = statistics[name][variable]
+            if bounds[i] is None:
+                label = f"{name} (h < {bounds[i + 1]:g} m)"
+            elif bounds[i + 1] is None:
+                label = f"{name} (h ≥ {bounds[i]:g} m)"
+            else:
+                label = f"{name} ({bounds[i]:g}-{bounds[i + 1]:g} m)"
+            fig.add_trace(
+                go.Scatter(
+                    x=stats.index,
+                    y=stats[high],
+                    mode="lines",
+                    line=dict(width=0, color=colour),
+                    legendgroup=name,
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=stats.index,
+                    y=stats[low],
+                    mode="lines",
+                    line=dict(width=0, color=colour),
+                    fill="tonexty",
+                    opacity=0.3,
+                    legendgroup=name,
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    name=label,
+                    x=stats.index,
+                    y=stats["mean"],
+                    mode="lines+markers",
+                    line=dict(color=colour),
+                    legendgroup=name,
+                    hovertemplate=name + "<br>Date = %{x}<br>%{y}<extra></extra>",
+                )
+            )
+
+        fig.update_layout(
+            title=f"Area-weighted mean per depth class with the {low}-{high} band",
+            yaxis=dict(title=dict(text=VARIABLE_TITLES.get(variable, variable))),
+            xaxis=dict(title=dict(text="Date")),
+            hovermode="x",
+            legend_title_text="Depth class",
+        )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .visualisation_script_cache import tmp_path
+from .visualisation_script_geometry import REL_PATH, REL_PATH_BOUNDARIES_DWS
+
+### Global variables
+# figures over the whole record, with the files they are built from
+RECORD_FIGURES = {
+    "volume": ("output_files/DWS.volume.nc",),
+    "salinity": ("output_files/DWS200m.spatial_aggregates.S.nc",),
+    "temperature": ("output_files/DWS200m.spatial_aggregates.T.nc",),
+    "rivers": ("output_files/rivers_volume_flux.nc",),
+    "transects_volume": ("output_files/TR.volume_salt_flux.nc",),
+    "transects_salinity": ("output_files/TR.volume_salt_flux.nc",),
+    "budget": (
+        "output_files/DWS.volume.nc",
+        "output_files/rivers_volume_flux.nc",
+        "output_files/TR.volume_salt_flux.nc",
+    ),
+}
+# 15-day maps, exported per period
+PERIOD_FIGURES = {
+    "S": (REL_PATH, REL_PATH_BOUNDARIES_DWS),
+    "T": (REL_PATH, REL_PATH_BOUNDARIES_DWS),
+    "exposure": (REL_PATH, REL_PATH_BOUNDARIES_DWS),
+    "rt": (REL_PATH, REL_PATH_BOUNDARIES_DWS),
+    "layers": (REL_PATH, REL_PATH_BOUNDARIES_DWS),
+}
+FORMATS = ("html", "json")
+
+
+def parse_period(period: str):
+    """
+    Parse a period given as a year ('2010') or as 'start:end' dates
+    ('2010-03-01:2010-06-30'), the end date is included.
+
+    Returns:
+    (label, start_date, end_date)
+    """
+    if ":" in period:
+        start, end = period.split(":")
+        start_date = datetime.fromisoformat(start)
+        end_date = datetime.fromisoformat(end)
+        if len(end) == 10:  # a date without time includes the whole day
+            end_date += timedelta(days=1, hours=-1)
+    else:
+        start_date = datetime(int(period), 1, 1)
+        end_date = datetime(int(period) + 1, 1, 1) - timedelta(hours=1)
+    label = period.replace(":", "_")
+    return label, start_date, end_date
+
+
+def build_figure(figure, path_root: Path, period=None):
+    """Build one of the RECORD_FIGURES or, for a period, one of the PERIOD_FIGURES."""
+    if figure in PERIOD_FIGURES:
+        from .visualisation_script_15day_aggregations import (
+            get_fig_exposure,
+            get_fig_layers,
+            get_fig_rt,
+            get_fig_variable,
+        )
+
+        _, start_date, end_date = parse_period(period)
+        if figure in ("S", "T"):
+            return get_fig_variable(start_date, end_date, figure, path_root)
+        if figure == "exposure":
+            return get_fig_exposure(start_date, end_date, path_root)
+        if figure == "layers":
+            return get_fig_layers(start_date, end_date, path_root)
+        return get_fig_rt(start_date, end_date, path_root)
+
+    if figure == "volume":
+        from .visualisation_script_spatial import plot_volume
+
+        return plot_volume(path_root)
+    if figure == "salinity":
+        from .visualisation_script_spatial import plot_salinity
+
+        return plot_salinity(path_root)
+    if figure == "temperature":
+        from .visualisation_script_spatial import plot_temperature
+
+        return plot_temperature(path_root)
+    # the flux figures are exported with the tidal residual, as in the notebook
+    if figure == "rivers":
+        from .visualisation_script_rivers import plot_rivers_volume_flux
+
+        return plot_rivers_volume_flux(path_root, tidal_filter="godin")
+    if figure == "transects_volume":
+        from .visualisation_script_transects_flux import plot_transects_volume_flux
+
+        return plot_transects_volume_flux(path_root, tidal_filter="godin")
+    if figure == "transects_salinity":
+        from .visualisation_script_transects_flux import plot_transects_salinity_flux
+
+        return plot_transects_salinity_flux(path_root, tidal_filter="godin")
+    if figure == "budget":
+        from .visualisation_script_budget import plot_water_budget
+
+        return plot_water_budget(path_root)
+    raise ValueError(f"Unknown figure: {figure}")
+
+
+def plan_jobs(path_root: Path, out_dir: Path, figures, periods, formats, force=False):
+    """
+    List the (figure, period, output path) to export and the outputs skipped because
+    they are newer than the files they are built from.
+    """
+    period_figures = [figure for figure in figures if figure in PERIOD_FIGURES]
+    if period_figures and not periods:
+        raise ValueError(f"No periods given for the 15-day maps {period_figures}")
+
+    jobs, skipped = [], []
+    for figure in figures:
+        if figure in RECORD_FIGURES:
+            inputs, figure_periods = RECORD_FIGURES[figure], [None]
+        elif figure in PERIOD_FIGURES:
+            inputs, figure_periods = PERIOD_FIGURES[figure], periods
+        else:
+            raise ValueError(f"Unknown figure: {figure}")
+        mtime = max((path_root / rel_path).stat().st_mtime for rel_path in inputs)
+
+        for period in figure_periods:
+            name = figure if period is None else f"{figure}_{parse_period(period)[0]}"
+            for fmt in formats:
+                out_path = out_dir / f"{name}.{fmt}"
+                if (
+                    not force
+                    and out_path.exists()
+                    and out_path.stat().st_mtime >= mtime
+                ):
+                    skipped.append(out_path)
+                else:
+                    jobs.append((figure, period, out_path))
+    return jobs, skipped
+
+
+def _export(path_root: Path, figure, period, out_paths, include_plotlyjs):
+    """Build a figure once and write it in every requested format."""
+    t0 = time.perf_counter()
+    fig = build_figure(figure, path_root, period)
+    n_bytes = 0
+    for out_path in out_paths:
+        path_tmp = tmp_path(out_path)
+        if out_path.suffix == ".html":
+            fig.write_html(path_tmp, include_plotlyjs=include_plotlyjs)
+        else:
+            fig.write_json(path_tmp)
+        os.replace(path_tmp, out_path)
+        n_bytes += out_path.stat().st_size
+    return figure, period, len(out_paths), n_bytes, time.perf_counter() - t0
+
+
+def export_figures(
+    path_root,
+    out_dir,
+    figures=tuple(RECORD_FIGURES),
+    periods=(),
+    formats=("html",),
+    processes=None,
+    force=False,
+    include_plotlyjs=True,
+):
+    """
+    Build and write figures in a process pool.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    out_dir : str or Path
+        The folder the files are written to, as '<figure>[_<period>].<format>'.
+    figures : sequence of str
+        Names of RECORD_FIGURES and PERIOD_FIGURES.
+    periods : sequence of str
+        The periods of the 15-day maps, see parse_period.
+    formats : sequence of str
+        'html' and/or 'json'.
+    processes : int
+        Number of worker processes, by default the number of CPUs.
+    force : bool
+        Also rewrite the outputs that are up to date.
+
+    Returns:
+    dict with the summary of the export.
+    """
+    t0 = time.perf_counter()
+    path_root = Path(path_root).resolve()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs, skipped = plan_jobs(path_root, out_dir, figures, periods, formats, force)
+
+    # one task per figure and period, writing all its formats
+    tasks = {}
+    for figure, period, out_path in jobs:
+        tasks.setdefault((figure, period), []).append(out_path)
+
+    # the caches on disk and the display geometry are built once in this process,
+    # forked workers inherit the geometry and read the caches
+    if any(figure in PERIOD_FIGURES for figure, _ in tasks):
+        from .visualisation_script_geometry import get_display_geometry
+
+        get_display_geometry(path_root)
+    if any(figure in ("rivers", "budget") for figure, _ in tasks):
+        from .visualisation_script_series import read_series_block
+
+        read_series_block(
+            path_root / RECORD_FIGURES["rivers"][0], "volume_flux", "station_name"
+        )
+    if any(figure.startswith("transects") or figure == "budget" for figure, _ in tasks):
+        from .visualisation_script_series import read_series_block
+
+        for variable in ("volume_flux", "salinity_flux"):
+            read_series_block(
+                path_root / RECORD_FIGURES["transects_volume"][0],
+                variable,
+                "transect_name",
+            )
+
+    results = []
+    if tasks:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    _export, path_root, figure, period, out_paths, include_plotlyjs
+                )
+                for (figure, period), out_paths in tasks.items()
+            ]
+            for future in futures:
+                results.append(future.result())
+
+    seconds = time.perf_counter() - t0
+    n_files = sum(result[2] for result in results)
+    return dict(
+        figures=len(results),
+        files=n_files,
+        skipped=len(skipped),
+        bytes=sum(result[3] for result in results),
+        seconds=seconds,
+        figures_per_second=len(results) / seconds if seconds else 0.0,
+        build_seconds={
+            figure if period is None else f"{figure}_{parse_period(period)[0]}": (
+                build_seconds
+            )
+            for figure, period, _, _, build_seconds in results
+        },
+    )
+
+
+def print_summary(summary):
+    for name, seconds in summary["build_seconds"].items():
+        print(f"{name:<32} {seconds:>8.2f}s")
+    print(
+        f"{summary['figures']} figures ({summary['files']} files, "
+        + f"{summary['bytes'] / 1e6:.1f} MB) in {summary['seconds']:.1f}s, "
+        + f"{summary['figures_per_second']:.2f} figures/s, "
+        + f"{summary['skipped']} up-to-date files skipped"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m visualisation_scripts")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write figures to HTML/JSON files")
+    export.add_argument("path_root", type=Path, help="folder holding output_files")
+    export.add_argument("out_dir", type=Path, help="folder to write the figures to")
+    export.add_argument(
+        "--figures",
+        nargs="+",
+        default=list(RECORD_FIGURES),
+        choices=list(RECORD_FIGURES) + list(PERIOD_FIGURES),
+    )
+    export.add_argument(
+        "--periods",
+        nargs="+",
+        default=[],
+        help="periods of the 15-day maps: years (2010) or start:end dates",
+    )
+    export.add_argument("--formats", nargs="+", default=["html"], choices=FORMATS)
+    export.add_argument("--processes", type=int, help="default: number of CPUs")
+    export.add_argument("--force", action="store_true", help="rewrite all outputs")
+    export.add_argument(
+        "--cdn",
+        action="store_true",
+        help="load plotly.js from a CDN instead of embedding it in the HTML files",
+    )
+    args = parser.parse_args(argv)
+    period_figures = [figure for figure in args.figures if figure in PERIOD_FIGURES]
+    if period_figures and not args.periods:
+        export.error(f"--periods is required for the figures {period_figures}")
+
+    summary = export_figures(
+        args.path_root,
+        args.out_dir,
+        args.figures,
+        args.periods,
+        args.formats,
+        args.processes,
+        args.force,
+        "cdn" if args.cdn else True,
+    )
+    print_summary(summary)
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
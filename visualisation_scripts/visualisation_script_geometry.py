@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+### Global variables
+REL_PATH_BOUNDARIES_DWS = "output_files//DWS200m.boundary_area.nc"
+REL_PATH = "output_files//15day_aggregates.rt.nc"  # change for your folder with data if run locally
+
+# The projected raster is 6400x6400 pixels of 100 m, the displayed window is cut out of it
+DISPLAY_SHAPE = (800, 1200)
+DISPLAY_OFFSET = (5400, 1000)  # (row, column) of the window in the projected raster
+RT_OFFSET = (34, 165)  # shift of the residence time grid in the displayed window
+
+
+@dataclass(frozen=True)
+class DisplayGeometry:
+    """
+    Mapping between the model grid and the pixels of the displayed 15-day maps.
+
+    index_map holds, per display pixel, the position of the DWS cell (in wet_y/wet_x)
+    drawn there or -1, rt_index_map holds the flat model grid index drawn by the
+    residence time maps or -1.
+
+    wet_points and rt_points hold the (row, column) display position of the stamped
+    cells, in drawing order for rt_points with their flat grid index in rt_cells, and
+    cell_px and rt_cell_px the spacing of both grids in display pixels, to stamp the
+    cells at finer resolutions (see visualisation_script_tiles).
+    """
+
+    grid_shape: tuple
+    wet_y: np.ndarray
+    wet_x: np.ndarray
+    index_map: np.ndarray
+    rt_index_map: np.ndarray
+    land: np.ndarray
+    boundary: np.ndarray
+    wet_points: np.ndarray
+    rt_points: np.ndarray
+    rt_cells: np.ndarray
+    cell_px: float
+    rt_cell_px: float
+
+    @property
+    def n_wet(self):
+        return len(self.wet_y)
+
+    @cached_property
+    def wet_lookup(self):
+        """Position of each model cell in wet_y/wet_x, -1 outside the DWS."""
+        lookup = np.full(self.grid_shape, -1, dtype=np.int64)
+        lookup[self.wet_y, self.wet_x] = np.arange(self.n_wet)
+        return lookup
+
+    def pixel_to_cell(self, x, y, layer="variable"):
+        """
+        Return the model cell (iy, ix) drawn at display pixel (x, y) or None.
+
+        Parameters:
+        x, y : int
+            Column and row of the display pixel (as reported by a click on the map).
+        layer : str
+            'variable' for the S, T and exposure maps, 'rt' for the residence time maps.
+        """
+        x, y = int(round(x)), int(round(y))
+        if not (0 <= y < DISPLAY_SHAPE[0] and 0 <= x < DISPLAY_SHAPE[1]):
+            return None
+        if layer == "rt":
+            flat = self.rt_index_map[y, x]
+            if flat < 0:
+                return None
+            return divmod(int(flat), self.grid_shape[1])
+        pos = self.index_map[y, x]
+        if pos < 0:
+            return None
+        return int(self.wet_y[pos]), int(self.wet_x[pos])
+
+
+def _stamp_map(rows, cols, order, half_lo, half_hi, offset, shape):
+    """
+    Rasterize square stamps centred at (rows, cols) and return, per pixel, the highest
+    order written there (-1 for untouched pixels), i.e. the stamp drawn last wins.
+    """
+    steps = np.arange(-half_lo, half_hi + 1)
+    r = rows[:, None, None] + steps[None, :, None] - offset[0]
+    c = cols[:, None, None] + steps[None, None, :] - offset[1]
+    r, c, o = np.broadcast_arrays(r, c, order[:, None, None])
+    inside = (r >= 0) & (r < shape[0]) & (c >= 0) & (c < shape[1])
+
+    stamp = np.full(shape[0] * shape[1], -1, dtype=np.int64)
+    np.maximum.at(stamp, r[inside] * shape[1] + c[inside], o[inside])
+    return stamp.reshape(shape)
+
+
+@lru_cache(maxsize=4)
+def _get_display_geometry(path_data: Path, path_boundaries: Path):
+    from pyproj import Transformer
+
+    ds = xr.open_dataset(path_data, engine="netcdf4")
+    dws_b = xr.open_dataset(path_boundaries)
+
+    #### rotations of x and y coordinates
+    # from epgs:4326(LatLon with WGS84) to epgs:28992(DWS)
+    # first projected point to correct the coordinates of model local meter units
+    inproj = Transformer.from_crs("epsg:4326", "epsg:28992", always_xy=True)
+    xctp0, yctp0 = inproj.transform(dws_b.lonc.values[0, 0], dws_b.latc.values[0, 0])
+    xctp0, yctp0 = xctp0 / 1e2, yctp0 / 1e2
+
+    # matrix rotation -17degrees-----
+    ang = -17 * np.pi / 180
+    angs = np.array([[np.cos(ang), np.sin(ang)], [-np.sin(ang), np.cos(ang)]])
+
+    xc = dws_b.xc.values
+    yc = dws_b.yc.values
+    # the first point in the bathy data in local meter units=0,0
+    xyp0 = np.matmul(angs, [xc[0], yc[0]]) / 1e2
+
+    def to_display(points):
+        points_rot = np.matmul(angs, points.T).T / 1e2 - xyp0
+        points_rot[:, 0] += xctp0
+        points_rot[:, 1] += yctp0
+        return points_rot
+
+    # rotate DWS area
+    wet_y, wet_x = np.where(dws_b.mask_dws.values)
+    points_rot = to_display(np.column_stack((xc[wet_x], yc[wet_y])))
+    index_map = _stamp_map(
+        points_rot[:, 1].astype(int),
+        points_rot[:, 0].astype(int),
+        np.arange(len(wet_y)),
+        1,
+        1,
+        DISPLAY_OFFSET,
+        DISPLAY_SHAPE,
+    )
+
+    # rotate land area
+    land_y, land_x = np.where(np.isnan(ds.h.values))
+    points_land = to_display(np.column_stack((xc[land_x], yc[land_y])))
+    land_map = _stamp_map(
+        points_land[:, 1].astype(int),
+        points_land[:, 0].astype(int),
+        np.zeros(len(land_y), dtype=np.int64),
+        1,
+        1,
+        DISPLAY_OFFSET,
+        DISPLAY_SHAPE,
+    )
+    land = np.where(land_map >= 0, 1.0, np.nan)
+    land[0:300, 280:1200] = 1  # add land area
+
+    # contour of DWS
+    # 1)substact the first model local point of the topo file, but give tha same as xyp0=[0,0]
+    # 2)use the first projected point of the case (lon,lat model units to meter)
+    boundary = to_display(dws_b.bdr_dws.values.astype(float))
+    boundary[:, 0] -= DISPLAY_OFFSET[1]
+    boundary[:, 1] -= DISPLAY_OFFSET[0]
+
+    # residence time grid, drawn column by column with 5x5 stamps
+    ny, nx = ds.xr.shape
+    xrr = (ds.xr.values - 116.7) * 10
+    yr = (ds.yr.values - 543.3) * 10
+    valid = np.isfinite(xrr) & np.isfinite(yr)
+    iy, ix = np.where(valid)
+    rows = yr[iy, ix].astype(int) + RT_OFFSET[0]
+    cols = xrr[iy, ix].astype(int) + RT_OFFSET[1]
+    # negative slice starts select nothing in the original drawing loop
+    keep = (rows - 2 >= 0) & (cols - 2 >= 0)
+    order_map = _stamp_map(
+        rows[keep],
+        cols[keep],
+        (ix * ny + iy)[keep],
+        2,
+        2,
+        (0, 0),
+        DISPLAY_SHAPE,
+    )
+    rt_index_map = np.where(order_map >= 0, (order_map % ny) * nx + order_map // ny, -1)
+    drawing_order = np.argsort((ix * ny + iy)[keep])
+    rt_points = np.column_stack(
+        (yr[iy, ix] + RT_OFFSET[0], xrr[iy, ix] + RT_OFFSET[1])
+    )[keep][drawing_order]
+    rt_cells = (iy * nx + ix)[keep][drawing_order]
+
+    ds.close()
+    dws_b.close()
+
+    return DisplayGeometry(
+        grid_shape=(ny, nx),
+        wet_y=wet_y,
+        wet_x=wet_x,
+        index_map=index_map,
+        rt_index_map=rt_index_map,
+        land=land,
+        boundary=boundary,
+        wet_points=np.column_stack(
+            (
+                points_rot[:, 1] - DISPLAY_OFFSET[0],
+                points_rot[:, 0] - DISPLAY_OFFSET[1],
+            )
+        ),
+        rt_points=rt_points,
+        rt_cells=rt_cells,
+        cell_px=float(np.nanmedian(np.abs(np.diff(xc)))) / 1e2,
+        rt_cell_px=float(np.nanmedian(np.abs(np.diff(xrr, axis=1)))),
+    )
+
+
+def get_display_geometry(path_root: str | Path):
+    """
+    Return the (cached) mapping between the model grid and the 800x1200 display grid.
+    """
+    return _get_display_geometry(
+        (Path(path_root) / REL_PATH).resolve(),
+        (Path(path_root) / REL_PATH_BOUNDARIES_DWS).resolve(),
+    )
+
+
+def render_frames(values, index_map):
+    """
+    Draw model values on the display grid.
+
+    Parameters:
+    values : np.ndarray
+        Array of shape (time, n_cells) with the values addressed by index_map.
+    index_map : np.ndarray
+        Display grid of cell indices, -1 for pixels without data.
+    """
+    values = np.asarray(values, dtype=float)
+    padded = np.concatenate([values, np.full((values.shape[0], 1), np.nan)], axis=1)
+    return padded[:, index_map]
+
+
+def render_wet_frames(data, geometry: DisplayGeometry):
+    """Draw a (time, ny, nx) cube of a DWS variable with the 3x3 cell stamps."""
+    return render_frames(data[:, geometry.wet_y, geometry.wet_x], geometry.index_map)
+
+
+def render_rt_frames(data, geometry: DisplayGeometry):
+    """Draw a (time, ny, nx) cube with the 5x5 stamps of the residence time grid."""
+    return render_frames(data.reshape(data.shape[0], -1), geometry.rt_index_map)
+
+
+def data_window(index_map):
+    """
+    Return the (rows, columns) slices of the smallest window of the display grid
+    holding every pixel with data, so that frames can be cut down to it.
+    """
+    rows = np.flatnonzero((index_map >= 0).any(axis=1))
+    cols = np.flatnonzero((index_map >= 0).any(axis=0))
+    if len(rows) == 0:
+        return slice(0, 0), slice(0, 0)
+    return slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1)
+
+
+def land_layer(geometry: DisplayGeometry, first_frame):
+    """Land raster with the area covered by data replaced by nan."""
+    data_h = geometry.land.copy()
+    data_h[~np.isnan(first_frame)] = np.nan
+    return data_h
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import REL_PATH
+from .visualisation_script_probe import get_probe_cache
+from .visualisation_script_profiling import stage
+from .visualisation_script_regions import VARIABLE_TITLES
+
+### Global variables
+# fixed bin edges per variable: (lowest edge, highest edge, number of bins)
+HISTOGRAM_BINS = {
+    "S_avg": (0.0, 35.0, 70),
+    "T_avg": (-2.0, 26.0, 56),
+    "exp_pct": (0.0, 100.0, 50),
+    "Rt_mean": (0.0, 120.0, 60),
+}
+CHUNK_CELLS = 4096  # number of cells binned at once
+
+
+def build_histograms(np_values, edges, chunk_cells=CHUNK_CELLS):
+    """
+    Histogram of every time slot in one pass with a bincount over the flattened
+    (slot, bin) index. Values outside the edges are counted apart, nan values are
+    left out.
+
+    Parameters:
+    np_values : np.ndarray
+        Array of shape (n_cells, time), e.g. the cell-major probe cache.
+    edges : np.ndarray
+        Regularly spaced bin edges, the last bin includes the highest edge.
+
+    Returns:
+    (counts, outside): arrays of shape (time, bins) with the number of cells per bin
+    and of shape (time, 2) with the number of cells below the lowest edge and above
+    the highest edge.
+    """
+    n_cells, n_time = np_values.shape
+    n_bins = len(edges) - 1
+    width = (edges[-1] - edges[0]) / n_bins
+    slot_offsets = np.arange(n_time) * n_bins
+
+    counts = np.zeros(n_time * n_bins, dtype=np.int64)
+    outside = np.zeros((n_time, 2), dtype=np.int64)
+    for c0 in range(0, n_cells, chunk_cells):
+        block = np.asarray(np_values[c0 : c0 + chunk_cells], dtype=float)
+        valid = ~np.isnan(block)
+        below = valid & (block < edges[0])
+        above = valid & (block > edges[-1])
+        inside = valid & ~below & ~above
+        bins = np.floor(
+            (block - edges[0]) / width, where=inside, out=np.zeros_like(block)
+        )
+        # the highest edge (and rounding just below it) belongs to the last bin
+        bins = np.clip(bins, 0, n_bins - 1).astype(np.int64)
+        flat = (bins + slot_offsets)[inside]
+        counts += np.bincount(flat, minlength=n_time * n_bins)
+        outside[:, 0] += below.sum(axis=0)
+        outside[:, 1] += above.sum(axis=0)
+
+    return counts.reshape(n_time, n_bins), outside
+
+
+@lru_cache(maxsize=8)
+def _get_histograms(path_root: Path, variable: str, mtime: float):
+    path = (path_root / REL_PATH).resolve()
+    low, high, n_bins = HISTOGRAM_BINS[variable]
+    edges = np.linspace(low, high, n_bins + 1)
+
+    path_cache = sidecar_path(path, f".histogram.{variable}.npz")
+    if is_fresh(path_cache, path):
+        with np.load(path_cache) as npz:
+            if "outside" in npz.files and np.array_equal(npz["edges"], edges):
+                return edges, npz["counts"], npz["outside"]
+
+    # no cache, the bin edges changed or it has no counts of the values outside them
+    _, caches = get_probe_cache(path_root, (variable,))
+    counts, outside = build_histograms(caches[variable], edges)
+    path_tmp = tmp_path(path_cache)
+    np.savez(path_tmp, edges=edges, counts=counts, outside=outside)
+    os.replace(path_tmp, path_cache)
+
+    return edges, counts, outside
+
+
+def get_histograms(path_root: str | Path, variable="S_avg"):
+    """
+    Return the bin edges, the (cached) (time, bins) histograms of a variable over
+    the DWS cells and the (time, 2) counts of the cells below and above the edges,
+    see build_histograms and HISTOGRAM_BINS.
+    """
+    path_root = Path(path_root).resolve()
+    return _get_histograms(path_root, variable, (path_root / REL_PATH).stat().st_mtime)
+
+
+def plot_histograms(path_root: str | Path, variable="S_avg", view="heatstrip"):
+    """
+    Plot how the distribution of a variable over the DWS shifts per 15-day slot.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    variable : str
+        One of 'S_avg', 'T_avg', 'exp_pct' or 'Rt_mean'.
+    view : str
+        'heatstrip' for the share of the cells per bin and slot as a heatmap,
+        'ridgeline' for the distributions of (at most 40) slots stacked over each
+        other.
+    """
+    import plotly.graph_objects as go
+
+    with stage("load") as record:
+        time, _ = get_probe_cache(path_root, (variable,))
+        edges, counts, outside = get_histograms(path_root, variable)
+        record.info["slots"] = len(time)
+
+    with stage("figure-build"):
+        centres = (edges[:-1] + edges[1:]) / 2
+        # shares of all the cells with a value, including those outside the edges
+        total = counts.sum(axis=1, keepdims=True) + outside.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = 100 * counts / total
+            share_outside = 100 * outside / total
+        title = VARIABLE_TITLES.get(variable, variable)
+
+        fig = go.Figure()
+        if view == "heatstrip":
+            fig.add_trace(
+                go.Heatmap(
+                    x=time,
+                    y=centres,
+                    z=share.T,
+                    colorscale="Viridis",
+                    colorbar=dict(title="Cells (%)"),
+                    hovertemplate="Date = %{x}<br>Bin = %{y}<br>%{z:.1f} %<extra></extra>",
+                )
+            )
+            fig.update_layout(
+                xaxis=dict(title=dict(text="Date")),
+                yaxis=dict(title=dict(text=title)),
+            )
+        elif view == "ridgeline":
+            step = max(1, int(np.ceil(len(time) / 40)))
+            scale = 2.0 / max(np.nanmax(share), 1e-9)
+            for i in range(0, len(time), step):
+                offset = i // step
+                label = time[i].strftime("%Y-%m-%d")
+                fig.add_trace(
+                    go.Scatter(
+                        x=centres,
+                        y=np.full(len(centres), offset, dtype=float),
+                        mode="lines",
+                        line=dict(width=0),
+                        showlegend=False,
+                        hoverinfo="skip",
+                    )
+                )
+                fig.add_trace(
+                    go.Scatter(
+                        name=label,
+                        x=centres,
+                        y=offset + scale * share[i],
+                        customdata=share[i],
+                        mode="lines",
+                        line=dict(color="rgb(31, 119, 180)", width=1),
+                        fill="tonexty",
+                        fillcolor="rgba(31, 119, 180, 0.3)",
+                        showlegend=False,
+                        hovertemplate=label
+                        + "<br>Bin = %{x}<br>%{customdata:.1f} %<extra></extra>",
+                    )
+                )
+            ticks = list(range(0, len(time), step))
+            fig.update_layout(
+                xaxis=dict(title=dict(text=title)),
+                yaxis=dict(
+                    title=dict(text="Date"),
+                    tickvals=[i // step for i in ticks],
+                    ticktext=[time[i].strftime("%Y-%m-%d") for i in ticks],
+                ),
+                height=max(500, 20 * len(ticks)),
+            )
+        else:
+            raise ValueError(f"Unknown view: {view}")
+
+        fig.update_layout(
+            title=f"Distribution over the DWS cells per 15-day slot: {title}"
+        )
+        if outside.any():
+            low, high = edges[0], edges[-1]
+            fig.update_layout(
+                title=fig.layout.title.text
+                + f"<br><sup>At most {np.nanmax(share_outside[:, 0]):.1f} % of the"
+                + f" cells below {low:g} and {np.nanmax(share_outside[:, 1]):.1f} %"
+                + f" above {high:g} per slot, not shown</sup>"
+            )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
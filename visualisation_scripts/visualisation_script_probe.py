@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_15day_aggregations import (
+    get_fig_exposure,
+    get_fig_rt,
+    get_fig_variable,
+)
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import REL_PATH, get_display_geometry
+from .visualisation_script_profiling import stage
+
+### Global variables
+PROBE_VARIABLES = ("S_avg", "S_sd", "T_avg", "exp_pct", "Rt_mean")
+CHUNK_SLOTS = 64  # number of 15-day slots read at once when building the cache
+
+
+def build_probe_cache(
+    path_root: str | Path, variables=PROBE_VARIABLES, chunk_slots=CHUNK_SLOTS
+):
+    """
+    Write the time series of every DWS cell to cell-major (n_wet, time) arrays next to
+    the 15-day aggregates, so that the series of one cell is a contiguous read.
+    The cube is streamed in chunks of time slots, up-to-date caches are kept.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    variables : tuple of str
+        The variables of the 15-day aggregates to cache.
+    chunk_slots : int
+        The number of time slots read at once.
+    """
+    path = (Path(path_root) / REL_PATH).resolve()
+    geometry = get_display_geometry(path_root)
+
+    with stage("load", cache="probe") as record:
+        ds = xr.open_dataset(path, engine="netcdf4")
+        n_time = ds.sizes["time"]
+
+        built = []
+        for variable in variables:
+            path_cache = sidecar_path(path, f".probe.{variable}.npy")
+            if is_fresh(path_cache, path):
+                continue
+
+            path_tmp = tmp_path(path_cache)
+            cache = np.lib.format.open_memmap(
+                path_tmp, mode="w+", dtype=np.float32, shape=(geometry.n_wet, n_time)
+            )
+            for t0 in range(0, n_time, chunk_slots):
+                t1 = min(t0 + chunk_slots, n_time)
+                block = ds[variable][t0:t1].values
+                cache[:, t0:t1] = block[:, geometry.wet_y, geometry.wet_x].T
+            cache.flush()
+            del cache
+            os.replace(path_tmp, path_cache)
+            built.append(variable)
+
+        ds.close()
+        record.info["built"] = built
+        record.info["shape"] = (geometry.n_wet, n_time)
+    _get_probe_cache.cache_clear()
+
+
+@lru_cache(maxsize=4)
+def _get_probe_cache(path: Path, variables: tuple):
+    ds = xr.open_dataset(path, engine="netcdf4")
+    time = pd.to_datetime(ds["time"].values)
+    ds.close()
+
+    caches = {
+        variable: np.load(sidecar_path(path, f".probe.{variable}.npy"), mmap_mode="r")
+        for variable in variables
+    }
+    return time, caches
+
+
+def get_probe_cache(path_root: str | Path, variables=PROBE_VARIABLES):
+    """
+    Return the time axis and the memory-mapped cell-major arrays, building them first
+    if needed.
+    """
+    path = (Path(path_root) / REL_PATH).resolve()
+    if not all(
+        is_fresh(sidecar_path(path, f".probe.{variable}.npy"), path)
+        for variable in variables
+    ):
+        build_probe_cache(path_root, variables)
+    return _get_probe_cache(path, tuple(variables))
+
+
+def probe_cell(
+    x, y, path_root: str | Path, layer="variable", variables=PROBE_VARIABLES
+):
+    """
+    Return the full time series of the model cell drawn at a pixel of the 15-day maps.
+
+    Parameters:
+    x, y : int
+        Column and row of the clicked display pixel.
+    path_root : str or Path
+        The folder holding output_files.
+    layer : str
+        'variable' for the S, T and exposure maps, 'rt' for the residence time maps.
+
+    Returns:
+    pandas.DataFrame indexed by time with a column per variable, or None when the
+    pixel does not show a DWS cell.
+    """
+    geometry = get_display_geometry(path_root)
+    cell = geometry.pixel_to_cell(x, y, layer=layer)
+    if cell is None:
+        return None
+    pos = geometry.wet_lookup[cell]
+    if pos < 0:
+        return None
+
+    time, caches = get_probe_cache(path_root, variables)
+    series = pd.DataFrame(
+        {variable: np.asarray(caches[variable][pos]) for variable in variables},
+        index=time,
+    )
+    series.attrs["cell"] = cell
+    return series
+
+
+def get_fig_probe(x, y, path_root: str | Path, layer="variable"):
+    """
+    Build the figure with the time series of the cell drawn at display pixel (x, y).
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    with stage("load") as record:
+        series = probe_cell(x, y, path_root, layer=layer)
+        record.info["slots"] = 0 if series is None else len(series)
+
+    with stage("figure-build"):
+        fig = make_subplots(
+            rows=4,
+            cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.03,
+            subplot_titles=["Salinity", "Temperature", "Exposure", "Residence time"],
+        )
+        fig.update_layout(
+            height=800,
+            showlegend=False,
+            hovermode="x",
+            margin={"t": 60},
+        )
+        fig.update_yaxes(title_text="(g kg<sup>-1</sup>)", row=1, col=1)
+        fig.update_yaxes(title_text="(°C)", row=2, col=1)
+        fig.update_yaxes(title_text="(%)", row=3, col=1)
+        fig.update_yaxes(title_text="(days)", row=4, col=1)
+        fig.update_xaxes(title_text="Date", row=4, col=1)
+
+        if series is None:
+            fig.update_layout(title="Click on the Dutch Wadden Sea to probe a cell")
+            return fig
+
+        time = series.index
+        s_avg = series["S_avg"].values
+        s_sd = series["S_sd"].values
+        fig.add_trace(
+            go.Scattergl(x=time, y=s_avg + s_sd, mode="lines", line=dict(width=0)),
+            row=1,
+            col=1,
+        )
+        fig.add_trace(
+            go.Scattergl(
+                x=time,
+                y=s_avg - s_sd,
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor="rgba(68, 68, 68, 0.3)",
+            ),
+            row=1,
+            col=1,
+        )
+        for row, variable in enumerate(
+            ["S_avg", "T_avg", "exp_pct", "Rt_mean"], start=1
+        ):
+            fig.add_trace(
+                go.Scattergl(
+                    name=variable,
+                    x=time,
+                    y=series[variable].values,
+                    mode="lines",
+                    line=dict(color="rgb(31, 119, 180)"),
+                ),
+                row=row,
+                col=1,
+            )
+
+        iy, ix = series.attrs["cell"]
+        fig.update_layout(title=f"Model cell (y={iy}, x={ix}) at pixel ({x}, {y})")
+
+    return fig
+
+
+def display_probe(start_date, end_date, variable_name, path_root: str | Path):
+    """
+    Display a 15-day map next to the time series of the cell clicked on the map.
+    The figures are served by a Dash app, clicking a pixel updates the time series.
+
+    Parameters:
+    start_date : datetime
+        The start date of the time period to display.
+    end_date : datetime
+        The end date of the time period to display.
+    variable_name : str
+        The map to display. It should be one of 'S' (salinity), 'T' (temperature),
+        'exposure' or 'rt' (residence time).
+    """
+    from dash import Dash, Input, Output, dcc, html
+
+    if variable_name in ("S", "T"):
+        fig_map = get_fig_variable(start_date, end_date, variable_name, path_root)
+    elif variable_name == "exposure":
+        fig_map = get_fig_exposure(start_date, end_date, path_root)
+    elif variable_name == "rt":
+        fig_map = get_fig_rt(start_date, end_date, path_root)
+    else:
+        raise ValueError(f"Unknown variable name: {variable_name}")
+    layer = "rt" if variable_name == "rt" else "variable"
+
+    # build the caches before the first click
+    get_display_geometry(path_root)
+    get_probe_cache(path_root)
+
+    app = Dash(__name__)
+    app.layout = html.Div(
+        [
+            dcc.Graph(id="probe-map", figure=fig_map),
+            dcc.Graph(id="probe-series", figure=get_fig_probe(-1, -1, path_root)),
+        ]
+    )
+
+    @app.callback(Output("probe-series", "figure"), Input("probe-map", "clickData"))
+    def update_probe(click_data):
+        if not click_data:
+            return get_fig_probe(-1, -1, path_root)
+        point = click_data["points"][0]
+        return get_fig_probe(point["x"], point["y"], path_root, layer=layer)
+
+    app.run(jupyter_mode="inline")
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
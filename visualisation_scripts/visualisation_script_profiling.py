@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+### Global variables
+logger = logging.getLogger(__name__)
+_REPORT = ContextVar("profile_report", default=None)
+# traced peak of the innermost running stage, before its last nested stage started
+_OUTER_PEAK = ContextVar("profile_outer_peak", default=None)
+_DEPTH = ContextVar("profile_depth", default=0)
+
+
+@dataclass
+class StageRecord:
+    """Wall time, traced peak memory and sizes of one stage of a figure."""
+
+    name: str
+    function: str = ""
+    seconds: float = 0.0
+    peak_mb: float = 0.0
+    info: dict = field(default_factory=dict)
+    depth: int = 0  # number of stages it is nested in
+
+
+@dataclass
+class ProfileReport:
+    """
+    Stages recorded while profiling is on, in the order they ended. The stages are
+    'load', 'geometry', 'rasterize', 'reduce', 'figure-build' and 'serialize'.
+    Stages can nest (e.g. the 'reduce' stage of an engine inside a plot function),
+    the peak of a stage includes the peaks of the stages nested in it.
+
+    Only the display_* functions show their figure and record 'serialize'. The
+    plot_* and get_fig_* functions return the figure, the caller can time showing
+    it with: with stage("serialize"): fig.show()
+    """
+
+    stages: list = field(default_factory=list)
+    log: bool = False
+
+    @property
+    def total_seconds(self):
+        return sum(stage.seconds for stage in self.stages if stage.depth == 0)
+
+    def to_dict(self):
+        return {
+            "total_seconds": self.total_seconds,
+            "stages": [
+                dict(
+                    name=stage.name,
+                    function=stage.function,
+                    seconds=stage.seconds,
+                    peak_mb=stage.peak_mb,
+                    depth=stage.depth,
+                    **stage.info,
+                )
+                for stage in self.stages
+            ],
+        }
+
+    def __str__(self):
+        lines = [f"{'function':<26} {'stage':<14} {'time':>9} {'peak':>10}  info"]
+        for stage in self.stages:
+            info = ", ".join(f"{key}={value}" for key, value in stage.info.items())
+            name = "  " * stage.depth + stage.name
+            lines.append(
+                f"{stage.function:<26} {name:<14} {stage.seconds:>8.3f}s "
+                + f"{stage.peak_mb:>8.1f}MB  {info}"
+            )
+        lines.append(f"{'total':<41} {self.total_seconds:>8.3f}s")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(log=False):
+    """
+    Record the stages of the visualisation functions called in the block.
+
+    Example:
+        with profile() as report:
+            display_variable(start_date, end_date, "S", path_root)
+        print(report)
+
+    Parameters:
+    log : bool
+        Also log each stage at INFO level to the 'visualisation_scripts' loggers.
+    """
+    report = ProfileReport(log=log)
+    token = _REPORT.set(report)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        yield report
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+        _REPORT.reset(token)
+
+
+@contextmanager
+def _recorded_stage(report, name, function, info):
+    record = StageRecord(name, function, info=dict(info), depth=_DEPTH.get())
+    # reset_peak also wipes the peak of an enclosing stage, which is kept aside and
+    # merged back when this stage ends
+    outer = _OUTER_PEAK.get()
+    start_memory, peak_before = tracemalloc.get_traced_memory()
+    if outer is not None:
+        outer[0] = max(outer[0], peak_before)
+    tracemalloc.reset_peak()
+    inner = [start_memory]
+    token = _OUTER_PEAK.set(inner)
+    depth_token = _DEPTH.set(record.depth + 1)
+    t0 = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, inner[0])
+        _OUTER_PEAK.reset(token)
+        _DEPTH.reset(depth_token)
+        if outer is not None:
+            outer[0] = max(outer[0], peak)
+        record.peak_mb = (peak - start_memory) / 1e6
+        report.stages.append(record)
+        if report.log:
+            logger.info(
+                "%s %s: %.3f s, %.1f MB %s",
+                function,
+                name,
+                record.seconds,
+                record.peak_mb,
+                record.info,
+            )
+
+
+class _NoStage:
+    """Stand-in yielded when profiling is off, adding information does nothing."""
+
+    @property
+    def info(self):
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name, **info):
+    """
+    Context manager timing a stage when profiling is on, a no-op otherwise.
+    Sizes known only inside the stage can be added with record.info[key] = value.
+    """
+    report = _REPORT.get()
+    if report is None:
+        return _NO_STAGE
+    return _recorded_stage(report, name, sys._getframe(1).f_code.co_name, info)
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_climatology import (
+    climatology_path,
+    get_climatology,
+    subtract_climatology,
+)
+from .visualisation_script_geometry import (
+    DISPLAY_SHAPE,
+    REL_PATH,
+    REL_PATH_BOUNDARIES_DWS,
+    render_rt_frames,
+    render_wet_frames,
+)
+
+### Global variables
+# Disk budget of the rendered frames of one data file, in MB
+RASTER_CACHE_BUDGET_ENV = "DWS_VIS_RASTER_CACHE_MB"
+RASTER_CACHE_BUDGET_MB = 4096
+INDEX_NAME = "index.json"
+
+
+class RasterCache:
+    """
+    Rendered 15-day frames of one data file, one .npy file per variable, layer,
+    resolution and time slot, in a folder next to the data (see sidecar_path).
+
+    The index records per frame the range of the model values it was rendered from
+    and when it was last used. When the frames take more than the disk budget, the
+    least recently used ones are deleted. Processes writing the index at the same
+    time can lose each other's access times, which only affects the eviction order.
+    """
+
+    def __init__(self, source: str | Path, budget_mb=None):
+        self.source = Path(source).resolve()
+        self.directory = sidecar_path(self.source, ".frames")
+        if budget_mb is None:
+            budget_mb = float(
+                os.environ.get(RASTER_CACHE_BUDGET_ENV, RASTER_CACHE_BUDGET_MB)
+            )
+        self.budget_bytes = int(budget_mb * 1e6)
+
+    @staticmethod
+    def key(variable, layer, slot_time, anomaly=False):
+        resolution = f"{DISPLAY_SHAPE[0]}x{DISPLAY_SHAPE[1]}"
+        suffix = ".anomaly" if anomaly else ""
+        slot = pd.Timestamp(slot_time).strftime("%Y%m%d%H")
+        return f"{variable}{suffix}.{layer}.{resolution}.{slot}"
+
+    def _path(self, key):
+        return self.directory / f"{key}.npy"
+
+    def read_index(self):
+        try:
+            with open(self.directory / INDEX_NAME) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def write_index(self, index):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / INDEX_NAME
+        path_tmp = tmp_path(path)
+        with open(path_tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(path_tmp, path)
+
+    def get(self, keys, depends=()):
+        """
+        Return the memory-mapped frames of keys (None for missing or outdated frames)
+        and the index, with the access time of the frames found updated. The frames
+        are outdated when older than the data or than any file in depends.
+        """
+        index = self.read_index()
+        frames = []
+        now = time.time()
+        for key in keys:
+            path = self._path(key)
+            if (
+                key in index
+                and is_fresh(path, self.source)
+                and all(is_fresh(path, source) for source in depends)
+            ):
+                frames.append(np.load(path, mmap_mode="r"))
+                index[key]["last_access"] = now
+            else:
+                frames.append(None)
+        return frames, index
+
+    def put(self, index, key, frame, value_range):
+        """Write a frame atomically and add it to the index (not yet written)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        path_tmp = tmp_path(path)
+        np.save(path_tmp, np.asarray(frame, dtype=np.float32))
+        os.replace(path_tmp, path)
+        index[key] = dict(
+            bytes=path.stat().st_size,
+            min=float(value_range[0]),
+            max=float(value_range[1]),
+            last_access=time.time(),
+        )
+
+    def evict(self, index, keep=()):
+        """
+        Delete the least recently used frames until the cache fits in the budget,
+        never the frames in keep. Frames on disk missing from the index go first.
+        """
+        on_disk = {
+            path.name[: -len(".npy")]: path.stat().st_size
+            for path in self.directory.glob("*.npy")
+            if not path.name.startswith(".")
+        }
+        total = sum(on_disk.values())
+        for key in list(index):
+            if key not in on_disk:
+                del index[key]
+
+        order = sorted(
+            on_disk, key=lambda key: index.get(key, {}).get("last_access", 0)
+        )
+        keep = set(keep)
+        for key in order:
+            if total <= self.budget_bytes:
+                break
+            if key in keep:
+                continue
+            self._path(key).unlink(missing_ok=True)
+            index.pop(key, None)
+            total -= on_disk[key]
+        return total
+
+    def clear(self):
+        """Delete all the frames and the index."""
+        for path in self.directory.glob("*.npy"):
+            path.unlink(missing_ok=True)
+        (self.directory / INDEX_NAME).unlink(missing_ok=True)
+
+
+def get_rendered_layers(
+    ds, layers, mask_ind, geometry, path_root: str | Path, anomaly=False
+):
+    """
+    Return the frames of several variables in the selected time slots, read from the
+    raster cache or rendered (and cached) when missing. The missing slots of all the
+    variables are read from the data in one pass. The frames are outdated when the
+    data, the boundary file the display geometry is built from or, for anomalies, the
+    climatology changed.
+
+    Parameters:
+    ds : xarray.Dataset
+        The opened 15-day aggregates.
+    layers : dict
+        The display layer of each variable of the 15-day aggregates: 'wet' for the
+        3x3 DWS cell stamps, 'rt' for the residence time grid, e.g. {'S_avg': 'wet'}.
+    mask_ind : np.ndarray
+        Boolean mask of the selected time slots.
+    geometry : DisplayGeometry
+        The mapping to the display grid.
+    anomaly : bool
+        Render the difference with the climatology of the slot of the year.
+
+    Returns:
+    dict: per variable (frames, value_range), a list of read-only, memory-mapped
+    (800, 1200) float32 frames, one per time slot, and the (min, max) of the model
+    values they were rendered from. The frames are not copied into one array,
+    callers stack or cut them as they need.
+    """
+    cache = RasterCache(Path(path_root) / REL_PATH)
+    slots = np.flatnonzero(mask_ind)
+    time_steps = pd.to_datetime(ds["time"].values[slots])
+    keys = {
+        variable: [RasterCache.key(variable, layer, t, anomaly) for t in time_steps]
+        for variable, layer in layers.items()
+    }
+    depends = [(Path(path_root) / REL_PATH_BOUNDARIES_DWS).resolve()]
+    if anomaly:
+        # the anomalies are outdated when the climatology is rebuilt
+        get_climatology(path_root)
+        depends.append(climatology_path(path_root))
+    # the index is read once for the frames of all the variables
+    all_keys = [key for variable in layers for key in keys[variable]]
+    found, index = cache.get(all_keys, depends)
+    frames, missing = {}, {}
+    for k, variable in enumerate(layers):
+        frames[variable] = found[k * len(slots) : (k + 1) * len(slots)]
+        rows = [i for i, frame in enumerate(frames[variable]) if frame is None]
+        if rows:
+            missing[variable] = rows
+
+    if missing:
+        # read only the missing slots, of all the variables at once
+        read = sorted(set().union(*missing.values()))
+        position = {i: j for j, i in enumerate(read)}
+        block = ds[list(missing)].isel(time=slots[read]).load()
+        for variable, rows in missing.items():
+            data = block[variable].values[[position[i] for i in rows]]
+            if anomaly:
+                data = subtract_climatology(data, variable, time_steps[rows], path_root)
+            render = render_rt_frames if layers[variable] == "rt" else render_wet_frames
+            rendered = render(data, geometry)
+            for j, i in enumerate(rows):
+                value_range = (np.nanmin(data[j]), np.nanmax(data[j]))
+                cache.put(index, keys[variable][i], rendered[j], value_range)
+            del data, rendered
+        del block
+        cache.evict(index, keep=all_keys)
+        # the rendered frames are dropped and read back like the cached ones
+        for variable, rows in missing.items():
+            for i in rows:
+                frames[variable][i] = np.load(
+                    cache._path(keys[variable][i]), mmap_mode="r"
+                )
+    cache.write_index(index)
+
+    result = {}
+    for variable in layers:
+        if not len(slots):
+            result[variable] = ([], (np.nan, np.nan))
+            continue
+        value_range = (
+            min(index[key]["min"] for key in keys[variable]),
+            max(index[key]["max"] for key in keys[variable]),
+        )
+        result[variable] = (frames[variable], value_range)
+    return result
+
+
+def get_rendered_frames(
+    ds, variable, mask_ind, geometry, path_root: str | Path, layer="wet", anomaly=False
+):
+    """
+    Return the frames of a variable in the selected time slots, see get_rendered_layers.
+
+    Parameters:
+    variable : str
+        The variable of the 15-day aggregates, e.g. 'S_avg'.
+    layer : str
+        'wet' for the 3x3 DWS cell stamps, 'rt' for the residence time grid.
+
+    Returns:
+    (frames, value_range): a list of read-only, memory-mapped (800, 1200) float32
+    frames, one per time slot, and the (min, max) of the model values they were
+    rendered from.
+    """
+    return get_rendered_layers(
+        ds, {variable: layer}, mask_ind, geometry, path_root, anomaly
+    )[variable]
+
+
+def clear_raster_cache(path_root: str | Path):
+    """Delete the rendered frames of the 15-day aggregates in path_root."""
+    RasterCache(Path(path_root) / REL_PATH).clear()
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import (
+    REL_PATH,
+    get_display_geometry,
+    land_layer,
+    render_frames,
+)
+from .visualisation_script_histograms import HISTOGRAM_BINS
+from .visualisation_script_profiling import stage
+from .visualisation_script_regions import VARIABLE_TITLES
+
+### Global variables
+REDUCTION_VARIABLES = ("S_avg", "T_avg", "exp_pct", "Rt_mean")
+REDUCTION_PERCENTILES = (10, 50, 90)
+CHUNK_SLOTS = 32  # number of 15-day slots read at once
+SKETCH_BINS = 4  # sketch bins per histogram bin of HISTOGRAM_BINS
+
+
+def sketch_edges(variable):
+    """Bin edges of the per-cell histogram sketch used for the percentiles."""
+    low, high, n_bins = HISTOGRAM_BINS[variable]
+    return np.linspace(low, high, n_bins * SKETCH_BINS + 1)
+
+
+def _moments(x, y, valid):
+    """
+    Count, means and centred sums of squares and cross-products of x and y per cell
+    (column), over the rows where valid, computed in two passes. x and y can be
+    float32 or broadcast views, only two float64 blocks are allocated.
+    """
+    n = valid.sum(axis=0)
+    dx = np.zeros(valid.shape)
+    dy = np.zeros(valid.shape)
+    np.copyto(dx, x, where=valid)
+    np.copyto(dy, y, where=valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.where(n > 0, dx.sum(axis=0) / n, 0.0)
+        mean_y = np.where(n > 0, dy.sum(axis=0) / n, 0.0)
+    # centre in place, the rows left out stay zero
+    dx -= mean_x
+    dy -= mean_y
+    dx *= valid
+    dy *= valid
+    return dict(
+        n=n,
+        mean_x=mean_x,
+        mean_y=mean_y,
+        m2_x=np.einsum("ij,ij->j", dx, dx),
+        m2_y=np.einsum("ij,ij->j", dy, dy),
+        c_xy=np.einsum("ij,ij->j", dx, dy),
+    )
+
+
+def _merge_moments(a, b):
+    """
+    Merge the moments of two sets of rows (Chan et al.), the centred sums are
+    shifted by the difference of the means instead of being recomputed.
+    """
+    n = a["n"] + b["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight_b = np.where(n > 0, b["n"] / n, 0.0)
+    dx = b["mean_x"] - a["mean_x"]
+    dy = b["mean_y"] - a["mean_y"]
+    shift = a["n"] * weight_b
+    return dict(
+        n=n,
+        mean_x=a["mean_x"] + dx * weight_b,
+        mean_y=a["mean_y"] + dy * weight_b,
+        m2_x=a["m2_x"] + b["m2_x"] + dx * dx * shift,
+        m2_y=a["m2_y"] + b["m2_y"] + dy * dy * shift,
+        c_xy=a["c_xy"] + b["c_xy"] + dx * dy * shift,
+    )
+
+
+def _reduce_chunk(path, t0, t1, names, wet_y, wet_x):
+    """
+    Moments of the time slots t0 to t1 per wet cell: for a variable, of the time in
+    years since the first slot of the file (x) and the values (y), with a histogram
+    sketch and the (n_cells, 2) counts of the values below and above its edges; for
+    'S_T', of salinity (x) and temperature (y) where both are defined. The blocks
+    are kept in the float32 of the file.
+    """
+    ds = xr.open_dataset(path, engine="netcdf4")
+    time = ds["time"].values
+    years = (time[t0:t1] - time[0]) / np.timedelta64(1, "D") / 365.25
+
+    blocks = {}
+    for variable in {"S_avg", "T_avg"} if "S_T" in names else ():
+        blocks[variable] = ds[variable][t0:t1].values[:, wet_y, wet_x]
+
+    partial = {}
+    for name in names:
+        if name == "S_T":
+            s, t = blocks["S_avg"], blocks["T_avg"]
+            partial[name] = _moments(s, t, ~(np.isnan(s) | np.isnan(t)))
+            continue
+
+        if name in blocks:
+            block = blocks[name]
+        else:
+            block = ds[name][t0:t1].values[:, wet_y, wet_x]
+        valid = ~np.isnan(block)
+        partial[name] = _moments(years[:, None], block, valid)
+
+        # histogram sketch per cell with a bincount over the flattened (cell, bin),
+        # the values outside the edges are counted apart (see build_histograms)
+        edges = sketch_edges(name)
+        n_bins = len(edges) - 1
+        below = valid & (block < edges[0])
+        above = valid & (block > edges[-1])
+        inside = valid & ~below & ~above
+        bins = np.floor(
+            (block - edges[0]) / (edges[1] - edges[0]),
+            where=inside,
+            out=np.zeros(block.shape),
+        )
+        bins = np.clip(bins, 0, n_bins - 1).astype(np.int64)
+        flat = (bins + np.arange(block.shape[1]) * n_bins)[inside]
+        partial[name]["sketch"] = np.bincount(
+            flat, minlength=block.shape[1] * n_bins
+        ).reshape(block.shape[1], n_bins)
+        partial[name]["outside"] = np.stack(
+            [below.sum(axis=0), above.sum(axis=0)], axis=1
+        )
+
+    ds.close()
+
+    return partial
+
+
+def sketch_percentiles(sketch, outside, edges, percentiles):
+    """
+    Percentiles per cell from histogram sketches of shape (n_cells, bins), linearly
+    interpolated within the bin holding the percentile. outside holds the (n_cells, 2)
+    counts of the values below and above the edges, a percentile falling among them
+    is nan since the sketch does not know where they lie.
+    """
+    cum = np.cumsum(sketch, axis=1, dtype=float)
+    below, above = outside[:, 0], outside[:, 1]
+    total = below + cum[:, -1] + above
+    width = edges[1] - edges[0]
+
+    result = np.full((len(percentiles), sketch.shape[0]), np.nan)
+    rows = np.arange(sketch.shape[0])
+    for i, percentile in enumerate(percentiles):
+        # position of the percentile among the values inside the edges
+        target = total * percentile / 100 - below
+        pos = np.minimum((cum < target[:, None]).sum(axis=1), sketch.shape[1] - 1)
+        before = np.where(pos > 0, cum[rows, np.maximum(pos - 1, 0)], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.clip((target - before) / (cum[rows, pos] - before), 0.0, 1.0)
+        underflow = (below > 0) & (target <= 0)
+        overflow = (above > 0) & (target > cum[:, -1])
+        result[i] = np.where(
+            (total > 0) & ~underflow & ~overflow, edges[pos] + fraction * width, np.nan
+        )
+    return result
+
+
+def _merge(reductions, partial):
+    merged = {}
+    for name, moments in partial.items():
+        merged[name] = _merge_moments(reductions[name], moments)
+        if "sketch" in moments:
+            # the counts are summed in place, the sketches are the largest arrays
+            for key in ("sketch", "outside"):
+                reductions[name][key] += moments[key]
+                merged[name][key] = reductions[name][key]
+    return merged
+
+
+def reduction_names(variables):
+    """Names of the reductions of the variables, with 'S_T' for their correlation."""
+    names = list(variables)
+    if "S_avg" in variables and "T_avg" in variables:
+        names.append("S_T")
+    return tuple(names)
+
+
+def build_reductions(
+    path_root: str | Path, names, chunk_slots=CHUNK_SLOTS, processes=None
+):
+    """
+    Per-cell moments of the reductions names, accumulated in one pass over
+    15day_aggregates.rt.nc read in chunks of time slots, see _reduce_chunk.
+
+    Parameters:
+    names : tuple of str
+        Variables of the 15-day aggregates and 'S_T', see reduction_names.
+    chunk_slots : int
+        The number of time slots read at once, bounds the memory use.
+    processes : int
+        Number of worker processes reducing the chunks, by default the chunks are
+        reduced in this process.
+    """
+    path = (Path(path_root) / REL_PATH).resolve()
+    geometry = get_display_geometry(path_root)
+    ds = xr.open_dataset(path, engine="netcdf4")
+    n_time = ds.sizes["time"]
+    ds.close()
+
+    chunks = [
+        (t0, min(t0 + chunk_slots, n_time)) for t0 in range(0, n_time, chunk_slots)
+    ]
+    args = [
+        (path, t0, t1, tuple(names), geometry.wet_y, geometry.wet_x)
+        for t0, t1 in chunks
+    ]
+
+    reductions = None
+    if processes:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            partials = executor.map(_reduce_chunk, *zip(*args))
+            for partial in partials:
+                reductions = (
+                    partial if reductions is None else _merge(reductions, partial)
+                )
+    else:
+        for arg in args:
+            partial = _reduce_chunk(*arg)
+            reductions = partial if reductions is None else _merge(reductions, partial)
+    return reductions
+
+
+@lru_cache(maxsize=8)
+def _read_reduction(path_cache: Path, mtime: float):
+    with np.load(path_cache) as npz:
+        return {key: npz[key] for key in npz.files}
+
+
+def get_reductions(
+    path_root: str | Path, names, chunk_slots=CHUNK_SLOTS, processes=None
+):
+    """
+    Return the (cached) per-cell moments of the reductions names, see
+    build_reductions. Only the reductions missing from the cache are computed, in
+    one pass over the data.
+    """
+    path = (Path(path_root) / REL_PATH).resolve()
+    reductions, missing = {}, []
+    for name in names:
+        path_cache = sidecar_path(path, f".reduction.{name}.npz")
+        if is_fresh(path_cache, path):
+            reduction = _read_reduction(path_cache, path_cache.stat().st_mtime)
+            if name == "S_T" or (
+                "outside" in reduction
+                and np.array_equal(reduction["sketch_edges"], sketch_edges(name))
+            ):
+                reductions[name] = reduction
+                continue
+        # no cache, the data changed, the sketch bins changed since it was written or
+        # it has no counts of the values outside them
+        missing.append(name)
+
+    if missing:
+        built = build_reductions(path_root, tuple(missing), chunk_slots, processes)
+        for name in missing:
+            if name != "S_T":
+                built[name]["sketch_edges"] = sketch_edges(name)
+            path_cache = sidecar_path(path, f".reduction.{name}.npz")
+            path_tmp = tmp_path(path_cache)
+            np.savez(path_tmp, **built[name])
+            os.replace(path_tmp, path_cache)
+            reductions[name] = built[name]
+    return reductions
+
+
+def statistic_names(variables=REDUCTION_VARIABLES, percentiles=REDUCTION_PERCENTILES):
+    """Names of the columns of reduce_cells."""
+    names = []
+    for variable in variables:
+        names += [f"{variable}_mean", f"{variable}_sd", f"{variable}_trend"]
+        names += [f"{variable}_p{percentile:g}" for percentile in percentiles]
+    if "S_T" in reduction_names(variables):
+        names.append("S_T_correlation")
+    return names
+
+
+def reduce_cells(
+    path_root: str | Path,
+    variables=REDUCTION_VARIABLES,
+    percentiles=REDUCTION_PERCENTILES,
+    chunk_slots=CHUNK_SLOTS,
+    processes=None,
+):
+    """
+    Per-cell statistics over the whole record, from moments accumulated in one pass
+    over 15day_aggregates.rt.nc read in chunks of time slots and cached per variable.
+    The chunks are reduced around their own means and merged pairwise, so the
+    variances, trends and correlations do not lose precision to cancellation.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    variables : tuple of str
+        The variables of the 15-day aggregates.
+    percentiles : sequence of float
+        Percentiles computed from per-cell histogram sketches (with bins of
+        HISTOGRAM_BINS / SKETCH_BINS), interpolated within the sketch bins, nan
+        where they fall outside the range of HISTOGRAM_BINS.
+    chunk_slots : int
+        The number of time slots read at once, bounds the memory use.
+    processes : int
+        Number of worker processes reducing the chunks, by default the chunks are
+        reduced in this process.
+
+    Returns:
+    pandas.DataFrame with a row per wet cell of the display geometry and columns
+    '{variable}_mean', '{variable}_sd', '{variable}_trend' (per year) and
+    '{variable}_p{percentile}', plus 'S_T_correlation' when both S_avg and T_avg
+    are reduced.
+    """
+    with stage("reduce") as record:
+        reductions = get_reductions(
+            path_root, reduction_names(variables), chunk_slots, processes
+        )
+        record.info["cells"] = len(reductions[variables[0]]["n"])
+
+    statistics = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for variable in variables:
+            moments = reductions[variable]
+            n = moments["n"].astype(float)
+            statistics[f"{variable}_mean"] = np.where(n > 0, moments["mean_y"], np.nan)
+            statistics[f"{variable}_sd"] = np.sqrt(moments["m2_y"] / n)
+            statistics[f"{variable}_trend"] = moments["c_xy"] / moments["m2_x"]
+            values = sketch_percentiles(
+                moments["sketch"],
+                moments["outside"],
+                sketch_edges(variable),
+                percentiles,
+            )
+            for percentile, value in zip(percentiles, values):
+                statistics[f"{variable}_p{percentile:g}"] = value
+
+        if "S_T" in reductions:
+            moments = reductions["S_T"]
+            statistics["S_T_correlation"] = moments["c_xy"] / np.sqrt(
+                moments["m2_x"] * moments["m2_y"]
+            )
+
+    return pd.DataFrame(statistics)
+
+
+def get_fig_cell_map(values, path_root: str | Path, title, colorbar_title, rt=False):
+    """
+    Draw one value per wet cell with the styling of the 15-day maps (boundary of the
+    DWS and land mask).
+
+    Parameters:
+    values : np.ndarray
+        Array of shape (n_wet,) in the order of the wet cells of the display geometry.
+    rt : bool
+        Draw with the stamps of the residence time maps.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    with stage("geometry"):
+        geometry = get_display_geometry(path_root)
+
+    with stage("rasterize"):
+        values = np.asarray(values, dtype=float)
+        if rt:
+            grid = np.full(geometry.grid_shape[0] * geometry.grid_shape[1], np.nan)
+            grid[geometry.wet_y * geometry.grid_shape[1] + geometry.wet_x] = values
+            data_ = render_frames(grid[None], geometry.rt_index_map)[0]
+            bdr_dws0p = np.flip(geometry.boundary, axis=0)
+        else:
+            data_ = render_frames(values[None], geometry.index_map)[0]
+            bdr_dws0p = geometry.boundary
+        data_h = land_layer(geometry, data_)
+
+    with stage("figure-build"):
+        fig = px.imshow(
+            data_,
+            x=np.arange(0, 1200),
+            y=np.arange(0, 800),
+            origin="lower",
+            title=title,
+            width=800,
+            height=500,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
+            )
+        )
+        fig.add_trace(
+            go.Heatmap(
+                z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+            )
+        )
+
+        if np.nanmin(values) < 0:
+            limit = float(np.nanmax(np.abs(values)))
+            coloraxis = dict(cmin=-limit, cmax=limit, colorscale="RdBu_r")
+        else:
+            coloraxis = dict(cmin=0, cmax=float(np.nanmax(values)))
+        fig.update_layout(
+            coloraxis=dict(coloraxis, colorbar=dict(title=colorbar_title))
+        )
+
+        fig.update_layout(
+            xaxis=dict(
+                title="Easting (km)",
+                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80, 100, 120],
+            ),
+            yaxis=dict(
+                title="Northing (km)",
+                tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80],
+            ),
+        )
+
+    return fig
+
+
+def plot_cell_statistic(path_root: str | Path, statistic="S_avg_trend", processes=None):
+    """
+    Map a per-cell statistic of reduce_cells over the whole record, e.g.
+    'S_avg_trend', 'T_avg_p90' or 'S_T_correlation'.
+    """
+    names = statistic_names()
+    if statistic not in names:
+        raise ValueError(f"Unknown statistic {statistic!r}, choose among {names}")
+
+    if statistic == "S_T_correlation":
+        variables, colorbar_title, rt = ("S_avg", "T_avg"), "Correlation", False
+    else:
+        variable = next(v for v in REDUCTION_VARIABLES if statistic.startswith(v))
+        variables, rt = (variable,), variable == "Rt_mean"
+        colorbar_title = VARIABLE_TITLES[variable]
+        if statistic.endswith("_trend"):
+            colorbar_title += " per year"
+
+    statistics = reduce_cells(path_root, variables, processes=processes)
+    return get_fig_cell_map(
+        statistics[statistic].values,
+        path_root,
+        f"{statistic} over the whole record",
+        colorbar_title,
+        rt=rt,
+    )
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_geometry import REL_PATH_BOUNDARIES_DWS
+from .visualisation_script_probe import get_probe_cache
+from .visualisation_script_profiling import stage
+
+### Global variables
+REGION_VARIABLES = ("S_avg", "T_avg", "exp_pct", "Rt_mean")
+REGION_PERCENTILES = (10, 50, 90)
+VARIABLE_TITLES = {
+    "S_avg": "Salinity (g kg<sup>-1</sup>)",
+    "S_sd": "Salinity standard deviation (g kg<sup>-1</sup>)",
+    "T_avg": "Temperature (°C)",
+    "exp_pct": "Exposure (%)",
+    "Rt_mean": "Residence time (days)",
+}
+
+
+def cell_area(dws_b, wet_y, wet_x):
+    """Area of the cells from the boundary file or from the spacing of xc and yc."""
+    if "area" in dws_b:
+        area = dws_b["area"].values[wet_y, wet_x]
+    else:
+        dx = np.abs(np.gradient(dws_b.xc.values))
+        dy = np.abs(np.gradient(dws_b.yc.values))
+        area = dy[wet_y] * dx[wet_x]
+    return np.asarray(area, dtype=float)
+
+
+@lru_cache(maxsize=4)
+def _get_wet_cells_rd(path_boundaries: Path, mtime: float):
+    from pyproj import Transformer
+
+    dws_b = xr.open_dataset(path_boundaries)
+    wet_y, wet_x = np.where(dws_b.mask_dws.values)
+
+    # from epgs:4326(LatLon with WGS84) to epgs:28992(RD New)
+    inproj = Transformer.from_crs("epsg:4326", "epsg:28992", always_xy=True)
+    x_rd, y_rd = inproj.transform(
+        dws_b.lonc.values[wet_y, wet_x], dws_b.latc.values[wet_y, wet_x]
+    )
+
+    area = cell_area(dws_b, wet_y, wet_x)
+    dws_b.close()
+
+    return np.asarray(x_rd), np.asarray(y_rd), area
+
+
+def get_wet_cells_rd(path_root: str | Path):
+    """
+    Return the RD New (epsg:28992) coordinates and the area of the DWS cells, in the
+    order of the wet cells of the display geometry.
+    """
+    path = (Path(path_root) / REL_PATH_BOUNDARIES_DWS).resolve()
+    return _get_wet_cells_rd(path, path.stat().st_mtime)
+
+
+def points_in_polygon(x, y, polygon):
+    """
+    Even-odd test of the points (x, y) against a polygon given as a sequence of
+    (x, y) vertices, vectorized over the points.
+    """
+    polygon = np.asarray(polygon, dtype=float)
+    inside = np.zeros(np.shape(x), dtype=bool)
+    x0, y0 = polygon[-1]
+    for x1, y1 in polygon:
+        crosses = (y0 > y) != (y1 > y)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (x < x_cross)
+        x0, y0 = x1, y1
+    return inside
+
+
+@lru_cache(maxsize=32)
+def _get_region_cells(path_boundaries: Path, mtime: float, polygon: tuple):
+    x_rd, y_rd, _ = _get_wet_cells_rd(path_boundaries, mtime)
+    cells = np.flatnonzero(points_in_polygon(x_rd, y_rd, polygon))
+    cells.flags.writeable = False
+    return cells
+
+
+def get_region_cells(path_root: str | Path, polygon):
+    """
+    Rasterize a polygon against the model grid.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    polygon : sequence of (x, y)
+        The vertices of the region in RD New (epsg:28992) metres.
+
+    Returns:
+    Sorted positions of the DWS cells (in the wet cells of the display geometry)
+    whose centre lies in the polygon, cached per polygon.
+    """
+    path = (Path(path_root) / REL_PATH_BOUNDARIES_DWS).resolve()
+    polygon = tuple((float(x), float(y)) for x, y in polygon)
+    return _get_region_cells(path, path.stat().st_mtime, polygon)
+
+
+def weighted_percentiles(values, weights, percentiles):
+    """
+    Weighted percentiles along the first axis, nan values are left out.
+
+    Parameters:
+    values : np.ndarray
+        Array of shape (n_cells, time).
+    weights : np.ndarray
+        Array of shape (n_cells,).
+    percentiles : sequence of float
+        Percentiles between 0 and 100.
+
+    Returns:
+    Array of shape (len(percentiles), time).
+    """
+    order = np.argsort(values, axis=0)  # nan values are sorted last
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    sorted_weights = np.where(np.isnan(sorted_values), 0.0, weights[order])
+    cum_weights = np.cumsum(sorted_weights, axis=0)
+    total = cum_weights[-1]
+    last_valid = np.maximum(np.sum(~np.isnan(values), axis=0) - 1, 0)
+
+    result = np.full((len(percentiles), values.shape[1]), np.nan)
+    for i, percentile in enumerate(percentiles):
+        # first value whose cumulative weight reaches the percentile
+        pos = np.sum(cum_weights < total * percentile / 100, axis=0)
+        # rounding can put the target above the total, keep the last valid value
+        pos = np.minimum(pos, last_valid)
+        result[i] = np.take_along_axis(sorted_values, pos[None], axis=0)[0]
+    result[:, total == 0] = np.nan
+    return result
+
+
+def region_statistics(
+    path_root: str | Path,
+    regions: dict,
+    variables=REGION_VARIABLES,
+    percentiles=REGION_PERCENTILES,
+):
+    """
+    Area-weighted mean and percentiles of the 15-day aggregates over regions of the
+    DWS, for all time slots at once.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    regions : dict
+        Polygon (sequence of (x, y) in RD New metres) per region name.
+    variables : tuple of str
+        The variables of the 15-day aggregates.
+    percentiles : sequence of float
+        The area-weighted percentiles to compute.
+
+    Returns:
+    pandas.DataFrame indexed by time with (region, variable, statistic) columns,
+    e.g. ('Marsdiep', 'S_avg', 'mean') or ('Marsdiep', 'S_avg', 'p50'). Export it
+    with DataFrame.to_csv.
+    """
+    with stage("load") as record:
+        time, caches = get_probe_cache(path_root, variables)
+        _, _, area = get_wet_cells_rd(path_root)
+        record.info["slots"] = len(time)
+
+    with stage("reduce") as record:
+        columns = {}
+        for region, polygon in regions.items():
+            cells = get_region_cells(path_root, polygon)
+            weights = area[cells]
+            for variable in variables:
+                # (n_cells, time) block of the region, contiguous per cell
+                block = np.asarray(caches[variable][cells], dtype=float)
+                valid = ~np.isnan(block)
+                weight_sum = weights @ valid
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    mean = weights @ np.where(valid, block, 0.0) / weight_sum
+                columns[(region, variable, "mean")] = mean
+                if len(cells):
+                    stats = weighted_percentiles(block, weights, percentiles)
+                else:
+                    stats = np.full((len(percentiles), len(time)), np.nan)
+                for percentile, values in zip(percentiles, stats):
+                    columns[(region, variable, f"p{percentile:g}")] = values
+                columns[(region, variable, "area")] = weight_sum
+
+        statistics = pd.DataFrame(columns, index=time)
+        statistics.columns.names = ["region", "variable", "statistic"]
+        record.info["regions"] = len(regions)
+
+    return statistics
+
+
+def plot_region_statistics(
+    path_root: str | Path, regions: dict, variable="S_avg", percentiles=(10, 90)
+):
+    """
+    Plot the area-weighted mean of a variable per region with a band between two
+    percentiles.
+    """
+    import plotly.graph_objects as go
+
+    from .visualisation_script_series import series_colour
+
+    statistics = region_statistics(
+        path_root, regions, variables=(variable,), percentiles=percentiles
+    )
+    low, high = (f"p{percentile:g}" for percentile in percentiles)
+
+    with stage("figure-build"):
+        fig = go.Figure()
+        for i, region in enumerate(regions):
+            colour = series_colour(i)
+            stats = statistics[region][variable]
+            fig.add_trace(
+                go.Scatter(
+                    x=stats.index,
+                    y=stats[high],
+                    mode="lines",
+                    line=dict(width=0, color=colour),
+                    legendgroup=region,
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=stats.index,
+                    y=stats[low],
+                    mode="lines",
+                    line=dict(width=0, color=colour),
+                    fill="tonexty",
+                    opacity=0.3,
+                    legendgroup=region,
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    name=region,
+                    x=stats.index,
+                    y=stats["mean"],
+                    mode="lines+markers",
+                    line=dict(color=colour),
+                    legendgroup=region,
+                    hovertemplate=region + "<br>Date = %{x}<br>%{y}<extra></extra>",
+                )
+            )
+
+        fig.update_layout(
+            title=f"Area-weighted mean over the regions with the {low}-{high} band",
+            yaxis=dict(title=dict(text=VARIABLE_TITLES.get(variable, variable))),
+            xaxis=dict(title=dict(text="Date")),
+            hovermode="x",
+            legend_title_text="Region",
+        )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
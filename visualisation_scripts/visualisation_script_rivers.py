@@ -3,13 +3,15 @@
 
 from pathlib import Path
 
-import numpy as np
 import plotly.graph_objects as go
-import xarray as xr
-from plotly.express.colors import qualitative
 from plotly_resampler import FigureResampler
 
-COLOUR_PALET = qualitative.Dark24
+from .visualisation_script_profiling import stage
+from .visualisation_script_rolling import add_rolling_overlays, get_rolling_stats
+from .visualisation_script_rollups import RollupAggregator, get_rollups
+from .visualisation_script_series import read_series_block, series_colour
+from .visualisation_script_tidal_filter import add_residual_traces, get_residual
+
 REL_PATH_RIVERS = Path("output_files/rivers_volume_flux.nc")
 
 
@@ -27,51 +29,80 @@ def xaxes_buttons():
     )
 
 
-def plot_rivers_volume_flux(path_root: str | Path):
-    # Open the netCDF file
-    ds_flux = xr.open_dataset(path_root / REL_PATH_RIVERS)
-
-    nps_flux = [ds_flux.sel(station=i)["volume_flux"].values for i in np.arange(12)]
-    np_time = ds_flux["time"].values
-    np_station_names = ds_flux["station_name"].values
-
-    fig = FigureResampler(go.Figure())
-
-    # Create Figure data
-    for i, np_flux in enumerate(nps_flux):
-
-        fig_data_dict = {
-            "name": np_station_names[i],
-            "legendgroup": i,
-            "line": {"color": COLOUR_PALET[i], "dash": "solid"},
-            "marker": {"symbol": "circle"},
-            "mode": "lines",
-            "showlegend": True,
-            "hovertemplate": np_station_names[i]
-            + "<br>Date = %{x}<br>Volume flux = %{y} m3 s-1<extra></extra>",
-            "visible": "legendonly",
-        }
-
-        if (np_station_names[i] == "Denoever") | (
-            np_station_names[i] == "Kornwerderzand"
-        ):
-            fig_data_dict.update(visible=True)
-
-        fig.add_trace(go.Scattergl(fig_data_dict), hf_x=np_time, hf_y=np_flux)
-
-    # Create Figure layout
-    layout = dict(
-        title="Volume flux into the Dutch wadden sea from selected inlets",
-        yaxis=dict(title=dict(text="Volume flux (m<sup>3</sup> s<sup>-1</sup>)")),
-        xaxis=dict(
-            title=dict(text="Date"),
-            rangeselector=xaxes_buttons(),
-        ),
-        hovermode="closest",
-        legend={"title": {"text": "Inlet"}, "tracegroupgap": 0},
-        margin={"t": 60},
-    )
-    fig.update_layout(layout, overwrite=True)
+def plot_rivers_volume_flux(
+    path_root: str | Path, rolling_windows=None, tidal_filter=None
+):
+    # Read the series of all the stations in the file
+    with stage("load"):
+        np_time, nps_flux, np_station_names = read_series_block(
+            path_root / REL_PATH_RIVERS, "volume_flux", "station_name"
+        )
+        rollups = get_rollups(
+            path_root / REL_PATH_RIVERS, "volume_flux", np_time, nps_flux
+        )
+
+    with stage("figure-build"):
+        fig = FigureResampler(go.Figure())
+        raw_traces = []
+        raw_visible = []
+
+        # Create Figure data
+        for i, np_flux in enumerate(nps_flux):
+
+            fig_data_dict = {
+                "name": np_station_names[i],
+                "legendgroup": i,
+                "line": {"color": series_colour(i), "dash": "solid"},
+                "marker": {"symbol": "circle"},
+                "mode": "lines",
+                "showlegend": True,
+                "hovertemplate": np_station_names[i]
+                + "<br>Date = %{x}<br>Volume flux = %{y} m3 s-1<extra></extra>",
+                "visible": "legendonly",
+            }
+
+            if (np_station_names[i] == "Denoever") | (
+                np_station_names[i] == "Kornwerderzand"
+            ):
+                fig_data_dict.update(visible=True)
+
+            raw_traces.append(len(fig.data))
+            raw_visible.append(fig_data_dict["visible"])
+            fig.add_trace(
+                go.Scattergl(fig_data_dict),
+                hf_x=np_time,
+                hf_y=np_flux,
+                downsampler=RollupAggregator(rollups, series=i),
+            )
+            if rolling_windows:
+                stats = get_rolling_stats(
+                    path_root / REL_PATH_RIVERS, f"volume_flux_{i}", np_flux
+                )
+                add_rolling_overlays(
+                    fig, stats, np_time, rolling_windows, np_station_names[i], i + 1
+                )
+
+        if tidal_filter:
+            np_residual = get_residual(
+                path_root / REL_PATH_RIVERS, "volume_flux", nps_flux, tidal_filter
+            )
+            add_residual_traces(
+                fig, np_time, np_residual, np_station_names, raw_traces, raw_visible
+            )
+
+        # Create Figure layout
+        layout = dict(
+            title="Volume flux into the Dutch wadden sea from selected inlets",
+            yaxis=dict(title=dict(text="Volume flux (m<sup>3</sup> s<sup>-1</sup>)")),
+            xaxis=dict(
+                title=dict(text="Date"),
+                rangeselector=xaxes_buttons(),
+            ),
+            hovermode="closest",
+            legend={"title": {"text": "Inlet"}, "tracegroupgap": 0},
+            margin={"t": 60},
+        )
+        fig.update_layout(layout, overwrite=True)
 
     return fig
 
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly_resampler.aggregation import NoGapHandler
+
+from .visualisation_script_series import BinAggregator, series_colour
+
+### Global variables
+# Window lengths in hourly time steps
+ROLLING_WINDOWS = {
+    "tidal cycle": 12,  # M2, 12.42 h
+    "spring-neap": 354,  # 14.77 days
+    "15 days": 360,
+    "30 days": 720,
+}
+ROLLING_CACHE_SIZE = 32  # number of series whose prefix sums are kept
+
+
+class RollingStats:
+    """
+    Running mean and standard deviation of an hourly series for any window length.
+
+    Prefix sums of the values, their squares and the number of valid (non-nan) values
+    are computed once, after which the sum over any window is a difference of two
+    prefix values: O(n) for a whole series and O(1) per point.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        # shift by the mean to keep the sums of squares accurate
+        self.offset = np.nanmean(values) if valid.any() else 0.0
+        shifted = np.where(valid, values - self.offset, 0.0)
+
+        self.n = len(values)
+        self.cum_count = np.concatenate([[0], np.cumsum(valid)])
+        self.cum_sum = np.concatenate([[0.0], np.cumsum(shifted)])
+        self.cum_sq = np.concatenate([[0.0], np.cumsum(shifted**2)])
+
+    def _bounds(self, window, center):
+        idx = np.arange(self.n)
+        if center:
+            i0 = idx - window // 2
+        else:
+            i0 = idx - window + 1
+        i1 = i0 + window
+        return np.clip(i0, 0, self.n), np.clip(i1, 0, self.n)
+
+    def window_stats(self, i0, i1, min_count=1):
+        """Mean and standard deviation of the values in [i0, i1) (arrays or ints)."""
+        count = self.cum_count[i1] - self.cum_count[i0]
+        total = self.cum_sum[i1] - self.cum_sum[i0]
+        total_sq = self.cum_sq[i1] - self.cum_sq[i0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            var = np.maximum(total_sq / count - mean**2, 0.0)
+        enough = count >= min_count
+        return (
+            np.where(enough, mean + self.offset, np.nan),
+            np.where(enough, np.sqrt(var), np.nan),
+        )
+
+    def rolling(self, window: int, center=True, min_count=None):
+        """
+        Running mean and standard deviation over window time steps.
+
+        Parameters:
+        window : int
+            The number of time steps in the window.
+        center : bool
+            Centre the window on each time step, otherwise the window ends at it.
+        min_count : int
+            Minimum number of valid values in a window, by default half the window.
+        """
+        if min_count is None:
+            min_count = max(window // 2, 1)
+        i0, i1 = self._bounds(window, center)
+        return self.window_stats(i0, i1, min_count)
+
+
+@lru_cache(maxsize=ROLLING_CACHE_SIZE)
+def _rolling_stats_entry(path: Path, name: str, mtime: float):
+    # the values are not hashable, the entry is filled by get_rolling_stats
+    return {}
+
+
+def get_rolling_stats(path: str | Path, name: str, values):
+    """
+    Return the (cached) RollingStats of the series name read from the file path.
+    The cache is dropped when the file changes and keeps the ROLLING_CACHE_SIZE most
+    recently used series.
+    """
+    path = Path(path).resolve()
+    entry = _rolling_stats_entry(path, name, path.stat().st_mtime)
+    if "stats" not in entry:
+        entry["stats"] = RollingStats(values)
+    return entry["stats"]
+
+
+def add_rolling_overlays(
+    fig, stats: RollingStats, np_time, windows, name="", colour_offset=0
+):
+    """
+    Add the running mean and a band of one standard deviation for each window to a
+    FigureResampler. The overlays are hidden until they are selected in the legend.
+
+    Parameters:
+    fig : FigureResampler
+        The figure to add the overlays to.
+    stats : RollingStats
+        The rolling statistics of the series.
+    np_time : np.ndarray
+        The time axis of the series.
+    windows : iterable
+        Names of ROLLING_WINDOWS or numbers of hourly time steps.
+    name : str
+        Prefix of the legend entries, e.g. the station name.
+    """
+    for i, window in enumerate(windows):
+        if isinstance(window, str):
+            label, n_steps = window, ROLLING_WINDOWS[window]
+        else:
+            label, n_steps = f"{window} h", int(window)
+        label = f"{name} {label} running mean".strip()
+        mean, std = stats.rolling(n_steps)
+        colour = series_colour(colour_offset + i)
+        group = f"rolling {label}"
+
+        fig.add_trace(
+            go.Scattergl(
+                name=label,
+                legendgroup=group,
+                mode="lines",
+                line=dict(color=colour, width=2),
+                visible="legendonly",
+            ),
+            hf_x=np_time,
+            hf_y=mean,
+            downsampler=BinAggregator("mean"),
+            gap_handler=NoGapHandler(),
+        )
+        fig.add_trace(
+            go.Scattergl(
+                name=f"{label} + std",
+                legendgroup=group,
+                mode="lines",
+                line=dict(width=0, color=colour),
+                showlegend=False,
+                visible="legendonly",
+            ),
+            hf_x=np_time,
+            hf_y=mean + std,
+            downsampler=BinAggregator("max"),
+            gap_handler=NoGapHandler(),
+        )
+        fig.add_trace(
+            go.Scattergl(
+                name=f"{label} - std",
+                legendgroup=group,
+                mode="lines",
+                line=dict(width=0, color=colour),
+                fill="tonexty",
+                opacity=0.2,
+                showlegend=False,
+                visible="legendonly",
+            ),
+            hf_x=np_time,
+            hf_y=mean - std,
+            downsampler=BinAggregator("min"),
+            gap_handler=NoGapHandler(),
+        )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from pathlib import Path
+
+import numpy as np
+from plotly_resampler.aggregation.aggregation_interface import DataAggregator
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_series import BinAggregator
+
+### Global variables
+# numpy datetime units of the rollup levels, from fine to coarse
+ROLLUP_LEVELS = {
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "yearly": "Y",
+}
+ROLLUP_STATS = ("mean", "min", "max")
+# numpy weeks start on Thursday (1970-01-01), the weekly periods start on Monday
+WEEK_START = np.datetime64("1970-01-05", "D")
+CHUNK_SIZE = 24 * 366  # number of hourly steps reduced at once
+
+
+def period_start(np_time, unit):
+    """Start of the period of each time step, weeks starting on Monday."""
+    if unit != "W":
+        return np_time.astype(f"datetime64[{unit}]")
+    offset = WEEK_START - np.datetime64("1970-01-01", "D")
+    return (np_time - offset).astype("datetime64[W]").astype("datetime64[D]") + offset
+
+
+def build_rollups(np_time, np_values, chunk_size=CHUNK_SIZE):
+    """
+    Reduce hourly series to daily, weekly, monthly and yearly mean/min/max in one
+    streaming pass over the time axis. Weeks run from Monday to Sunday.
+
+    Parameters:
+    np_time : np.ndarray
+        The datetime64 time axis.
+    np_values : np.ndarray
+        Array of shape (n_time,) or (n_series, n_time), e.g. the memory-mapped block of
+        read_series_block. Only chunk_size steps are loaded at once.
+
+    Returns:
+    dict with, per level, '{level}_time' (start of each period) and '{level}_mean',
+    '{level}_min', '{level}_max', '{level}_count' of shape (..., n_periods).
+    """
+    np_time = np.asarray(np_time).astype("datetime64[ns]")
+    lead_shape = np_values.shape[:-1]
+    n_time = np_values.shape[-1]
+
+    rollups = {}
+    keys = {}
+    for level, unit in ROLLUP_LEVELS.items():
+        key = period_start(np_time, unit)
+        periods = np.unique(key)
+        keys[level] = np.searchsorted(periods, key)
+        n_periods = len(periods)
+        rollups[f"{level}_time"] = periods.astype("datetime64[ns]")
+        rollups[f"{level}_sum"] = np.zeros(lead_shape + (n_periods,))
+        rollups[f"{level}_count"] = np.zeros(lead_shape + (n_periods,), dtype=np.int64)
+        rollups[f"{level}_min"] = np.full(lead_shape + (n_periods,), np.nan)
+        rollups[f"{level}_max"] = np.full(lead_shape + (n_periods,), np.nan)
+
+    for t0 in range(0, n_time, chunk_size):
+        t1 = min(t0 + chunk_size, n_time)
+        chunk = np.asarray(np_values[..., t0:t1], dtype=float)
+        valid = ~np.isnan(chunk)
+        chunk_zero = np.where(valid, chunk, 0.0)
+
+        for level in ROLLUP_LEVELS:
+            idx = keys[level][t0:t1]
+            # periods are consecutive runs of the sorted time axis
+            starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+            ids = idx[starts]
+            rollups[f"{level}_sum"][..., ids] += np.add.reduceat(
+                chunk_zero, starts, axis=-1
+            )
+            rollups[f"{level}_count"][..., ids] += np.add.reduceat(
+                valid, starts, axis=-1
+            )
+            rollups[f"{level}_min"][..., ids] = np.fmin(
+                rollups[f"{level}_min"][..., ids],
+                np.fmin.reduceat(chunk, starts, axis=-1),
+            )
+            rollups[f"{level}_max"][..., ids] = np.fmax(
+                rollups[f"{level}_max"][..., ids],
+                np.fmax.reduceat(chunk, starts, axis=-1),
+            )
+
+    for level in ROLLUP_LEVELS:
+        sums = rollups.pop(f"{level}_sum")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rollups[f"{level}_mean"] = sums / rollups[f"{level}_count"]
+    rollups["week_start"] = WEEK_START
+
+    return rollups
+
+
+def get_rollups(path: str | Path, name: str, np_time, np_values):
+    """
+    Return the rollups of a series of the data file path, stored next to it in
+    '<file>.rollups.<name>.npz' and rebuilt when the data file changes.
+
+    Parameters:
+    path : str or Path
+        The data file the series is read from.
+    name : str
+        The name of the series in the cache, e.g. the variable name.
+    np_time, np_values :
+        The series, see build_rollups.
+    """
+    path_cache = sidecar_path(path, f".rollups.{name}.npz")
+    if is_fresh(path_cache, path):
+        with np.load(path_cache) as npz:
+            # caches written before the weeks started on Monday are rebuilt
+            if "week_start" in npz:
+                return dict(npz)
+
+    rollups = build_rollups(np_time, np_values)
+    path_tmp = tmp_path(path_cache)
+    np.savez(path_tmp, **rollups)
+    os.replace(path_tmp, path_cache)
+
+    return rollups
+
+
+def select_rollup(rollups, stat, t_start, t_end, n_out, series=None):
+    """
+    Pick the rollup level to display between t_start and t_end with n_out points.
+
+    The finest level with at most n_out periods in the range is used. When that level
+    is much coarser than needed, the finer level is returned instead, to be binned down.
+
+    Returns:
+    (level, time, values) with level None when the hourly data should be used.
+    """
+    finer = None
+    for level in ROLLUP_LEVELS:
+        np_time = rollups[f"{level}_time"]
+        i0, i1 = np.searchsorted(np_time, [t_start, t_end], side="right")
+        i0 = max(i0 - 1, 0)
+        values = rollups[f"{level}_{stat}"]
+        if series is not None:
+            values = values[series]
+        current = (level, np_time[i0:i1], values[i0:i1])
+        if i1 - i0 <= n_out:
+            if i1 - i0 < n_out // 4:
+                return finer if finer is not None else (None, None, None)
+            return current
+        finer = current
+    return finer
+
+
+class RollupAggregator(DataAggregator):
+    """
+    Aggregator for FigureResampler that serves the visible range of an hourly series
+    from its precomputed rollups, so that wide views never touch the hourly data.
+
+    Narrow views and levels finer than needed are binned with BinAggregator.
+    """
+
+    def __init__(self, rollups, stat="mean", series=None, **downsample_kwargs):
+        self.rollups = rollups
+        self.stat = stat
+        self.series = series
+        self.binner = BinAggregator(stat)
+        super().__init__(**downsample_kwargs)
+
+    def _aggregate(self, x, y, n_out):
+        if x is None or x.dtype.kind != "M":
+            return self.binner._aggregate(x, y, n_out)
+
+        level, np_time, values = select_rollup(
+            self.rollups,
+            self.stat,
+            x[0].astype("datetime64[ns]"),
+            x[-1].astype("datetime64[ns]"),
+            n_out,
+            self.series,
+        )
+        if level is None:
+            return self.binner._aggregate(x, y, n_out)
+        if len(np_time) > n_out:
+            return self.binner._aggregate(np_time, values, n_out)
+        return np_time.astype(x.dtype), values
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_compare import COMPARE_VARIABLES
+from .visualisation_script_geometry import (
+    DISPLAY_SHAPE,
+    REL_PATH,
+    REL_PATH_BOUNDARIES_DWS,
+    data_window,
+    get_display_geometry,
+    land_layer,
+)
+from .visualisation_script_profiling import stage
+from .visualisation_script_raster_cache import get_rendered_frames
+
+### Global variables
+# hourly domain aggregates: name -> (file, variable, axis title)
+SCENARIO_SERIES = {
+    "volume": ("output_files/DWS.volume.nc", "volume", "Volume (m<sup>3</sup>)"),
+    "salinity": (
+        "output_files/DWS200m.spatial_aggregates.S.nc",
+        "S_mean",
+        "Salinity (g kg<sup>-1</sup>)",
+    ),
+    "temperature": (
+        "output_files/DWS200m.spatial_aggregates.T.nc",
+        "T_mean",
+        "Temperature (°C)",
+    ),
+}
+CHUNK_HOURS = 24 * 365  # hours of a series read at once per scenario
+CHUNK_SLOTS = 24  # 15-day slots rendered at once per scenario
+# grid variables that must be equal in every scenario to share the display geometry
+GRID_VARIABLES = {
+    REL_PATH_BOUNDARIES_DWS: ("mask_dws", "xc", "yc", "lonc", "latc", "bdr_dws"),
+    REL_PATH: ("xr", "yr", "h"),  # only where h is nan (land) for the bathymetry
+}
+
+
+def scenario_names(roots, names=None):
+    """Names of the scenarios, by default the names of their folders."""
+    if names is not None:
+        if len(names) != len(roots):
+            raise ValueError("Give one name per scenario")
+        return list(names)
+    names = [Path(root).resolve().name for root in roots]
+    if len(set(names)) < len(names):
+        names = [f"{name} ({i})" for i, name in enumerate(names)]
+    return names
+
+
+def open_scenarios(roots, rel_path):
+    """
+    Open the same file of every scenario. The datasets are opened lazily, only the
+    metadata is read and the data is read when indexed. They are opened one after the
+    other, the netCDF library aborts when files are opened from several threads.
+    """
+    paths = [(Path(root) / rel_path).resolve() for root in roots]
+    return [xr.open_dataset(path, engine="netcdf4") for path in paths]
+
+
+def check_time_axes(datasets, names):
+    """Raise a ValueError when the time axis of a scenario differs from the first one."""
+    time_ref = datasets[0]["time"].values
+    for ds, name in zip(datasets[1:], names[1:]):
+        time = ds["time"].values
+        if len(time) != len(time_ref) or not np.array_equal(time, time_ref):
+            raise ValueError(
+                f"The time axis of scenario '{name}' ({len(time)} steps from "
+                + f"{pd.Timestamp(time[0])}) differs from the one of '{names[0]}' "
+                + f"({len(time_ref)} steps from {pd.Timestamp(time_ref[0])})"
+            )
+
+
+def check_grids(roots, names):
+    """
+    Raise a ValueError when the model grid, the DWS mask or the land differ between
+    scenarios, so that they can share the display geometry of the first one.
+    """
+    for rel_path, variables in GRID_VARIABLES.items():
+        datasets = open_scenarios(roots, rel_path)
+        for variable in variables:
+            reference = datasets[0][variable].values
+            if variable == "h":
+                reference = np.isnan(reference)
+            for ds, name in zip(datasets[1:], names[1:]):
+                values = ds[variable].values
+                if variable == "h":
+                    values = np.isnan(values)
+                if values.shape != reference.shape or not np.allclose(
+                    values, reference, equal_nan=True
+                ):
+                    raise ValueError(
+                        f"'{variable}' of {rel_path} differs between scenarios "
+                        + f"'{names[0]}' and '{name}'"
+                    )
+        for ds in datasets:
+            ds.close()
+
+
+def plot_scenarios(roots, variable="salinity", names=None, difference=False):
+    """
+    Plot the hourly domain aggregate of several scenarios on top of each other.
+
+    Parameters:
+    roots : sequence of str or Path
+        The folders holding the output_files of each scenario, the first one is the
+        reference.
+    variable : str
+        One of 'volume', 'salinity' or 'temperature'.
+    names : sequence of str
+        Names of the scenarios in the legend, by default the names of the folders.
+    difference : bool
+        Plot the difference of each scenario with the reference instead.
+    """
+    import plotly.graph_objects as go
+    from plotly_resampler import FigureResampler
+
+    from .visualisation_script_series import series_colour
+    from .visualisation_script_spatial import xaxes_buttons
+
+    rel_path, var_name, axis_title = SCENARIO_SERIES[variable]
+    names = scenario_names(roots, names)
+
+    with stage("load") as record:
+        datasets = open_scenarios(roots, rel_path)
+        check_time_axes(datasets, names)
+        np_time = datasets[0]["time"].values
+        reference = datasets[0][var_name].values
+
+        # the other scenarios are read a year at a time, keeping only what is plotted
+        series = {} if difference else {names[0]: reference}
+        for ds, name in zip(datasets[1:], names[1:]):
+            values = np.empty(len(np_time), dtype=float)
+            for t0 in range(0, len(np_time), CHUNK_HOURS):
+                t1 = min(t0 + CHUNK_HOURS, len(np_time))
+                values[t0:t1] = ds[var_name][t0:t1].values
+                if difference:
+                    values[t0:t1] -= reference[t0:t1]
+            series[f"{name} - {names[0]}" if difference else name] = values
+        for ds in datasets:
+            ds.close()
+        record.info["scenarios"] = len(roots)
+
+    with stage("figure-build"):
+        fig = FigureResampler(go.Figure())
+        for i, (name, values) in enumerate(series.items()):
+            fig.add_trace(
+                go.Scattergl(
+                    name=name,
+                    mode="lines",
+                    line=dict(color=series_colour(i + int(difference))),
+                ),
+                hf_x=np_time,
+                hf_y=values,
+            )
+
+        title = f"{variable.capitalize()} in the DWS per scenario"
+        if difference:
+            title += f", difference with {names[0]}"
+            axis_title = "Difference in " + axis_title[0].lower() + axis_title[1:]
+        fig.update_layout(
+            title=title,
+            yaxis=dict(title=dict(text=axis_title)),
+            xaxis=dict(
+                title=dict(text="Date"),
+                rangeselector=xaxes_buttons(),
+            ),
+            hovermode="x",
+        )
+
+    return fig
+
+
+def get_fig_scenarios(
+    start_date,
+    end_date,
+    variable_name,
+    roots,
+    names=None,
+    difference=True,
+    chunk_slots=CHUNK_SLOTS,
+):
+    """
+    Build the figure shown by display_scenarios.
+    """
+    import plotly.graph_objects as go
+
+    variable, colorbar_title = COMPARE_VARIABLES[variable_name]
+    layer = "rt" if variable_name == "rt" else "wet"
+    names = scenario_names(roots, names)
+
+    with stage("geometry"):
+        check_grids(roots, names)
+        geometry = get_display_geometry(roots[0])
+        rows, cols = data_window(
+            geometry.rt_index_map if layer == "rt" else geometry.index_map
+        )
+
+    with stage("load") as record:
+        datasets = open_scenarios(roots, REL_PATH)
+        check_time_axes(datasets, names)
+
+        delta_left = timedelta(days=7.5)
+        delta_right = timedelta(days=7.5) - timedelta(hours=1)
+        time_steps = pd.to_datetime(datasets[0]["time"].values)
+        mask_ind = (time_steps - delta_left >= start_date) & (
+            time_steps + delta_right <= end_date
+        )
+        slots = np.flatnonzero(mask_ind)
+        if len(slots) == 0:
+            raise ValueError(f"No 15-day slot between {start_date} and {end_date}")
+        time_steps_update = time_steps[slots]
+        record.info["slots"] = len(slots)
+
+    # The slots are rendered a chunk at a time and cut to the window holding data, so
+    # only the cut frames of the scenarios and their differences are kept
+    with stage("rasterize") as record:
+        n_diff = len(roots) - 1 if difference else 0
+        frames = [[] for _ in range(len(roots) + n_diff)]
+        vmax, limit = 0.0, 0.0
+        for c0 in range(0, len(slots), chunk_slots):
+            chunk_mask = np.zeros(len(time_steps), dtype=bool)
+            chunk_mask[slots[c0 : c0 + chunk_slots]] = True
+            for k, (root, ds) in enumerate(zip(roots, datasets)):
+                cube, value_range = get_rendered_frames(
+                    ds, variable, chunk_mask, geometry, root, layer=layer
+                )
+                cube = np.stack([frame[rows, cols] for frame in cube])
+                frames[k].append(cube)
+                vmax = max(vmax, value_range[1])
+                if k == 0:
+                    reference = cube
+                elif difference:
+                    diff = cube - reference
+                    frames[len(roots) + k - 1].append(diff)
+                    if np.isfinite(diff).any():
+                        limit = max(limit, float(np.nanmax(np.abs(diff))))
+        for ds in datasets:
+            ds.close()
+        frames = [np.concatenate(chunks) for chunks in frames]
+
+        first_frame = np.full(DISPLAY_SHAPE, np.nan)
+        first_frame[rows, cols] = frames[0][0]
+        data_h = land_layer(geometry, first_frame)
+        bdr_dws0p = geometry.boundary
+        record.info["frames_shape"] = (len(frames),) + frames[0].shape
+
+    with stage("figure-build"):
+        labels = names + [f"{name} - {names[0]}" for name in names[1 : n_diff + 1]]
+
+        fig = go.Figure(
+            [
+                go.Heatmap(
+                    z=frames[k][0],
+                    x0=cols.start,
+                    y0=rows.start,
+                    coloraxis="coloraxis" if k < len(roots) else "coloraxis2",
+                    visible=k == 0,
+                )
+                for k in range(len(frames))
+            ]
+        )
+        fig.add_trace(
+            go.Heatmap(
+                z=data_h, colorscale=[[0, "white"], [1, "gray"]], showscale=False
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=bdr_dws0p[:, 0],
+                y=bdr_dws0p[:, 1],
+                mode="lines",
+                line=dict(color="black", width=2),
+                name="",
+                showlegend=False,
+            )
+        )
+
+        # Dropdown switching between the scenarios and their differences
+        title = colorbar_title.split(" (")[0] + " per scenario: "
+        buttons = [
+            dict(
+                label=label,
+                method="update",
+                args=[
+                    {"visible": [j == k for j in range(len(frames))] + [True, True]},
+                    {
+                        "title.text": title + label,
+                        "coloraxis.showscale": k < len(roots),
+                        "coloraxis2.showscale": k >= len(roots),
+                    },
+                ],
+            )
+            for k, label in enumerate(labels)
+        ]
+        fig.update_layout(
+            title=title + labels[0],
+            width=1000,
+            height=600,
+            coloraxis=dict(
+                cmin=0,
+                cmax=int(vmax) + 1,
+                colorbar=dict(title=colorbar_title),
+            ),
+            coloraxis2=dict(
+                cmin=-(limit or 1),
+                cmax=limit or 1,
+                colorscale="RdBu_r",
+                colorbar=dict(title=f"Scenario - {names[0]}"),
+                showscale=False,
+            ),
+            updatemenus=[
+                dict(buttons=buttons, direction="down", x=0.0, xanchor="left", y=1.12)
+            ],
+            xaxis=dict(
+                title="Easting (km)",
+                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80, 100, 120],
+                constrain="domain",
+            ),
+            yaxis=dict(
+                title="Northing (km)",
+                tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80],
+                scaleanchor="x",
+            ),
+        )
+
+        # The frames only update z, so the map chosen in the dropdown stays visible
+        fig.frames = [
+            go.Frame(
+                data=[go.Heatmap(z=cube[i]) for cube in frames],
+                traces=list(range(len(frames))),
+                name=str(i),
+            )
+            for i in range(len(time_steps_update))
+        ]
+        fig.update_layout(
+            sliders=[
+                {
+                    "currentvalue": {
+                        "prefix": "15 days time slot: ",
+                        "visible": True,
+                        "xanchor": "center",
+                    },
+                    "len": 0.9,
+                    "steps": [
+                        {
+                            "label": f'{(time_steps_update[i]-delta_left).strftime("%d/%m/%Y") }-{(time_steps_update[i]+delta_right).strftime("%d/%m/%Y") }',
+                            "method": "animate",
+                            "args": [
+                                [str(i)],
+                                {"frame": {"duration": 500, "redraw": True}},
+                            ],
+                        }
+                        for i in range(len(time_steps_update))
+                    ],
+                }
+            ],
+        )
+
+    return fig
+
+
+def display_scenarios(
+    start_date, end_date, variable_name, roots, names=None, difference=True
+):
+    """
+    Display a 15-day variable of several scenarios in the chosen time period, with a
+    dropdown to switch between the scenarios and their differences with the first one
+    and a slider to navigate through the time steps.
+
+    Parameters:
+    start_date : datetime
+        The start date of the time period to display.
+    end_date : datetime
+        The end date of the time period to display.
+    variable_name : str
+        One of 'S', 'T', 'exposure' or 'rt'.
+    roots : sequence of str or Path
+        The folders holding the output_files of each scenario, the first one is the
+        reference. Their grids and time axes must be the same.
+    names : sequence of str
+        Names of the scenarios, by default the names of the folders.
+    difference : bool
+        Also offer the differences with the reference.
+    """
+    fig = get_fig_scenarios(
+        start_date, end_date, variable_name, roots, names, difference
+    )
+    with stage("serialize"):
+        fig.show()
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
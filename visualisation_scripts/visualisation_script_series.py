@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from plotly.express.colors import qualitative
+from plotly_resampler.aggregation.aggregation_interface import DataAggregator
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+
+### Global variables
+COLOUR_PALET = qualitative.Dark24
+
+
+def series_colour(i: int, palette=COLOUR_PALET):
+    """Colour of the i-th station or transect, the palette is cycled."""
+    return palette[i % len(palette)]
+
+
+class BinAggregator(DataAggregator):
+    """
+    Aggregate a series over equally wide bins of x with 'mean', 'min' or 'max'.
+
+    The bins only depend on x, so traces sharing a time axis are aggregated on the same
+    bins and the bounds of an uncertainty band stay aligned with its mean.
+    """
+
+    def __init__(self, how="mean", **downsample_kwargs):
+        if how not in ("mean", "min", "max"):
+            raise ValueError(f"Unknown aggregation: {how}")
+        self.how = how
+        super().__init__(**downsample_kwargs)
+
+    def _aggregate(self, x, y, n_out):
+        if x is None:
+            idxs = np.linspace(0, len(y), n_out + 1).astype(int)
+        else:
+            x_int = x.view("int64") if x.dtype.kind in "mM" else x
+            idxs = np.searchsorted(x_int, np.linspace(x_int[0], x_int[-1], n_out + 1))
+            idxs[-1] = len(y)
+        starts = idxs[:-1][np.diff(idxs) > 0]
+
+        y = np.asarray(y, dtype=float)
+        if self.how == "min":
+            y_agg = np.fmin.reduceat(y, starts)
+        elif self.how == "max":
+            y_agg = np.fmax.reduceat(y, starts)
+        else:
+            valid = ~np.isnan(y)
+            sums = np.add.reduceat(np.where(valid, y, 0.0), starts)
+            counts = np.add.reduceat(valid, starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                y_agg = sums / counts
+
+        x_agg = starts if x is None else x[starts]
+        return x_agg, y_agg
+
+
+def read_series_block(path: str | Path, variable: str, name_variable: str):
+    """
+    Read all the hourly series of a station or transect file at once.
+
+    The (time, series) block of the variable is written once, series-major, to a .npy
+    file next to the data and memory-mapped afterwards, so the series of any station is a
+    zero-copy, contiguous view and the stations are discovered from the file.
+
+    Parameters:
+    path : str or Path
+        The netCDF file, e.g. output_files/rivers_volume_flux.nc.
+    variable : str
+        The (time, series) variable to read, e.g. 'volume_flux'.
+    name_variable : str
+        The variable holding the names of the series, e.g. 'station_name'.
+
+    Returns:
+    np_time : np.ndarray
+        The time axis.
+    np_block : np.ndarray
+        Read-only array of shape (n_series, n_time).
+    np_names : np.ndarray
+        The names of the series.
+    """
+    path = Path(path).resolve()
+    path_cache = sidecar_path(path, f".{variable}.npy")
+
+    ds = xr.open_dataset(path)
+    np_time = ds["time"].values
+    np_names = ds[name_variable].values
+    series_dim = ds[name_variable].dims[0]
+
+    if not is_fresh(path_cache, path):
+        path_tmp = tmp_path(path_cache)
+        np.save(
+            path_tmp,
+            np.ascontiguousarray(ds[variable].transpose(series_dim, "time").values),
+        )
+        os.replace(path_tmp, path_cache)
+    ds.close()
+
+    np_block = np.load(path_cache, mmap_mode="r")
+
+    return np_time, np_block, np_names
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
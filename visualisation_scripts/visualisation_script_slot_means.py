@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import REL_PATH, REL_PATH_BOUNDARIES_DWS
+from .visualisation_script_probe import get_probe_cache
+from .visualisation_script_profiling import stage
+from .visualisation_script_regions import cell_area
+
+### Global variables
+CHUNK_CELLS = 4096  # number of cells reduced at once
+# variable of the 15-day aggregates overlaid on the hourly aggregates
+SLOT_MEAN_VARIABLES = {"salinity": "S_avg", "temperature": "T_avg"}
+
+
+@lru_cache(maxsize=4)
+def _get_area_weights(path_boundaries: Path, mtime: float):
+    dws_b = xr.open_dataset(path_boundaries)
+    wet_y, wet_x = np.where(dws_b.mask_dws.values)
+    area = cell_area(dws_b, wet_y, wet_x)
+    dws_b.close()
+    area.flags.writeable = False
+    return area
+
+
+def get_area_weights(path_root: str | Path):
+    """
+    Return the (cached) area of the DWS cells, in the order of the wet cells of the
+    display geometry and of the probe cache.
+    """
+    path = (Path(path_root) / REL_PATH_BOUNDARIES_DWS).resolve()
+    return _get_area_weights(path, path.stat().st_mtime)
+
+
+def build_slot_means(np_values, weights, chunk_cells=CHUNK_CELLS):
+    """
+    Area-weighted mean and spatial standard deviation of every time slot, from
+    weighted sums accumulated over chunks of cells. nan values are left out.
+
+    Parameters:
+    np_values : np.ndarray
+        Array of shape (n_cells, time), e.g. the cell-major probe cache.
+    weights : np.ndarray
+        Weight of each cell, e.g. its area.
+
+    Returns:
+    (mean, sd): arrays of shape (time,).
+    """
+    n_cells, n_time = np_values.shape
+    sum_w = np.zeros(n_time)
+    sum_wv = np.zeros(n_time)
+    sum_wv2 = np.zeros(n_time)
+    for c0 in range(0, n_cells, chunk_cells):
+        block = np.asarray(np_values[c0 : c0 + chunk_cells], dtype=float)
+        w = weights[c0 : c0 + chunk_cells]
+        valid = ~np.isnan(block)
+        block = np.where(valid, block, 0.0)
+        sum_w += w @ valid
+        sum_wv += w @ block
+        sum_wv2 += w @ (block * block)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sum_wv / sum_w
+        sd = np.sqrt(np.maximum(sum_wv2 / sum_w - mean**2, 0.0))
+    return mean, sd
+
+
+@lru_cache(maxsize=8)
+def _get_slot_means(path_root: Path, variable: str, mtime: float):
+    path = (path_root / REL_PATH).resolve()
+    path_cache = sidecar_path(path, f".slot_mean.{variable}.npz")
+    if is_fresh(path_cache, path):
+        with np.load(path_cache) as npz:
+            return npz["mean"], npz["sd"]
+
+    _, caches = get_probe_cache(path_root, (variable,))
+    mean, sd = build_slot_means(caches[variable], get_area_weights(path_root))
+    path_tmp = tmp_path(path_cache)
+    np.savez(path_tmp, mean=mean, sd=sd)
+    os.replace(path_tmp, path_cache)
+    return mean, sd
+
+
+def get_slot_means(path_root: str | Path, variable="S_avg"):
+    """
+    Return the (cached) area-weighted domain mean and spatial standard deviation of
+    a variable of the 15-day aggregates per slot.
+
+    Returns:
+    pandas.DataFrame indexed by the centre of the slots with columns 'mean' and 'sd'.
+    """
+    path_root = Path(path_root).resolve()
+    time, _ = get_probe_cache(path_root, (variable,))
+    mean, sd = _get_slot_means(
+        path_root, variable, (path_root / REL_PATH).stat().st_mtime
+    )
+    return pd.DataFrame({"mean": mean, "sd": sd}, index=time)
+
+
+def add_slot_means(fig, path_root: str | Path, var_name: str):
+    """
+    Overlay the 15-day area-weighted domain means, drawn over the 15 days of each
+    slot, with their spatial standard deviation on a figure of the hourly aggregates.
+
+    Parameters:
+    fig : plotly figure
+        The figure of plot_salinity or plot_temperature.
+    var_name : str
+        'salinity' or 'temperature'.
+    """
+    import plotly.graph_objects as go
+
+    with stage("load") as record:
+        slot_means = get_slot_means(path_root, SLOT_MEAN_VARIABLES[var_name])
+        record.info["slots"] = len(slot_means)
+
+    delta_left = timedelta(days=7.5)
+    delta_right = timedelta(days=7.5) - timedelta(hours=1)
+    time = slot_means.index
+    mean = slot_means["mean"].values
+    sd = slot_means["sd"].values
+
+    # one segment per slot, separated by gaps
+    n_slots = len(time)
+    x = np.empty(3 * n_slots, dtype=object)
+    x[0::3], x[1::3], x[2::3] = time - delta_left, time + delta_right, None
+    y = np.full(3 * n_slots, np.nan)
+    y[0::3], y[1::3] = mean, mean
+
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=y,
+            name="15-day area-weighted mean",
+            mode="lines",
+            line=dict(color="rgb(214, 39, 40)", width=3),
+            legendgroup="slot_means",
+            hoverinfo="skip",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=time,
+            y=mean,
+            name="15-day spatial std",
+            mode="markers",
+            marker=dict(color="rgb(214, 39, 40)", size=5),
+            error_y=dict(type="data", array=sd, visible=True, thickness=1),
+            legendgroup="slot_means",
+            hovertemplate="%{y:.2f} ± %{error_y.array:.2f}<extra>15-day slot</extra>",
+        )
+    )
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
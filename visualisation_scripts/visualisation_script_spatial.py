@@ -3,9 +3,15 @@
 
 from pathlib import Path
 
+import numpy as np
 import plotly.graph_objects as go
 import xarray as xr
 from plotly_resampler import FigureResampler
+from plotly_resampler.aggregation import NoGapHandler
+
+from .visualisation_script_profiling import stage
+from .visualisation_script_rolling import add_rolling_overlays, get_rolling_stats
+from .visualisation_script_rollups import RollupAggregator, get_rollups
 
 REL_PATH_VOLUME = Path("output_files/DWS.volume.nc")
 REL_PATH_AGGREGATES_S = Path("output_files/DWS200m.spatial_aggregates.S.nc")
@@ -26,97 +32,120 @@ def xaxes_buttons():
     )
 
 
-def plot_volume(path_root: str | Path):
-    ds_volume = xr.open_dataset(path_root / REL_PATH_VOLUME)
-
-    fig = FigureResampler(go.Figure())
-    fig.add_trace(
-        go.Scattergl(y=ds_volume["volume"].values, x=ds_volume["time"].values)
-    )
-
-    layout = dict(
-        title="Volume in the DWS",
-        yaxis=dict(title=dict(text="Volume (m<sup>3</sup>)")),
-        xaxis=dict(
-            title=dict(text="Date"),
-            rangeselector=xaxes_buttons(),
-        ),
-        hovermode="x",
-    )
-    fig.update_layout(layout)
+def plot_volume(path_root: str | Path, rolling_windows=None):
+    with stage("load"):
+        ds_volume = xr.open_dataset(path_root / REL_PATH_VOLUME)
+        np_time = ds_volume["time"].values
+        np_volume = ds_volume["volume"].values
+        rollups = get_rollups(path_root / REL_PATH_VOLUME, "volume", np_time, np_volume)
+
+    with stage("figure-build"):
+        fig = FigureResampler(go.Figure())
+        fig.add_trace(
+            go.Scattergl(),
+            hf_x=np_time,
+            hf_y=np_volume,
+            downsampler=RollupAggregator(rollups),
+        )
+        if rolling_windows:
+            stats = get_rolling_stats(path_root / REL_PATH_VOLUME, "volume", np_volume)
+            add_rolling_overlays(fig, stats, np_time, rolling_windows, colour_offset=1)
+
+        layout = dict(
+            title="Volume in the DWS",
+            yaxis=dict(title=dict(text="Volume (m<sup>3</sup>)")),
+            xaxis=dict(
+                title=dict(text="Date"),
+                rangeselector=xaxes_buttons(),
+            ),
+            hovermode="x",
+        )
+        fig.update_layout(layout)
 
     return fig
 
 
-def get_fig_spatial(var_name: str, path: Path):
-    ds_aggregate = xr.open_dataset(path)
-
-    if var_name == "salinity":
-        var_mean = ds_aggregate["S_mean"].values
-        var_std = ds_aggregate["S_std"].values
-    elif var_name == "temperature":
-        var_mean = ds_aggregate["T_mean"].values
-        var_std = ds_aggregate["T_std"].values
-    else:
-        print("Error")
-        quit()
-
-    time = ds_aggregate["time"].values
-
-    layout = dict(
-        xaxis=dict(
-            title=dict(text="Date"),
-            rangeslider_visible=True,
-            rangeselector=xaxes_buttons(),
-        ),
-        hovermode="x",
-        updatemenus=[
-            dict(
-                type="buttons",
-                direction="left",
-                buttons=list(
-                    [
-                        dict(
-                            method="restyle",
-                            label="Toggle uncertainty",
-                            visible=True,
-                            args=[{"visible": True}, [1, 2]],
-                            args2=[{"visible": "legendonly"}, [1, 2]],
-                        ),
-                    ]
-                ),
-                pad={"r": 10, "t": 10},
-                showactive=True,
-                x=1.08,
-                xanchor="center",
-                y=0.6,
-                yanchor="middle",
+def get_fig_spatial(var_name: str, path: Path, rolling_windows=None):
+    with stage("load"):
+        ds_aggregate = xr.open_dataset(path)
+
+        if var_name == "salinity":
+            var_mean = ds_aggregate["S_mean"].values
+            var_std = ds_aggregate["S_std"].values
+        elif var_name == "temperature":
+            var_mean = ds_aggregate["T_mean"].values
+            var_std = ds_aggregate["T_std"].values
+        else:
+            print("Error")
+            quit()
+
+        time = ds_aggregate["time"].values
+        bands = np.stack([var_mean, var_mean + var_std, var_mean - var_std])
+        rollups = get_rollups(path, f"{var_name}_bands", time, bands)
+
+    with stage("figure-build"):
+        layout = dict(
+            xaxis=dict(
+                title=dict(text="Date"),
+                rangeslider_visible=True,
+                rangeselector=xaxes_buttons(),
             ),
-        ],
-    )
+            hovermode="x",
+            updatemenus=[
+                dict(
+                    type="buttons",
+                    direction="left",
+                    buttons=list(
+                        [
+                            dict(
+                                method="restyle",
+                                label="Toggle uncertainty",
+                                visible=True,
+                                args=[{"visible": True}, [1, 2]],
+                                args2=[{"visible": "legendonly"}, [1, 2]],
+                            ),
+                        ]
+                    ),
+                    pad={"r": 10, "t": 10},
+                    showactive=True,
+                    x=1.08,
+                    xanchor="center",
+                    y=0.6,
+                    yanchor="middle",
+                ),
+            ],
+        )
 
-    fig = go.Figure(
-        data=[
-            go.Scatter(
+        # The mean is averaged and the bounds take the extremes of the same bins, so the
+        # band drawn for every visible window covers the hourly band
+        fig = FigureResampler(go.Figure(layout=layout))
+        fig.add_trace(
+            go.Scattergl(
                 name=f"Average {var_name}",
-                x=time,
-                y=var_mean,
                 mode="lines",
                 line=dict(color="rgb(31, 119, 180)"),
             ),
-            go.Scatter(
+            hf_x=time,
+            hf_y=var_mean,
+            downsampler=RollupAggregator(rollups, "mean", series=0),
+            gap_handler=NoGapHandler(),
+        )
+        fig.add_trace(
+            go.Scattergl(
                 name="Upper Bound",
-                x=time,
-                y=var_mean + var_std,
                 mode="lines",
                 marker=dict(color="#444"),
                 line=dict(width=0),
                 showlegend=False,
             ),
-            go.Scatter(
+            hf_x=time,
+            hf_y=bands[1],
+            downsampler=RollupAggregator(rollups, "max", series=1),
+            gap_handler=NoGapHandler(),
+        )
+        fig.add_trace(
+            go.Scattergl(
                 name="Lower Bound",
-                x=time,
-                y=var_mean - var_std,
                 mode="lines",
                 marker=dict(color="#444"),
                 line=dict(width=0),
@@ -124,27 +153,44 @@ def get_fig_spatial(var_name: str, path: Path):
                 fill="tonexty",
                 showlegend=False,
             ),
-        ],
-        layout=layout,
-    )
+            hf_x=time,
+            hf_y=bands[2],
+            downsampler=RollupAggregator(rollups, "min", series=2),
+            gap_handler=NoGapHandler(),
+        )
+        if rolling_windows:
+            stats = get_rolling_stats(path, var_name, var_mean)
+            add_rolling_overlays(fig, stats, time, rolling_windows, colour_offset=1)
 
     return fig
 
 
-def plot_temperature(path_root: str | Path):
+def plot_temperature(path_root: str | Path, rolling_windows=None, slot_means=False):
     var_name = "temperature"
 
-    fig = get_fig_spatial(var_name, (path_root / REL_PATH_AGGREGATES_T).resolve())
+    fig = get_fig_spatial(
+        var_name, (path_root / REL_PATH_AGGREGATES_T).resolve(), rolling_windows
+    )
     fig.update_layout({"yaxis": dict(title=dict(text="Temperature (°C)"))})
+    if slot_means:
+        from .visualisation_script_slot_means import add_slot_means
+
+        add_slot_means(fig, path_root, var_name)
 
     return fig
 
 
-def plot_salinity(path_root: str | Path):
+def plot_salinity(path_root: str | Path, rolling_windows=None, slot_means=False):
     var_name = "salinity"
 
-    fig = get_fig_spatial(var_name, (path_root / REL_PATH_AGGREGATES_S).resolve())
+    fig = get_fig_spatial(
+        var_name, (path_root / REL_PATH_AGGREGATES_S).resolve(), rolling_windows
+    )
     fig.update_layout({"yaxis": dict(title=dict(text="Salinity (g kg<sup>-1</sup>)"))})
+    if slot_means:
+        from .visualisation_script_slot_means import add_slot_means
+
+        add_slot_means(fig, path_root, var_name)
 
     return fig
 
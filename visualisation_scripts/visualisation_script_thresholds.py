@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_geometry import REL_PATH
+from .visualisation_script_histograms import HISTOGRAM_BINS
+from .visualisation_script_probe import get_probe_cache
+from .visualisation_script_profiling import stage
+from .visualisation_script_regions import VARIABLE_TITLES, get_wet_cells_rd
+
+### Global variables
+THRESHOLD_VARIABLES = ("S_avg", "T_avg", "exp_pct", "Rt_mean")
+N_THRESHOLDS = 50  # default number of thresholds on the slider
+CHUNK_SLOTS = 64  # number of time slots sorted at once
+
+
+def build_sorted_slots(np_values, area, chunk_slots=CHUNK_SLOTS):
+    """
+    Sort the values of each time slot once, with the cumulative area of the cells in
+    that order.
+
+    Parameters:
+    np_values : np.ndarray
+        Array of shape (n_cells, time), e.g. the cell-major probe cache.
+    area : np.ndarray
+        Area of each cell.
+
+    Returns:
+    (sorted_values, cum_area) of shape (time, n_cells) and (time, n_cells + 1),
+    nan values are sorted last and add no area.
+    """
+    n_cells, n_time = np_values.shape
+    sorted_values = np.empty((n_time, n_cells), dtype=np.float32)
+    cum_area = np.zeros((n_time, n_cells + 1))
+
+    for t0 in range(0, n_time, chunk_slots):
+        block = np.asarray(np_values[:, t0 : t0 + chunk_slots], dtype=np.float32).T
+        order = np.argsort(block, axis=1)
+        sorted_block = np.take_along_axis(block, order, axis=1)
+        sorted_area = np.where(np.isnan(sorted_block), 0.0, area[order])
+        sorted_values[t0 : t0 + chunk_slots] = sorted_block
+        np.cumsum(sorted_area, axis=1, out=cum_area[t0 : t0 + chunk_slots, 1:])
+
+    return sorted_values, cum_area
+
+
+@lru_cache(maxsize=8)
+def _get_sorted_slots(path_root: Path, variable: str, mtime: float):
+    path = (path_root / REL_PATH).resolve()
+    path_values = sidecar_path(path, f".sorted.{variable}.npy")
+    path_area = sidecar_path(path, f".sorted_area.{variable}.npy")
+
+    if not (is_fresh(path_values, path) and is_fresh(path_area, path)):
+        _, caches = get_probe_cache(path_root, (variable,))
+        _, _, area = get_wet_cells_rd(path_root)
+        sorted_values, cum_area = build_sorted_slots(caches[variable], area)
+        for path_cache, array in ((path_values, sorted_values), (path_area, cum_area)):
+            path_tmp = tmp_path(path_cache)
+            np.save(path_tmp, array)
+            os.replace(path_tmp, path_cache)
+
+    return np.load(path_values, mmap_mode="r"), np.load(path_area, mmap_mode="r")
+
+
+def get_sorted_slots(path_root: str | Path, variable="Rt_mean"):
+    """
+    Return the (cached, memory-mapped) sorted values and cumulative cell areas of
+    each time slot, see build_sorted_slots.
+    """
+    path_root = Path(path_root).resolve()
+    return _get_sorted_slots(
+        path_root, variable, (path_root / REL_PATH).stat().st_mtime
+    )
+
+
+def area_above_threshold(
+    path_root: str | Path, variable="Rt_mean", thresholds=None, below=False
+):
+    """
+    Area of the DWS where a variable of the 15-day aggregates is above (or below)
+    each threshold, for all time slots. Every threshold is a binary search in the
+    sorted values of a slot.
+
+    Parameters:
+    path_root : str or Path
+        The folder holding output_files.
+    variable : str
+        One of 'S_avg', 'T_avg', 'exp_pct' or 'Rt_mean'.
+    thresholds : sequence of float
+        By default N_THRESHOLDS values spanning the histogram range of the variable.
+    below : bool
+        Return the area below the thresholds instead of above.
+
+    Returns:
+    pandas.DataFrame indexed by time with the area in km2 per threshold.
+    """
+    if thresholds is None:
+        low, high, _ = HISTOGRAM_BINS[variable]
+        thresholds = np.linspace(low, high, N_THRESHOLDS + 1)
+    thresholds = np.asarray(thresholds, dtype=float)
+
+    time, _ = get_probe_cache(path_root, (variable,))
+    sorted_values, cum_area = get_sorted_slots(path_root, variable)
+
+    # nan values are sorted last, binary searches with finite thresholds stop before
+    side = "left" if below else "right"
+    area = np.empty((len(time), len(thresholds)))
+    for t in range(len(time)):
+        pos = np.searchsorted(sorted_values[t], thresholds, side=side)
+        if below:
+            area[t] = cum_area[t, pos]
+        else:
+            area[t] = cum_area[t, -1] - cum_area[t, pos]
+
+    return pd.DataFrame(
+        area / 1e6, index=time, columns=pd.Index(thresholds, name="threshold")
+    )
+
+
+def plot_area_above_threshold(
+    path_root: str | Path, variable="Rt_mean", thresholds=None, below=False
+):
+    """
+    Plot the area of the DWS above (or below) a threshold with a slider to choose the
+    threshold. The curves of all thresholds are in the figure, so dragging the
+    slider needs no computation.
+    """
+    import plotly.graph_objects as go
+
+    with stage("load") as record:
+        area = area_above_threshold(path_root, variable, thresholds, below)
+        record.info["slots"], record.info["thresholds"] = area.shape
+
+    with stage("figure-build"):
+        title = VARIABLE_TITLES.get(variable, variable)
+        relation = "below" if below else "above"
+
+        fig = go.Figure(
+            go.Scatter(
+                x=area.index,
+                y=area.iloc[:, 0].values,
+                mode="lines+markers",
+                line=dict(color="rgb(31, 119, 180)"),
+                hovertemplate="Date = %{x}<br>%{y:.1f} km<sup>2</sup><extra></extra>",
+            )
+        )
+
+        steps = [
+            dict(
+                method="update",
+                label=f"{threshold:g}",
+                args=[
+                    {"y": [area[threshold].values]},
+                    {"title": f"Area with {title} {relation} {threshold:g}"},
+                ],
+            )
+            for threshold in area.columns
+        ]
+        fig.update_layout(
+            title=f"Area with {title} {relation} {area.columns[0]:g}",
+            yaxis=dict(title=dict(text="Area (km<sup>2</sup>)"), rangemode="tozero"),
+            xaxis=dict(title=dict(text="Date")),
+            sliders=[
+                dict(
+                    active=0,
+                    currentvalue=dict(prefix="Threshold: "),
+                    pad={"t": 50},
+                    steps=steps,
+                )
+            ],
+        )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
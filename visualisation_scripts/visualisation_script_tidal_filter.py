@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly_resampler.aggregation import NoGapHandler
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_series import BinAggregator, series_colour
+
+### Global variables
+LANCZOS_CUTOFF = 40  # hours
+LANCZOS_HALF_WIDTH = 120  # hours
+SERIES_CHUNK = 16  # number of series filtered at once, bounds the FFT memory
+
+
+def godin_weights():
+    """
+    Weights of the Godin filter for hourly data: successive 24, 24 and 25 hour moving
+    averages, 71 hours wide.
+    """
+    weights = np.convolve(np.ones(24) / 24, np.ones(24) / 24)
+    return np.convolve(weights, np.ones(25) / 25)
+
+
+def lanczos_weights(cutoff=LANCZOS_CUTOFF, half_width=LANCZOS_HALF_WIDTH):
+    """
+    Weights of the Lanczos low-pass filter for hourly data.
+
+    Parameters:
+    cutoff : float
+        Cut-off period in hours.
+    half_width : int
+        Number of weights on each side of the centre.
+    """
+    k = np.arange(-half_width, half_width + 1)
+    weights = 2 / cutoff * np.sinc(2 * k / cutoff) * np.sinc(k / half_width)
+    return weights / weights.sum()
+
+
+FILTERS = {"godin": godin_weights, "lanczos": lanczos_weights}
+
+
+def lowpass(np_values, weights, series_chunk=SERIES_CHUNK):
+    """
+    Low-pass filter all the series of a block at once with an FFT-based convolution.
+
+    Values whose window reaches past the ends of the series or holds a nan are nan.
+
+    Parameters:
+    np_values : np.ndarray
+        Array of shape (n_time,) or (n_series, n_time), e.g. the memory-mapped block of
+        read_series_block.
+    weights : np.ndarray
+        Symmetric filter weights of odd length.
+    """
+    n_time = np_values.shape[-1]
+    half = len(weights) // 2
+    n_fft = 1 << int(np.ceil(np.log2(n_time + len(weights) - 1)))
+    weights_fft = np.fft.rfft(weights, n_fft)
+
+    block = np.asarray(np_values).reshape(-1, n_time)
+    filtered = np.empty(block.shape)
+
+    for s0 in range(0, block.shape[0], series_chunk):
+        chunk = np.asarray(block[s0 : s0 + series_chunk], dtype=float)
+        invalid = np.isnan(chunk)
+        values_fft = np.fft.rfft(np.where(invalid, 0.0, chunk), n_fft, axis=-1)
+        convolved = np.fft.irfft(values_fft * weights_fft, n_fft, axis=-1)
+        filtered[s0 : s0 + series_chunk] = convolved[:, half : half + n_time]
+
+        # count the nans in each window with a prefix sum
+        cum_invalid = np.concatenate(
+            [np.zeros((chunk.shape[0], 1)), np.cumsum(invalid, axis=-1)], axis=-1
+        )
+        idx = np.arange(n_time)
+        i0 = np.clip(idx - half, 0, n_time)
+        i1 = np.clip(idx + half + 1, 0, n_time)
+        has_nan = cum_invalid[:, i1] - cum_invalid[:, i0] > 0
+        filtered[s0 : s0 + series_chunk][has_nan] = np.nan
+
+    filtered[:, :half] = np.nan
+    filtered[:, n_time - half :] = np.nan
+
+    return filtered.reshape(np_values.shape)
+
+
+def get_residual(path: str | Path, name: str, np_values, method="godin"):
+    """
+    Return the tidally filtered (residual) series of a file, cached in
+    '<file>.residual.<name>.<method>.npy' and memory-mapped.
+
+    Parameters:
+    path : str or Path
+        The data file the series is read from.
+    name : str
+        The name of the series in the cache, e.g. the variable name.
+    np_values : np.ndarray
+        The hourly series, see lowpass.
+    method : str
+        'godin' or 'lanczos'.
+    """
+    if method not in FILTERS:
+        raise ValueError(f"Unknown tidal filter: {method}")
+
+    path_cache = sidecar_path(path, f".residual.{name}.{method}.npy")
+    if not is_fresh(path_cache, path):
+        path_tmp = tmp_path(path_cache)
+        np.save(path_tmp, lowpass(np_values, FILTERS[method]()))
+        os.replace(path_tmp, path_cache)
+
+    return np.load(path_cache, mmap_mode="r")
+
+
+def residual_buttons(raw_traces, residual_traces, raw_visible):
+    """
+    Buttons switching a figure between the hourly and the residual series.
+
+    Parameters:
+    raw_traces, residual_traces : list of int
+        Indices of the hourly traces and of their residual counterparts.
+    raw_visible : list
+        The initial visibility of the hourly traces (True or 'legendonly').
+    """
+    traces = list(raw_traces) + list(residual_traces)
+    hidden = [False] * len(raw_visible)
+    return dict(
+        type="buttons",
+        direction="left",
+        buttons=[
+            dict(
+                method="restyle",
+                label="Hourly",
+                args=[{"visible": list(raw_visible) + hidden}, traces],
+            ),
+            dict(
+                method="restyle",
+                label="Residual",
+                args=[{"visible": hidden + list(raw_visible)}, traces],
+            ),
+        ],
+        pad={"r": 10, "t": 10},
+        showactive=True,
+        x=1.0,
+        xanchor="right",
+        y=1.12,
+        yanchor="top",
+    )
+
+
+def add_residual_traces(fig, np_time, np_residual, names, raw_traces, raw_visible):
+    """
+    Add a hidden residual trace per series to a FigureResampler and the buttons to
+    switch between the hourly and the residual series.
+
+    Parameters:
+    fig : FigureResampler
+        The figure with the hourly traces.
+    np_time : np.ndarray
+        The time axis.
+    np_residual : np.ndarray
+        Array of shape (n_series, n_time), see get_residual.
+    names : list of str
+        The names of the series.
+    raw_traces, raw_visible :
+        Indices and initial visibility of the hourly traces, see residual_buttons.
+    """
+    residual_traces = []
+    for i, name in enumerate(names):
+        fig.add_trace(
+            go.Scattergl(
+                name=f"{name} residual",
+                legendgroup=f"{name} residual",
+                mode="lines",
+                line={"color": series_colour(i)},
+                hovertemplate=f"{name} residual"
+                + "<br>Date = %{x}<br>Flux = %{y}<extra></extra>",
+                visible=False,
+            ),
+            hf_x=np_time,
+            hf_y=np_residual[i],
+            downsampler=BinAggregator("mean"),
+            gap_handler=NoGapHandler(),
+        )
+        residual_traces.append(len(fig.data) - 1)
+
+    fig.update_layout(
+        updatemenus=[residual_buttons(raw_traces, residual_traces, raw_visible)]
+    )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .visualisation_script_compare import COMPARE_VARIABLES
+from .visualisation_script_geometry import (
+    DISPLAY_SHAPE,
+    REL_PATH,
+    _stamp_map,
+    get_display_geometry,
+    render_frames,
+)
+from .visualisation_script_profiling import stage
+
+### Global variables
+TILE_SIZE = 256  # pixels of a tile side
+MAX_ZOOM = 3  # a display pixel of 100 m is split into 2**MAX_ZOOM pixels at most
+TILE_CACHE_SIZE = 1024  # tiles kept per cache (index maps and rendered tiles)
+PLOT_WIDTH = 900  # approximate width of the plot area of the map, in screen pixels
+# squares covering a grid rotated by 17 degrees without gaps are this much wider
+ROTATION_COVER = np.cos(17 * np.pi / 180) + np.sin(17 * np.pi / 180)
+
+
+def tile_span(zoom):
+    """Side of a tile in display pixels."""
+    return TILE_SIZE / 2**zoom
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def _get_tile_index(path_root: Path, layer: str, zoom: int, ty: int, tx: int):
+    geometry = get_display_geometry(path_root)
+    scale = 2**zoom
+    span = tile_span(zoom)
+    if layer == "rt":
+        points, cell_px, values_index = (
+            geometry.rt_points,
+            geometry.rt_cell_px,
+            geometry.rt_cells,
+        )
+    else:
+        points, cell_px, values_index = geometry.wet_points, geometry.cell_px, None
+
+    # the stamps are as wide as the cells, the overview keeps its 3x3 and 5x5 stamps
+    half = max(1, int(round(cell_px * ROTATION_COVER * scale / 2)))
+    margin = (half + 1) / scale
+    r0, c0 = ty * span, tx * span
+    inside = np.flatnonzero(
+        (points[:, 0] >= r0 - margin)
+        & (points[:, 0] < r0 + span + margin)
+        & (points[:, 1] >= c0 - margin)
+        & (points[:, 1] < c0 + span + margin)
+    )
+    order_map = _stamp_map(
+        np.floor((points[inside, 0] - r0) * scale).astype(int),
+        np.floor((points[inside, 1] - c0) * scale).astype(int),
+        inside,
+        half,
+        half,
+        (0, 0),
+        (TILE_SIZE, TILE_SIZE),
+    )
+    if values_index is not None:
+        order_map = np.where(order_map >= 0, values_index[order_map], -1)
+    order_map.setflags(write=False)
+    return order_map
+
+
+def get_tile_index(path_root: str | Path, layer, zoom, ty, tx):
+    """
+    Return the (TILE_SIZE, TILE_SIZE) map of the cells drawn in a tile, -1 for pixels
+    without data. The values follow the index maps of the geometry: positions in
+    wet_y/wet_x for the 'wet' layer and flat grid indices for the 'rt' layer.
+
+    At zoom 0 the tiles are cut from the cached 800x1200 index maps, at zoom z every
+    display pixel is split in 2**z x 2**z pixels and the cells are stamped as squares
+    of their own size, so that the cells stay sharp when zooming in.
+    """
+    if zoom == 0:
+        geometry = get_display_geometry(path_root)
+        index_map = geometry.rt_index_map if layer == "rt" else geometry.index_map
+        tile = np.full((TILE_SIZE, TILE_SIZE), -1, dtype=np.int64)
+        part = index_map[
+            ty * TILE_SIZE : (ty + 1) * TILE_SIZE, tx * TILE_SIZE : (tx + 1) * TILE_SIZE
+        ]
+        tile[: part.shape[0], : part.shape[1]] = part
+        return tile
+    return _get_tile_index(Path(path_root).resolve(), layer, zoom, ty, tx)
+
+
+def zoom_for_view(x_range, plot_width=PLOT_WIDTH):
+    """Coarsest zoom showing at least one pixel per screen pixel, up to MAX_ZOOM."""
+    width = max(x_range[1] - x_range[0], 1e-6)
+    zoom = int(np.ceil(np.log2(plot_width / width)))
+    return min(max(zoom, 0), MAX_ZOOM)
+
+
+def render_view(x_range, y_range, render_tile):
+    """
+    Assemble the tiles intersecting the view at the zoom the view needs.
+
+    Parameters:
+    x_range, y_range : tuple of float
+        The visible window in display pixels.
+    render_tile : callable
+        render_tile(zoom, ty, tx) returning the rendered tile, e.g. an lru_cache'd
+        function of the slot shown.
+
+    Returns:
+    dict with the image 'z' and its position 'x0', 'y0' and pixel size 'dx', 'dy' in
+    display pixels, as keyword arguments of a plotly Heatmap.
+    """
+    with stage("rasterize") as record:
+        zoom = zoom_for_view(x_range)
+        span = tile_span(zoom)
+        x_lo, x_hi = max(x_range[0], 0), min(x_range[1], DISPLAY_SHAPE[1])
+        y_lo, y_hi = max(y_range[0], 0), min(y_range[1], DISPLAY_SHAPE[0])
+        tx0, tx1 = int(x_lo // span), int(np.ceil(x_hi / span))
+        ty0, ty1 = int(y_lo // span), int(np.ceil(y_hi / span))
+        tx1, ty1 = max(tx1, tx0 + 1), max(ty1, ty0 + 1)
+
+        image = np.block(
+            [
+                [render_tile(zoom, ty, tx) for tx in range(tx0, tx1)]
+                for ty in range(ty0, ty1)
+            ]
+        )
+        record.info["zoom"] = zoom
+        record.info["tiles"] = (ty1 - ty0) * (tx1 - tx0)
+
+    scale = 2**zoom
+    return dict(
+        z=image,
+        x0=tx0 * span + 0.5 / scale - 0.5,
+        y0=ty0 * span + 0.5 / scale - 0.5,
+        dx=1 / scale,
+        dy=1 / scale,
+    )
+
+
+def display_tiles(
+    start_date, end_date, variable_name, path_root: str | Path, port=8050
+):
+    """
+    Display a 15-day map rendered at the resolution of the zoomed view.
+    The map is served by a Dash app: after each zoom or pan only the tiles in view are
+    rendered, sharper as the view gets smaller, and recently shown tiles are cached.
+
+    Parameters:
+    start_date : datetime
+        The start date of the time period to display.
+    end_date : datetime
+        The end date of the time period to display.
+    variable_name : str
+        The map to display. It should be one of 'S' (salinity), 'T' (temperature),
+        'exposure' or 'rt' (residence time).
+    """
+    import plotly.graph_objects as go
+    from dash import Dash, Input, Output, Patch, State, dcc, html
+
+    variable, colorbar_title = COMPARE_VARIABLES[variable_name]
+    layer = "rt" if variable_name == "rt" else "wet"
+    geometry = get_display_geometry(path_root)
+
+    ds = xr.open_dataset(Path(path_root) / REL_PATH, engine="netcdf4")
+    delta_left = timedelta(days=7.5)
+    delta_right = timedelta(days=7.5) - timedelta(hours=1)
+    time_steps = pd.to_datetime(ds["time"].values)
+    mask_ind = (time_steps - delta_left >= start_date) & (
+        time_steps + delta_right <= end_date
+    )
+    if not mask_ind.any():
+        raise ValueError(f"No 15-day slot between {start_date} and {end_date}")
+    time_steps_update = time_steps[mask_ind]
+    data = ds[variable].isel(time=np.flatnonzero(mask_ind)).values
+    ds.close()
+    if layer == "rt":
+        values = data.reshape(len(data), -1)
+    else:
+        values = data[:, geometry.wet_y, geometry.wet_x]
+    cmax = int(np.nanmax(values)) + 1
+    labels = [
+        f'{(t - delta_left).strftime("%d/%m/%Y")}-{(t + delta_right).strftime("%d/%m/%Y")}'
+        for t in time_steps_update
+    ]
+
+    @lru_cache(maxsize=TILE_CACHE_SIZE)
+    def render_tile(slot, zoom, ty, tx):
+        tile_index = get_tile_index(path_root, layer, zoom, ty, tx)
+        return render_frames(values[slot : slot + 1], tile_index)[0]
+
+    full_view = ((-0.5, DISPLAY_SHAPE[1] - 0.5), (-0.5, DISPLAY_SHAPE[0] - 0.5))
+    title = colorbar_title.split(" (")[0] + ", 15 days time slot: "
+
+    def get_view(slot, x_range, y_range):
+        return render_view(
+            x_range,
+            y_range,
+            lambda zoom, ty, tx: render_tile(slot, zoom, ty, tx),
+        )
+
+    def get_fig_tiles(slot, x_range, y_range):
+        view = get_view(slot, x_range, y_range)
+        fig = go.Figure(
+            [
+                go.Heatmap(
+                    z=geometry.land,
+                    colorscale=[[0, "white"], [1, "gray"]],
+                    showscale=False,
+                    hoverinfo="skip",
+                ),
+                go.Heatmap(**view, coloraxis="coloraxis"),
+                go.Scatter(
+                    x=geometry.boundary[:, 0],
+                    y=geometry.boundary[:, 1],
+                    mode="lines",
+                    line=dict(color="black", width=2),
+                    name="",
+                    showlegend=False,
+                ),
+            ]
+        )
+        fig.update_layout(
+            title=title + labels[slot],
+            width=1000,
+            height=700,
+            uirevision="tiles",
+            coloraxis=dict(
+                cmin=0,
+                cmax=cmax,
+                colorbar=dict(title=colorbar_title),
+            ),
+            xaxis=dict(
+                title="Easting (km)",
+                range=list(x_range),
+                tickvals=[0, 200, 400, 600, 800, 1000, 1200],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80, 100, 120],
+                constrain="domain",
+            ),
+            yaxis=dict(
+                title="Northing (km)",
+                range=list(y_range),
+                tickvals=[0, 200, 400, 600, 800],  # Locations of ticks
+                ticktext=[0, 20, 40, 60, 80],
+                scaleanchor="x",
+            ),
+        )
+        return fig
+
+    app = Dash(__name__)
+    app.layout = html.Div(
+        [
+            dcc.Graph(id="tiles-map", figure=get_fig_tiles(0, *full_view)),
+            dcc.Slider(
+                id="tiles-slot",
+                min=0,
+                max=len(labels) - 1,
+                step=1,
+                value=0,
+                marks=None,
+                tooltip={"placement": "bottom"},
+            ),
+            dcc.Store(id="tiles-view", data=full_view),
+        ]
+    )
+
+    @app.callback(
+        Output("tiles-map", "figure"),
+        Output("tiles-view", "data"),
+        Input("tiles-map", "relayoutData"),
+        Input("tiles-slot", "value"),
+        State("tiles-view", "data"),
+    )
+    def update_tiles(relayout, slot, view):
+        x_range, y_range = view
+        relayout = relayout or {}
+        if relayout.get("xaxis.autorange") or relayout.get("autosize"):
+            x_range, y_range = full_view
+        if "xaxis.range[0]" in relayout:
+            x_range = (relayout["xaxis.range[0]"], relayout["xaxis.range[1]"])
+        if "yaxis.range[0]" in relayout:
+            y_range = (relayout["yaxis.range[0]"], relayout["yaxis.range[1]"])
+        # only the rendered tiles and the title are sent, the land and the boundary
+        # stay in the browser
+        slot = slot or 0
+        patch = Patch()
+        patch["data"][1].update(get_view(slot, x_range, y_range))
+        patch["layout"]["title"]["text"] = title + labels[slot]
+        patch["layout"]["xaxis"]["range"] = list(x_range)
+        patch["layout"]["yaxis"]["range"] = list(y_range)
+        return patch, (x_range, y_range)
+
+    app.run(jupyter_mode="inline", port=port)
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")
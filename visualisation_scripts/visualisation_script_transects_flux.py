@@ -3,11 +3,16 @@
 
 from pathlib import Path
 
-import plotly.express as px
-import xarray as xr
-from plotly.express.colors import qualitative
+import plotly.graph_objects as go
+from plotly_resampler import FigureResampler
+
+from .visualisation_script_profiling import stage
+from .visualisation_script_rolling import add_rolling_overlays, get_rolling_stats
+from .visualisation_script_rollups import RollupAggregator, get_rollups
+from .visualisation_script_series import read_series_block, series_colour
+from .visualisation_script_tidal_filter import add_residual_traces, get_residual
+from .visualisation_script_transport import get_cumulative_transport
 
-COLOUR_PALET = qualitative.Dark24
 REL_PATH_RIVERS = Path("output_files/rivers_volume_flux.nc")
 
 
@@ -25,40 +30,75 @@ def xaxes_buttons():
     )
 
 
-def get_transect_flux(path_root: str, variable: str):
-    ds_flux = xr.open_dataset(
-        (Path(path_root) / "output_files/TR.volume_salt_flux.nc").resolve()
-    )
-
-    fig = px.line(
-        x=ds_flux[variable]["time"],
-        y=[
-            ds_flux[variable].sel(transect=i)
-            for i in ds_flux[variable]["transect"].values
-        ],
-    )
-
-    transect_names = ds_flux["transect_name"].values
-    legend_replace = {
-        f"wide_variable_{i}": transect_name
-        for i, transect_name in enumerate(transect_names)
-    }
-
-    fig.for_each_trace(
-        lambda t: t.update(
-            name=legend_replace[t.name],
-            legendgroup=legend_replace[t.name],
-            hovertemplate=t.hovertemplate.replace(t.name, legend_replace[t.name]),
-        )
-    )
-
-    ds_flux.close()
+def get_transect_flux(
+    path_root: str,
+    variable: str,
+    rolling_windows=None,
+    tidal_filter=None,
+    cumulative=False,
+):
+    # Read the series of all the transects in the file
+    with stage("load"):
+        path = (Path(path_root) / "output_files/TR.volume_salt_flux.nc").resolve()
+        if cumulative:
+            # transport integrated up to the end of each hour
+            np_time, np_cumulative, transect_names = get_cumulative_transport(
+                path_root, variable
+            )
+            np_flux = np_cumulative[0, :, 1:]
+            variable = f"{variable}_cumulative"
+            tidal_filter = None
+        else:
+            np_time, np_flux, transect_names = read_series_block(
+                path, variable, "transect_name"
+            )
+        rollups = get_rollups(path, variable, np_time, np_flux)
+
+    with stage("figure-build"):
+        fig = FigureResampler(go.Figure())
+        raw_traces = []
+
+        for i, transect_name in enumerate(transect_names):
+            raw_traces.append(len(fig.data))
+            fig.add_trace(
+                go.Scattergl(
+                    name=transect_name,
+                    legendgroup=transect_name,
+                    mode="lines",
+                    line={"color": series_colour(i)},
+                    hovertemplate=transect_name
+                    + "<br>Date = %{x}<br>Flux = %{y}<extra></extra>",
+                ),
+                hf_x=np_time,
+                hf_y=np_flux[i],
+                downsampler=RollupAggregator(rollups, series=i),
+            )
+            if rolling_windows:
+                stats = get_rolling_stats(path, f"{variable}_{i}", np_flux[i])
+                add_rolling_overlays(
+                    fig, stats, np_time, rolling_windows, transect_name, i + 1
+                )
+
+        if tidal_filter:
+            np_residual = get_residual(path, variable, np_flux, tidal_filter)
+            add_residual_traces(
+                fig,
+                np_time,
+                np_residual,
+                transect_names,
+                raw_traces,
+                [True] * len(raw_traces),
+            )
 
     return fig
 
 
-def plot_transects_volume_flux(path_root: str):
-    fig = get_transect_flux(path_root, "volume_flux")
+def plot_transects_volume_flux(
+    path_root: str, rolling_windows=None, tidal_filter=None, cumulative=False
+):
+    fig = get_transect_flux(
+        path_root, "volume_flux", rolling_windows, tidal_filter, cumulative
+    )
 
     layout = dict(
         title="Volume flux in the DWS",
@@ -68,14 +108,24 @@ def plot_transects_volume_flux(path_root: str):
         legend_title_text="Transect",
     )
 
+    if cumulative:
+        layout.update(
+            title="Cumulative volume transport in the DWS",
+            yaxis=dict(title=dict(text="Volume (m<sup>3</sup>)")),
+        )
+
     fig.update_layout(layout)
 
     return fig
 
 
-def plot_transects_salinity_flux(path_root: str):
+def plot_transects_salinity_flux(
+    path_root: str, rolling_windows=None, tidal_filter=None, cumulative=False
+):
 
-    fig = get_transect_flux(path_root, "salinity_flux")
+    fig = get_transect_flux(
+        path_root, "salinity_flux", rolling_windows, tidal_filter, cumulative
+    )
 
     layout = dict(
         title="Salinity flux in the DWS",
@@ -88,6 +138,11 @@ def plot_transects_salinity_flux(path_root: str):
         hovermode="x",
         legend_title_text="Transect",
     )
+    if cumulative:
+        layout.update(
+            title="Cumulative salinity transport in the DWS",
+            yaxis=dict(title=dict(text="Salt (10<sup>-3</sup> m<sup>3</sup>)")),
+        )
 
     fig.update_layout(layout)
 
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+### Imports
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .visualisation_script_cache import is_fresh, sidecar_path, tmp_path
+from .visualisation_script_series import read_series_block
+
+### Global variables
+REL_PATH_TRANSECTS = Path("output_files/TR.volume_salt_flux.nc")
+TRANSPORT_VARIABLES = {
+    "volume_flux": "Volume (m<sup>3</sup>)",
+    "salinity_flux": "Salt (10<sup>-3</sup> m<sup>3</sup>)",
+}
+
+
+def time_steps_seconds(np_time):
+    """
+    Length in seconds of the interval each hourly value stands for, the last interval
+    takes the length of the one before.
+    """
+    seconds = np.diff(np_time).astype("timedelta64[ns]").astype(float) / 1e9
+    return np.append(seconds, seconds[-1] if len(seconds) else 3600.0)
+
+
+def build_cumulative_transport(np_time, np_flux):
+    """
+    Time integrals of the fluxes of all the transects with one prefix sum.
+
+    Parameters:
+    np_time : np.ndarray
+        The time axis of length n_time.
+    np_flux : np.ndarray
+        Array of shape (n_transects, n_time), nan values count as no transport.
+
+    Returns:
+    Array of shape (3, n_transects, n_time + 1) with the cumulative net, positive and
+    negative transport from the start of the series to the start of each interval,
+    so that the transport between time steps i0 and i1 is cum[..., i1] - cum[..., i0].
+    """
+    np_flux = np.nan_to_num(np.asarray(np_flux, dtype=float))
+    transport = np_flux * time_steps_seconds(np_time)
+
+    cumulative = np.zeros((3,) + np_flux.shape[:-1] + (np_flux.shape[-1] + 1,))
+    np.cumsum(transport, axis=-1, out=cumulative[0, ..., 1:])
+    np.cumsum(np.maximum(transport, 0.0), axis=-1, out=cumulative[1, ..., 1:])
+    np.cumsum(np.minimum(transport, 0.0), axis=-1, out=cumulative[2, ..., 1:])
+    return cumulative
+
+
+@lru_cache(maxsize=8)
+def _get_cumulative_transport(path: Path, variable: str, mtime: float):
+    np_time, np_flux, transect_names = read_series_block(
+        path, variable, "transect_name"
+    )
+
+    path_cache = sidecar_path(path, f".cumulative.{variable}.npy")
+    if not is_fresh(path_cache, path):
+        path_tmp = tmp_path(path_cache)
+        np.save(path_tmp, build_cumulative_transport(np_time, np_flux))
+        os.replace(path_tmp, path_cache)
+
+    return np_time, np.load(path_cache, mmap_mode="r"), transect_names
+
+
+def get_cumulative_transport(path_root: str | Path, variable="volume_flux"):
+    """
+    Return the time axis, the cached cumulative transport (see
+    build_cumulative_transport) and the transect names of TR.volume_salt_flux.nc.
+    """
+    path = (Path(path_root) / REL_PATH_TRANSECTS).resolve()
+    return _get_cumulative_transport(path, variable, path.stat().st_mtime)
+
+
+def _time_index(np_time, date, side):
+    if date is None:
+        return 0 if side == "left" else len(np_time)
+    return int(np.searchsorted(np_time, np.datetime64(pd.Timestamp(date)), side=side))
+
+
+def net_transport(
+    path_root: str | Path, start_date=None, end_date=None, variable="volume_flux"
+):
+    """
+    Net transport through each transect from start_date to end_date (both including).
+
+    Returns:
+    pandas.DataFrame indexed by transect name with the 'net', 'positive' and
+    'negative' transport.
+    """
+    np_time, cumulative, transect_names = get_cumulative_transport(path_root, variable)
+    i0 = _time_index(np_time, start_date, "left")
+    i1 = _time_index(np_time, end_date, "right")
+
+    transport = cumulative[..., i1] - cumulative[..., i0]
+    return pd.DataFrame(
+        {"net": transport[0], "positive": transport[1], "negative": transport[2]},
+        index=pd.Index(transect_names, name="transect"),
+    )
+
+
+def transport_summary(path_root: str | Path, start_date=None, end_date=None):
+    """
+    Net, positive and negative volume and salt transport through each transect from
+    start_date to end_date (both including).
+    """
+    return pd.concat(
+        {
+            variable: net_transport(path_root, start_date, end_date, variable)
+            for variable in TRANSPORT_VARIABLES
+        },
+        axis=1,
+    )
+
+
+def get_fig_transport_summary(path_root: str | Path, start_date=None, end_date=None):
+    """
+    Table of transport_summary for the chosen period.
+    """
+    import plotly.graph_objects as go
+
+    summary = transport_summary(path_root, start_date, end_date)
+
+    header = ["Transect"] + [
+        f"{TRANSPORT_VARIABLES[variable]} {column}" for variable, column in summary
+    ]
+    cells = [summary.index.tolist()] + [
+        [f"{value:.4g}" for value in summary[column]] for column in summary
+    ]
+
+    fig = go.Figure(
+        go.Table(header=dict(values=header), cells=dict(values=cells, align="right"))
+    )
+    fig.update_layout(
+        title=f"Transport through the transects from {start_date or 'the start'} "
+        + f"to {end_date or 'the end'}"
+    )
+
+    return fig
+
+
+if __name__ == "main":
+    print("Error: Should not print when run from notebook")